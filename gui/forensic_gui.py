@@ -1,7 +1,9 @@
 import tkinter as tk
-from tkinter import filedialog, scrolledtext, messagebox
+from tkinter import filedialog, scrolledtext, messagebox, ttk
 import os
 import sys
+import queue
+import threading
 # Add the parent directory to the system path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
@@ -9,6 +11,17 @@ from modules.file_loader import detect_file_type
 from modules import metadata_docx, metadata_pdf, metadata_jpg
 from modules.anomaly_checker import check_anomalies
 from modules.report_generator import generate_report
+from modules.result_store import ResultStore
+
+# Rows shown per page of the results table
+PAGE_SIZE = 200
+# Columns of the results table: (store sort key, heading, width)
+COLUMNS = [
+    ("risk_score", "Risk", 60),
+    ("file_type", "Type", 60),
+    ("timestamp", "Timestamp", 150),
+    ("path", "File", 420),
+]
 
 class ForensicApp:
     def __init__(self, root):
@@ -16,13 +29,45 @@ class ForensicApp:
         # Window title
         self.root.title("NavDocTrail")
         # Window dimensions
-        self.root.geometry("700x500")
-        # Upload button
-        self.upload_btn = tk.Button(root, text="Select Document", command=self.upload_file, font=("Arial", 12))
-        self.upload_btn.pack(pady=10)
-        # Scrollable text area for results
-        self.output_area = scrolledtext.ScrolledText(root, width=85, height=25, font=("Consolas", 10))
-        self.output_area.pack(pady=10)
+        self.root.geometry("900x700")
+        # Buttons for a single document or a whole folder
+        button_bar = tk.Frame(root)
+        button_bar.pack(pady=10)
+        self.upload_btn = tk.Button(button_bar, text="Select Document", command=self.upload_file, font=("Arial", 12))
+        self.upload_btn.pack(side=tk.LEFT, padx=5)
+        self.folder_btn = tk.Button(button_bar, text="Scan Folder", command=self.scan_folder, font=("Arial", 12))
+        self.folder_btn.pack(side=tk.LEFT, padx=5)
+
+        # Results table; only the current page lives in the widget
+        self.store = ResultStore()
+        self.page_offset = 0
+        table_frame = tk.Frame(root)
+        table_frame.pack(fill=tk.BOTH, expand=True, padx=10)
+        self.table = ttk.Treeview(table_frame, columns=[c[0] for c in COLUMNS], show="headings", height=12)
+        for key, heading, width in COLUMNS:
+            self.table.heading(key, text=heading, command=lambda k=key: self.sort_results(k))
+            self.table.column(key, width=width, anchor=tk.W, stretch=(key == "path"))
+        table_scroll = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=self.table.yview)
+        self.table.configure(yscrollcommand=table_scroll.set)
+        self.table.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        table_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.table.bind("<<TreeviewSelect>>", self.show_selected)
+
+        # Paging controls
+        page_bar = tk.Frame(root)
+        page_bar.pack(pady=5)
+        tk.Button(page_bar, text="< Prev", command=lambda: self.change_page(-PAGE_SIZE)).pack(side=tk.LEFT)
+        self.page_label = tk.Label(page_bar, text="No results", width=40)
+        self.page_label.pack(side=tk.LEFT)
+        tk.Button(page_bar, text="Next >", command=lambda: self.change_page(PAGE_SIZE)).pack(side=tk.LEFT)
+
+        # Scrollable text area for results (also the detail pane for table rows)
+        self.output_area = scrolledtext.ScrolledText(root, width=85, height=15, font=("Consolas", 10))
+        self.output_area.pack(pady=10, fill=tk.BOTH, expand=True, padx=10)
+
+        # Records arrive from the scan thread through this queue
+        self.incoming = queue.Queue()
+        self.scanning = False
 
     def upload_file(self):
         # Prompt the user to select a file
@@ -56,11 +101,20 @@ class ForensicApp:
             messagebox.showerror("Unsupported Format", "This file type is not supported.")
             return
 
+        # Embedded images (e.g. JPEGs inside a PDF) are reported separately
+        from modules.pipeline import child_records
+        children = child_records(filepath, metadata)
+
         # Check for anomalies or inconsistencies in the extracted metadata
         anomalies = check_anomalies(metadata)
 
         self.output_area.insert(tk.END, "Extracted Metadata:\n")
         for key, value in metadata.items():
+            if isinstance(value, list) and value:  # One entry per line, e.g. xmp_history
+                self.output_area.insert(tk.END, f"  - {key.capitalize()}:\n")
+                for item in value:
+                    self.output_area.insert(tk.END, f"      {item}\n")
+                continue
             self.output_area.insert(tk.END, f"  - {key.capitalize()}: {value}\n")
 
         self.output_area.insert(tk.END, "\nDetected Anomalies:\n")
@@ -80,10 +134,111 @@ class ForensicApp:
         else:
             self.output_area.insert(tk.END, "→ Low likelihood of tampering.\n")
 
+        if children:
+            self.output_area.insert(tk.END, "\nEmbedded Images:\n")
+            for child in children:
+                child_meta = child["metadata"]
+                self.output_area.insert(tk.END, f"  - {child['path']}: {child_meta.get('created_by')}, "
+                                                f"{child_meta.get('datetime')} (risk {child['risk_score']}/100)\n")
+
         # Save a detailed report into reports folder
         generate_report(filepath, metadata, anomalies)
+        for child in children:
+            generate_report(child["path"], child["metadata"], child["anomalies"], echo=False, parent=child["parent"])
         self.output_area.insert(tk.END, "\nFull report saved in the /reports folder.\n")
 
+    def scan_folder(self):
+        folder = filedialog.askdirectory(title="Select a folder to scan")
+        if not folder or self.scanning:
+            return
+        from modules.pipeline import scan_paths
+
+        self.store = ResultStore()
+        self.page_offset = 0
+        self.scanning = True
+        self.folder_btn.config(state=tk.DISABLED)
+        self.output_area.delete("1.0", tk.END)
+        self.output_area.insert(tk.END, f"🔍 Scanning folder: {folder}\n")
+
+        def worker():
+            # Pipeline runs off the Tk thread; results are handed over via the queue
+            try:
+                scan_paths([folder], self.incoming.put)
+            finally:
+                self.incoming.put(None)
+
+        threading.Thread(target=worker, daemon=True).start()
+        self.root.after(200, self.drain_results)
+
+    def drain_results(self):
+        # Move finished records into the store in bounded batches
+        finished = False
+        for _ in range(5000):
+            try:
+                record = self.incoming.get_nowait()
+            except queue.Empty:
+                break
+            if record is None:
+                finished = True
+                break
+            # Children get rows of their own, so the parent does not keep a second copy
+            children = record.pop("children", None) or []
+            self.store.add(record)
+            for child in children:
+                self.store.add(child)
+        self.refresh_page()
+        if finished:
+            self.scanning = False
+            self.folder_btn.config(state=tk.NORMAL)
+            self.output_area.insert(tk.END, f"Scan complete: {len(self.store)} file(s).\n")
+        else:
+            self.root.after(200, self.drain_results)
+
+    def refresh_page(self):
+        total = len(self.store)
+        self.table.delete(*self.table.get_children())
+        for index, row in self.store.page(self.page_offset, PAGE_SIZE):
+            self.table.insert("", tk.END, iid=str(index), values=row)
+        if total:
+            last = min(total, self.page_offset + PAGE_SIZE)
+            self.page_label.config(text=f"{self.page_offset + 1}-{last} of {total}")
+        else:
+            self.page_label.config(text="No results")
+
+    def change_page(self, step):
+        total = len(self.store)
+        new_offset = self.page_offset + step
+        if new_offset < 0 or new_offset >= max(total, 1):
+            return
+        self.page_offset = new_offset
+        self.refresh_page()
+
+    def sort_results(self, key):
+        # Clicking the same heading again flips the direction
+        current, descending = self.store.sort_state
+        descending = not descending if current == key else key == "risk_score"
+        self.store.sort_by(key, descending)
+        self.page_offset = 0
+        self.refresh_page()
+
+    def show_selected(self, _event=None):
+        selection = self.table.selection()
+        if not selection:
+            return
+        record = self.store.get(int(selection[0]))
+        self.output_area.delete("1.0", tk.END)
+        self.output_area.insert(tk.END, f"File: {record['path']}\n\n")
+        self.output_area.insert(tk.END, "Extracted Metadata:\n")
+        for key, value in record["metadata"].items():
+            self.output_area.insert(tk.END, f"  - {key.capitalize()}: {value}\n")
+        self.output_area.insert(tk.END, "\nDetected Anomalies:\n")
+        if record["anomalies"]:
+            for issue in record["anomalies"]:
+                self.output_area.insert(tk.END, f"  - {issue}\n")
+        else:
+            self.output_area.insert(tk.END, "  - None detected.\n")
+        self.output_area.insert(tk.END, f"\nRisk Score: {record['risk_score']}/100\n")
+
 if __name__ == "__main__":
     root = tk.Tk()
     app = ForensicApp(root)
@@ -1,8 +1,13 @@
 import os
+import sys
+import time
+import sqlite3
+import argparse
 from modules.file_loader import detect_file_type
 from modules import metadata_docx, metadata_pdf, metadata_jpg, metadata_png
 from modules.anomaly_checker import check_anomalies
 from modules.report_generator import generate_report
+from modules.pipeline import child_records
 
 def main():
     print("=== Digital Metadata Forensics Tool ===")
@@ -26,9 +31,261 @@ def main():
         print("Unsupported file type.")
         return
 
+    children = child_records(file_path, metadata)
     anomalies = check_anomalies(metadata)
     generate_report(file_path, metadata, anomalies)
+    for child in children:
+        generate_report(child["path"], child["metadata"], child["anomalies"], parent=child["parent"])
+
+def batch_scan(args):
+    from modules.pipeline import scan_paths
+    from modules.corpus_summary import CorpusSummary
+    from modules.timeline import TimelineBuilder
+    from modules.geo_index import GeoIndex
+    from modules.phash import DuplicateIndex
+
+    print("=== Digital Metadata Forensics Tool (batch) ===")
+    summary = CorpusSummary()
+    timeline = TimelineBuilder() if args.timeline else None
+    geo = GeoIndex() if (args.geo or args.near) else None
+    dupes = DuplicateIndex(args.dupe_radius) if args.dupes else None
+    index = None
+    if args.index:
+        from modules.search_index import MetadataIndex
+        index = MetadataIndex(args.index_db)
+
+    def on_result(record):
+        # Child records (e.g. JPEGs inside a PDF) go through the same sinks
+        for item in [record] + record.get("children", []):
+            if dupes is not None:
+                dupes.add_record(item)  # First: may add anomalies to the record
+            generate_report(item["path"], item["metadata"], item["anomalies"], echo=False, parent=item.get("parent"))
+            summary.update(item)
+            if timeline:
+                timeline.add_record(item)
+            if geo is not None:
+                geo.add_record(item)
+            print(f"[{item['risk_score']:3d}/100] {item['path']}")
+        if index is not None:
+            index.add_record(record)
+
+    stats = scan_paths(args.scan, on_result,
+                       read_concurrency=args.readers,
+                       workers=args.workers,
+                       queue_size=args.queue_size,
+                       **pipeline_options(args))
+    print(f"\nScanned {stats['extracted']} file(s), skipped {stats['skipped']}, errors {stats['errors']}.")
+    print(f"Corpus summary saved to: {summary.write_report()}")
+    if timeline:
+        print(f"Timeline ({timeline.events} events) saved to: {timeline.finish(args.timeline)}")
+    if geo is not None and args.geo:
+        print(f"Geolocation report saved to: {geo.write_report()}")
+    if dupes is not None:
+        print(f"Near-duplicate report saved to: {dupes.write_report()}")
+    if index is not None:
+        index.close()
+        print(f"Metadata index ({index.added} records) saved to: {args.index_db}")
+    if geo is not None and args.near:
+        lat, lon = (float(v) for v in args.near.split(","))
+        hits = geo.query_radius(lat, lon, args.radius_m)
+        print(f"\n{len(hits)} geotagged file(s) within {args.radius_m:g} m of {lat}, {lon}:")
+        for distance, path in hits:
+            print(f"  {distance:8.1f} m  {path}")
+
+def plan_shards(args):
+    from modules.sharding import plan_shards as plan, write_manifests
+
+    print("=== Digital Metadata Forensics Tool (shard plan) ===")
+    shards = plan(args.scan, args.plan_shards)
+    for shard, path in zip(shards, write_manifests(shards, args.shard_dir)):
+        types = ", ".join(f"{t} {b / 1048576:.1f} MB" for t, b in sorted(shard["bytes_by_type"].items()))
+        print(f"{path}: {len(shard['files'])} file(s), {shard['bytes'] / 1048576:.1f} MB ({types or 'empty'})")
+
+def run_shard(args):
+    from modules.sharding import run_shard as run
+
+    print("=== Digital Metadata Forensics Tool (shard worker) ===")
+    out_dir = run(args.run_shard,
+                  read_concurrency=args.readers,
+                  workers=args.workers,
+                  queue_size=args.queue_size,
+                  **pipeline_options(args))
+    print(f"Shard results saved to: {out_dir}")
+
+def merge_shards(args):
+    from modules.sharding import merge_shards as merge
+
+    print("=== Digital Metadata Forensics Tool (shard merge) ===")
+    outputs = merge(args.merge_shards, args.case_dir, args.dupe_radius)
+    for name, path in outputs.items():
+        print(f"{name.replace('_', ' ').capitalize()} saved to: {path}")
+
+def timeline_query(args):
+    from modules.timeline import query_range
+
+    count = 0
+    for event in query_range(args.timeline_query, args.start, args.end):
+        print(f"{event['timestamp']}  {event['field']:18s}  {event['path']}")
+        count += 1
+    print(f"\n{count} event(s).")
+
+def index_records(args):
+    from modules.search_index import MetadataIndex
+
+    index = MetadataIndex(args.index_db)
+    for path in args.index_records:
+        try:
+            print(f"{path}: {index.add_records_file(path)} record(s)")
+        except (OSError, ValueError) as e:
+            print(f"[Error] Could not index {path}: {e}")
+    index.close()
+    print(f"Metadata index ({index.added} records) saved to: {args.index_db}")
+
+def query_index(args):
+    from modules.search_index import MetadataIndex, FTS_COLUMNS
+
+    if not os.path.exists(args.index_db):
+        print(f"Error: Index not found: {args.index_db}")
+        return
+    index = MetadataIndex(args.index_db)
+    started = time.perf_counter()
+    try:
+        rows = index.query(args.query, args.limit)
+    except sqlite3.OperationalError as e:
+        print(f"[Error] Invalid query: {e}")
+        print(f"Searchable fields: {', '.join(FTS_COLUMNS)}")
+        return
+    finally:
+        index.close()
+    elapsed = (time.perf_counter() - started) * 1000.0
+    for row in rows:
+        stamp = row["modified"] or row["created"] or row["captured"] or "-"
+        print(f"[{row['risk_score']:3d}/100] {row['file_type']:4s}  {stamp:19s}  {row['path']}")
+    more = " (limit reached)" if len(rows) == args.limit else ""
+    print(f"\n{len(rows)} match(es) in {elapsed:.1f} ms{more}.")
+
+def watch_folders(args):
+    from modules.watcher import FolderWatcher
+    from modules.report_generator import append_record
+
+    results_path = os.path.join("reports", "watch_results.jsonl")
+    print("=== Digital Metadata Forensics Tool (watch) ===")
+    print(f"Watching {', '.join(args.watch)} (Ctrl+C to stop)")
+
+    def on_result(record):
+        generate_report(record["path"], record["metadata"], record["anomalies"], echo=False)
+        append_record(record, results_path)
+        print(f"[{record['risk_score']:3d}/100] {record['path']}")
+
+    watcher = FolderWatcher(args.watch, on_result,
+                            index_path=os.path.join("reports", ".watch_index.json"),
+                            interval=args.interval,
+                            use_inotify=not args.poll,
+                            read_concurrency=args.readers,
+                            workers=args.workers,
+                            queue_size=args.queue_size,
+                            **pipeline_options(args))
+    watcher.run()
+
+def run_service(args):
+    from modules.service import serve
+
+    serve(args.host, args.port,
+          allow_remote=args.allow_remote,
+          workers=args.workers,
+          max_concurrent=args.max_concurrent,
+          **pipeline_options(args))
+
+def extract_options(args):
+    # Per-type keyword arguments handed to the extractors
+    options = {}
+    if args.fast_png:
+        options.setdefault("png", {})["verify_idat_crc"] = False
+    if args.pdf_max_images != metadata_pdf.MAX_EMBEDDED_IMAGES:
+        options.setdefault("pdf", {})["max_images"] = args.pdf_max_images
+    if args.full_exif:
+        options.setdefault("jpg", {})["full_exif"] = True
+        options.setdefault("png", {})["full_exif"] = True
+    if args.dupes:
+        options["phash"] = True
+    if args.ela or args.ela_all:
+        options["ela"] = {"quality": args.ela_quality, "all": args.ela_all}
+    return options
+
+def pipeline_options(args):
+    # Per-file limits (0 disables a limit) and extractor options for the workers
+    return {
+        "timeout": args.timeout or None,
+        "max_rss_mb": args.max_rss_mb or None,
+        "max_bytes": args.max_bytes_mb * 1024 * 1024 if args.max_bytes_mb else None,
+        "extract_options": extract_options(args),
+    }
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Digital Metadata Forensics Tool")
+    parser.add_argument("--scan", nargs="+", metavar="PATH", help="Scan files/folders in batch mode")
+    parser.add_argument("--watch", nargs="+", metavar="DIR", help="Watch drop folders and scan new/changed files")
+    parser.add_argument("--interval", type=float, default=2.0, help="Seconds between watch cycles")
+    parser.add_argument("--poll", action="store_true", help="Force polling instead of inotify")
+    parser.add_argument("--timeline", metavar="OUT", help="Write a sorted case timeline (.csv or .jsonl) during --scan")
+    parser.add_argument("--timeline-query", metavar="FILE", help="Print events from a timeline file in a time window")
+    parser.add_argument("--start", help="Window start for --timeline-query, e.g. 2024-01-01")
+    parser.add_argument("--end", help="Window end for --timeline-query")
+    parser.add_argument("--geo", action="store_true", help="Write a GPS clustering / impossible-travel report during --scan")
+    parser.add_argument("--near", metavar="LAT,LON", help="List geotagged files near a point during --scan")
+    parser.add_argument("--radius-m", type=float, default=200.0, help="Search radius for --near in metres")
+    parser.add_argument("--fast-png", action="store_true", help="Skip IDAT CRC verification for PNG files")
+    parser.add_argument("--pdf-max-images", type=int, default=metadata_pdf.MAX_EMBEDDED_IMAGES,
+                        help="Embedded JPEGs examined per PDF (0 disables)")
+    parser.add_argument("--full-exif", action="store_true", help="Dump every EXIF tag (IFD0/EXIF/GPS/Interop/IFD1) for JPEG/PNG")
+    parser.add_argument("--dupes", action="store_true", help="Hash JPEG/PNG images and report near-duplicates during --scan")
+    parser.add_argument("--dupe-radius", type=int, default=6, help="Max Hamming distance (of 64 bits) for --dupes")
+    parser.add_argument("--ela", action="store_true", help="Run error level analysis on suspicious JPEGs (editor software, time or size mismatch, data after EOI)")
+    parser.add_argument("--ela-all", action="store_true", help="Run error level analysis on every JPEG")
+    parser.add_argument("--ela-quality", type=int, default=90, help="Recompression quality for ELA")
+    parser.add_argument("--index", action="store_true", help="Write extracted fields to the SQLite search index during --scan")
+    parser.add_argument("--index-db", default=os.path.join("reports", "metadata_index.sqlite"), help="Search index database")
+    parser.add_argument("--index-records", nargs="+", metavar="JSONL", help="Add records.jsonl / watch_results.jsonl files to the search index")
+    parser.add_argument("--query", metavar="EXPR", help='Search the index, e.g. "author:Smith AND producer:iText modified after 2024"')
+    parser.add_argument("--limit", type=int, default=50, help="Max results for --query")
+    parser.add_argument("--plan-shards", type=int, metavar="N", help="Split the --scan paths into N shard manifests")
+    parser.add_argument("--shard-dir", default="shards", help="Where --plan-shards writes its manifests")
+    parser.add_argument("--run-shard", metavar="MANIFEST", help="Scan the files of one shard manifest")
+    parser.add_argument("--merge-shards", nargs="+", metavar="DIR", help="Merge shard outputs into one case result")
+    parser.add_argument("--case-dir", default=os.path.join("reports", "case"), help="Output folder for --merge-shards")
+    parser.add_argument("--serve", action="store_true", help="Run the warm-pool scan service on localhost")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address for --serve")
+    parser.add_argument("--port", type=int, default=8765, help="Port for --serve")
+    parser.add_argument("--allow-remote", action="store_true",
+                        help="Let --serve bind a non-loopback --host (it reads local paths without authentication)")
+    parser.add_argument("--max-concurrent", type=int, default=None, help="Concurrent scans allowed by --serve")
+    parser.add_argument("--readers", type=int, default=8, help="Concurrent file reads (batch mode)")
+    parser.add_argument("--workers", type=int, default=None, help="Extraction processes (batch mode)")
+    parser.add_argument("--queue-size", type=int, default=32, help="Bound on each pipeline queue")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-file extraction timeout in seconds")
+    parser.add_argument("--max-rss-mb", type=int, default=1024, help="Per-worker memory limit in MB")
+    parser.add_argument("--max-bytes-mb", type=int, default=512, help="Skip files larger than this many MB")
+    return parser.parse_args(argv)
 
 if __name__ == "__main__":
-    main()
-    
\ No newline at end of file
+    args = parse_args(sys.argv[1:])
+    if args.plan_shards:
+        plan_shards(args)
+    elif args.run_shard:
+        run_shard(args)
+    elif args.merge_shards:
+        merge_shards(args)
+    elif args.scan:
+        batch_scan(args)
+    elif args.watch:
+        watch_folders(args)
+    elif args.index_records:
+        index_records(args)
+    elif args.query:
+        query_index(args)
+    elif args.timeline_query:
+        timeline_query(args)
+    elif args.serve:
+        run_service(args)
+    else:
+        main()
@@ -1,4 +1,9 @@
-from datetime import datetime
+from datetime import datetime, timedelta
+
+# Share of outlier blocks (%) at which ELA is reported as an anomaly
+ELA_OUTLIER_PCT = 2.0
+# EXIF times are local and document times usually UTC; allow any offset
+EMBEDDED_TIME_SLACK = timedelta(hours=14)
 
 def check_anomalies(metadata):
     # List to store detected anomalies
@@ -34,8 +39,78 @@ def check_anomalies(metadata):
         if app != "unknown" and prod != "unknown" and app not in prod and prod not in app:
             anomalies.append("Mismatch between editing software and producer.")
 
+    # Cross-check DOCX editing sessions (rsids) against revision and editing time
+    sessions = _as_int(metadata.get("rsid_sessions"))
+    if sessions is not None:
+        revision = _as_int(metadata.get("revision"))
+        if revision is not None and sessions > revision + 1:
+            anomalies.append(f"Document has {sessions} editing sessions but revision count is {revision}. Possible revision reset.")
+        total_time = _as_int(metadata.get("total_time"))
+        if total_time == 0 and sessions > 1:
+            anomalies.append(f"Total editing time is 0 minutes across {sessions} editing sessions.")
+    foreign = _as_int(metadata.get("rsid_foreign"))
+    if foreign:
+        anomalies.append(f"Body contains {foreign} revision session ID(s) not listed in settings. Text may be pasted from another document.")
+
+    # DOCX parts too large to parse; reported like an aborted extraction
+    for reason in metadata.get("parts_aborted") or []:
+        anomalies.append(f"Extraction aborted: {reason}.")
+
+    # PNG chunk integrity: bad CRCs and data after IEND suggest hand editing
+    crc_errors = _as_int(metadata.get("crc_errors"))
+    if crc_errors:
+        chunks = ", ".join(metadata.get("crc_error_chunks", []))
+        anomalies.append(f"{crc_errors} PNG chunk(s) have invalid CRCs ({chunks}). File may have been hand-edited.")
+    if metadata.get("iend_found") is False and "crc_checked" in metadata:
+        anomalies.append("PNG has no IEND chunk. File is truncated or was cut.")
+    chunk_error = metadata.get("chunk_error")
+    if chunk_error not in (None, "Unknown"):
+        anomalies.append(f"PNG chunk structure is corrupt ({chunk_error}). File may have been hand-edited or damaged.")
+    trailing = _as_int(metadata.get("trailing_bytes_after_iend"))
+    if trailing:
+        chunks_after = _as_int(metadata.get("chunks_after_iend")) or 0
+        anomalies.append(f"{trailing} byte(s) of data after IEND ({chunks_after} chunk(s)). Possible appended or hidden data.")
+
+    # JPEG data after the end-of-image marker
+    trailing_eoi = _as_int(metadata.get("trailing_bytes_after_eoi"))
+    if trailing_eoi:
+        anomalies.append(f"{trailing_eoi} byte(s) of data after the JPEG end-of-image marker. Possible appended or hidden data.")
+
+    # Error level analysis (only present when the ELA stage ran)
+    ela_score = metadata.get("ela_score")
+    if isinstance(ela_score, (int, float)) and ela_score >= ELA_OUTLIER_PCT:
+        anomalies.append(f"Error level analysis found compression inconsistencies in {ela_score}% of blocks. Possible local editing.")
+
     return anomalies
 
+def check_embedded_anomalies(child, parent):
+    # Cross-check an embedded image's capture time against its parent document
+    anomalies = []
+    captured_raw = next((child.get(f) for f in ("datetime", "datetime_digitized")
+                         if child.get(f) not in (None, "", "Unknown")), None)
+    captured = extract_datetime(captured_raw) if captured_raw else None
+    if captured is None:
+        return anomalies
+    for field, label in (("modified", "last modified"), ("created", "created")):
+        raw = parent.get(field)
+        stamp = extract_datetime(raw) if isinstance(raw, str) else None
+        if stamp is None:
+            continue
+        if captured > stamp + EMBEDDED_TIME_SLACK:
+            anomalies.append(f"Embedded image was captured ({captured_raw}) after the document was {label} ({raw}). Parent timestamps may be forged.")
+        break  # Only the latest known parent time matters
+    return anomalies
+
+def _as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+# Simple risk score: 20 points per anomaly
+def calculate_risk_score(anomalies):
+    return min(len(anomalies) * 20, 100)
+
 # Find datetime format in metadata
 def extract_datetime(raw):
     try:
@@ -0,0 +1,256 @@
+import os
+import re
+from datetime import datetime
+
+# High-cardinality fields tracked with approximate top-k counters
+TOP_K_FIELDS = ("created_by", "modified_by", "camera_model")
+STRIPPED_LABEL = "Unknown (Possibly Metadata-Stripped Image)"
+# Example anomaly texts kept per anomaly category
+MAX_EXAMPLES = 3
+# Variable parts of anomaly text (quoted values, parenthesised details other
+# than a plural "(s)", numbers) replaced to get its category
+ANOMALY_VARIABLES = (
+    (re.compile(r"'[^']*'"), "'...'"),
+    (re.compile(r"\((?!s\))[^()]*\)"), "(...)"),
+    (re.compile(r"\d+(?:\.\d+)?"), "N"),
+)
+
+class TopK:
+    """
+    Space-Saving heavy-hitters counter.
+
+    Keeps at most `capacity` counters; when a new value arrives and the table
+    is full, the smallest counter is taken over and its count becomes the new
+    value's error bound. Counts are over-estimates by at most that error.
+    """
+
+    def __init__(self, capacity=100):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self.examples = {}  # value -> smallest MAX_EXAMPLES example strings
+
+    def add(self, value, count=1, example=None):
+        if value in self.counts:
+            self.counts[value] += count
+        elif len(self.counts) < self.capacity:
+            self.counts[value] = count
+            self.errors[value] = 0
+        else:
+            victim = min(self.counts, key=self.counts.get)
+            floor = self.counts.pop(victim)
+            self.errors.pop(victim)
+            self.examples.pop(victim, None)
+            self.counts[value] = floor + count
+            self.errors[value] = floor
+        if example is not None:
+            kept = self.examples.get(value, [])
+            if example not in kept:
+                # The smallest examples are kept, so merged shards agree with one scan
+                self.examples[value] = sorted(kept + [example])[:MAX_EXAMPLES]
+
+    def top(self, n):
+        ranked = sorted(self.counts.items(), key=lambda kv: (-kv[1], kv[0]))
+        return [(value, count, self.errors[value]) for value, count in ranked[:n]]
+
+    def merge(self, other):
+        # Mergeable Space-Saving: a value missing from a full table may have
+        # occurred up to that table's smallest count, so that floor goes into
+        # both its count and its error bound
+        floors = (self._floor(), other._floor())
+        counts, errors = {}, {}
+        for value in self.counts.keys() | other.counts.keys():
+            count = error = 0
+            for table, floor in zip((self, other), floors):
+                if value in table.counts:
+                    count += table.counts[value]
+                    error += table.errors[value]
+                else:
+                    count += floor
+                    error += floor
+            counts[value] = count
+            errors[value] = error
+        keep = sorted(counts, key=lambda v: (-counts[v], v))[:self.capacity]
+        examples = {}
+        for value in keep:
+            merged = set(self.examples.get(value, [])) | set(other.examples.get(value, []))
+            if merged:
+                examples[value] = sorted(merged)[:MAX_EXAMPLES]
+        self.counts = {value: counts[value] for value in keep}
+        self.errors = {value: errors[value] for value in keep}
+        self.examples = examples
+
+    def to_state(self):
+        return {"capacity": self.capacity,
+                "counters": [[value, count, self.errors[value]] for value, count in self.counts.items()],
+                "examples": self.examples}
+
+    @classmethod
+    def from_state(cls, state):
+        counter = cls(state["capacity"])
+        for value, count, error in state["counters"]:
+            counter.counts[value] = count
+            counter.errors[value] = error
+        counter.examples = {value: list(kept) for value, kept in state.get("examples", {}).items()}
+        return counter
+
+    def _floor(self):
+        return min(self.counts.values()) if len(self.counts) >= self.capacity else 0
+
+def anomaly_category(anomaly):
+    # Anomaly text without its per-file details, e.g. "N byte(s) of data
+    # after IEND (...). Possible appended or hidden data."
+    for pattern, placeholder in ANOMALY_VARIABLES:
+        anomaly = pattern.sub(placeholder, anomaly)
+    return anomaly
+
+def _bucket(score):
+    return min(100, max(0, (score // 20) * 20))
+
+class CorpusSummary:
+    """
+    Streaming aggregates over scan records, updated once per record.
+
+    Memory is bounded: exact counters only for small fixed domains (file
+    types, risk buckets), Space-Saving top-k for free-text fields.
+    """
+
+    def __init__(self, top_k=100):
+        self.total = 0
+        self.stripped = 0
+        self.aborted = 0
+        self.by_type = {}
+        self.risk_histogram = {bucket: 0 for bucket in range(0, 101, 20)}
+        self.fields = {field: TopK(top_k) for field in TOP_K_FIELDS}
+        self.anomalies_by_type = {}  # file_type -> TopK of anomaly_category()
+        self.top_k = top_k
+
+    def update(self, record):
+        metadata = record.get("metadata") or {}
+        file_type = record.get("file_type", "unknown")
+        self.total += 1
+        self.by_type[file_type] = self.by_type.get(file_type, 0) + 1
+
+        self.risk_histogram[_bucket(record.get("risk_score", 0))] += 1
+
+        if metadata.get("extraction_status") == "aborted":
+            self.aborted += 1
+        if metadata.get("created_by") == STRIPPED_LABEL:
+            self.stripped += 1
+
+        for field, counter in self.fields.items():
+            value = metadata.get(field)
+            if value not in (None, "", "Unknown", STRIPPED_LABEL):
+                counter.add(str(value))
+
+        self._add_anomalies(file_type, record.get("anomalies", []))
+
+    def amend(self, file_type, old_score, new_score, anomalies):
+        # Findings attached to an already counted record (e.g. near-duplicates
+        # found when shards are merged): move it to its new risk bucket
+        self.risk_histogram[_bucket(old_score)] -= 1
+        self.risk_histogram[_bucket(new_score)] += 1
+        self._add_anomalies(file_type, anomalies)
+
+    def merge(self, other):
+        # Fold another summary (e.g. from a shard) into this one
+        self.total += other.total
+        self.stripped += other.stripped
+        self.aborted += other.aborted
+        for file_type, count in other.by_type.items():
+            self.by_type[file_type] = self.by_type.get(file_type, 0) + count
+        for bucket, count in other.risk_histogram.items():
+            self.risk_histogram[bucket] = self.risk_histogram.get(bucket, 0) + count
+        for field, counter in other.fields.items():
+            self.fields.setdefault(field, TopK(self.top_k)).merge(counter)
+        for file_type in sorted(other.anomalies_by_type):
+            self.anomalies_by_type.setdefault(file_type, TopK(self.top_k)).merge(other.anomalies_by_type[file_type])
+
+    def _add_anomalies(self, file_type, anomalies):
+        breakdown = self.anomalies_by_type.setdefault(file_type, TopK(self.top_k))
+        for anomaly in anomalies:
+            breakdown.add(anomaly_category(anomaly), example=anomaly)
+
+    def to_state(self):
+        # JSON-safe snapshot; from_state() rebuilds an equivalent summary
+        return {
+            "top_k": self.top_k,
+            "total": self.total,
+            "stripped": self.stripped,
+            "aborted": self.aborted,
+            "by_type": self.by_type,
+            "risk_histogram": [[bucket, count] for bucket, count in self.risk_histogram.items()],
+            "fields": {field: counter.to_state() for field, counter in self.fields.items()},
+            "anomalies_by_type": {t: counter.to_state() for t, counter in self.anomalies_by_type.items()},
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        summary = cls(state["top_k"])
+        summary.total = state["total"]
+        summary.stripped = state["stripped"]
+        summary.aborted = state["aborted"]
+        summary.by_type = dict(state["by_type"])
+        summary.risk_histogram = {bucket: count for bucket, count in state["risk_histogram"]}
+        summary.fields = {field: TopK.from_state(c) for field, c in state["fields"].items()}
+        summary.anomalies_by_type = {t: TopK.from_state(c) for t, c in state["anomalies_by_type"].items()}
+        return summary
+
+    def render(self, top_n=10):
+        lines = []
+        lines.append("=== CORPUS SUMMARY ===")
+        lines.append(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        lines.append(f"Files scanned: {self.total}")
+        lines.append("")
+
+        lines.append("Files by Type:")
+        for file_type, count in sorted(self.by_type.items()):
+            lines.append(f"  - {file_type}: {count}")
+        lines.append("")
+
+        share = (self.stripped / self.total * 100) if self.total else 0.0
+        lines.append(f"Metadata-Stripped Files: {self.stripped} ({share:.1f}%)")
+        lines.append(f"Extractions Aborted: {self.aborted}")
+        lines.append("")
+
+        lines.append("Risk Score Histogram:")
+        peak = max(self.risk_histogram.values()) or 1
+        for bucket, count in self.risk_histogram.items():
+            bar = "#" * round(count / peak * 40)
+            lines.append(f"  {bucket:3d}: {count:8d} {bar}")
+        lines.append("")
+
+        for field, counter in self.fields.items():
+            lines.append(f"Top {field}:")
+            top = counter.top(top_n)
+            if not top:
+                lines.append("  - None recorded.")
+            for value, count, error in top:
+                approx = f" (±{error})" if error else ""
+                lines.append(f"  - {value}: {count}{approx}")
+            lines.append("")
+
+        lines.append("Anomalies by Type:")
+        if not self.anomalies_by_type:
+            lines.append("  - None recorded.")
+        for file_type in sorted(self.anomalies_by_type):
+            lines.append(f"  {file_type}:")
+            counter = self.anomalies_by_type[file_type]
+            top = counter.top(top_n)
+            if not top:
+                lines.append("    - None detected.")
+            for category, count, error in top:
+                approx = f" (±{error})" if error else ""
+                lines.append(f"    - [{count}{approx}] {category}")
+                for example in counter.examples.get(category, []):
+                    if example != category:
+                        lines.append(f"        e.g. {example}")
+        return "\n".join(lines)
+
+    def write_report(self, out_dir="reports"):
+        os.makedirs(out_dir, exist_ok=True)
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        report_file = os.path.join(out_dir, f"corpus_summary_{timestamp}.txt")
+        with open(report_file, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        return report_file
@@ -0,0 +1,144 @@
+import io
+import os
+from datetime import datetime
+
+from modules.software_fingerprint import identify as identify_software
+from modules.report_generator import path_digest
+
+# Pixel access and recompression need Pillow + NumPy; the rest of the tool does not
+try:
+    import numpy as np
+    from PIL import Image
+except ImportError:
+    np = None
+    Image = None
+
+DEFAULT_QUALITY = 90
+# Tiles are multiples of 16 so recompression sees the same 8x8 / 4:2:0 grid
+DEFAULT_TILE = 1024
+# The whole image is decoded before tiling (3 bytes per pixel), so larger
+# images are skipped rather than risking the worker's memory limit
+MAX_PIXELS = 40_000_000
+BLOCK = 8
+# Blocks this many robust deviations above the median count as outliers
+OUTLIER_MADS = 4.0
+# ...and at least this many times the median error, and this absolute error
+OUTLIER_RATIO = 3.0
+MIN_OUTLIER_ERROR = 2.0
+
+def is_available():
+    return np is not None and Image is not None
+
+def suspicious_findings(metadata):
+    """
+    Reasons a JPEG deserves error level analysis under --ela: signs of an
+    editor, of re-saving or of appended data. Missing fields do not count;
+    almost every JPEG lacks some, so they would select every file.
+    """
+    reasons = []
+    for field in ("software", "xmp_creator_tool"):
+        label = identify_software(metadata.get(field), "image")
+        if label:
+            reasons.append(f"{field}: {label}")
+            break
+    if metadata.get("xmp_history") not in (None, "", "Unknown", []):
+        reasons.append("XMP edit history")
+    taken, digitized = metadata.get("datetime", "Unknown"), metadata.get("datetime_digitized", "Unknown")
+    if "Unknown" not in (taken, digitized) and taken != digitized:
+        reasons.append("capture and digitized times differ")
+    created, modified = metadata.get("xmp_create", "Unknown"), metadata.get("xmp_modify", "Unknown")
+    if "Unknown" not in (created, modified) and created != modified:
+        reasons.append("XMP modify time differs from create time")
+    for exif_key, frame_key in (("width", "frame_width"), ("height", "frame_height")):
+        exif, frame = metadata.get(exif_key, "Unknown"), metadata.get(frame_key, "Unknown")
+        if isinstance(exif, int) and isinstance(frame, int) and exif != frame:
+            reasons.append("EXIF size differs from the encoded frame")
+            break
+    trailing = metadata.get("trailing_bytes_after_eoi")
+    if isinstance(trailing, int) and trailing > 0:
+        reasons.append("data after EOI")
+    return reasons
+
+def error_level_analysis(data, quality=DEFAULT_QUALITY, tile=DEFAULT_TILE, heatmap_path=None,
+                         max_pixels=MAX_PIXELS):
+    """
+    Recompress a JPEG at a known quality and measure per 8x8 block error.
+
+    The image is decoded once, in full; only the recompression and
+    difference arrays are built one tile at a time. Images over max_pixels
+    are skipped before decoding, which is what bounds memory.
+    Returns ela_* metadata fields; writes a grayscale heatmap if asked.
+    """
+    result = {
+        "ela_status": "Unknown",
+        "ela_quality": quality,
+        "ela_mean_error": "Unknown",
+        "ela_p99_block_error": "Unknown",
+        "ela_score": "Unknown",           # % of blocks that are outliers
+        "ela_heatmap": "Unknown",
+    }
+    if not is_available():
+        result["ela_status"] = "unavailable (requires Pillow and NumPy)"
+        return result
+
+    tile = max(16, tile - tile % 16)
+    try:
+        image = Image.open(io.BytesIO(data))  # Reads the header only
+        pixels = image.width * image.height
+        if max_pixels and pixels > max_pixels:
+            result["ela_status"] = f"skipped (image has {pixels} pixels, limit {max_pixels})"
+            return result
+        image = image.convert("RGB") if image.mode != "RGB" else image
+        width = image.width - image.width % BLOCK
+        height = image.height - image.height % BLOCK
+        if width == 0 or height == 0:
+            result["ela_status"] = "image too small"
+            return result
+
+        blocks = np.zeros((height // BLOCK, width // BLOCK), dtype=np.float32)
+        for top in range(0, height, tile):
+            for left in range(0, width, tile):
+                box = (left, top, min(left + tile, width), min(top + tile, height))
+                blocks[top // BLOCK:box[3] // BLOCK, left // BLOCK:box[2] // BLOCK] = _tile_block_errors(image.crop(box), quality)
+
+        # Robust outlier threshold; the floor stops flat, clean images with a
+        # tiny spread from turning ordinary noise into "outliers"
+        median = float(np.median(blocks))
+        mad = float(np.median(np.abs(blocks - median)))
+        threshold = max(median + OUTLIER_MADS * 1.4826 * mad, OUTLIER_RATIO * median, MIN_OUTLIER_ERROR)
+        outliers = blocks > threshold
+        result["ela_mean_error"] = round(float(blocks.mean()), 3)
+        result["ela_p99_block_error"] = round(float(np.percentile(blocks, 99)), 3)
+        result["ela_score"] = round(float(outliers.mean()) * 100.0, 2)
+        result["ela_status"] = "ok"
+
+        if heatmap_path:
+            _write_heatmap(blocks, heatmap_path)
+            result["ela_heatmap"] = heatmap_path
+    except Exception as e:
+        result["ela_status"] = f"failed ({e})"
+    return result
+
+def heatmap_path_for(file_path, out_dir="reports"):
+    # The path hash keeps same-named files from different folders apart
+    name = os.path.splitext(os.path.basename(file_path))[0]
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    return os.path.join(out_dir, f"ela_{name}_{path_digest(file_path)}_{timestamp}.png")
+
+def _tile_block_errors(tile_image, quality):
+    # Mean absolute difference per 8x8 block for one tile
+    buf = io.BytesIO()
+    tile_image.save(buf, "JPEG", quality=quality)
+    buf.seek(0)
+    recompressed = np.asarray(Image.open(buf).convert("RGB"), dtype=np.int16)
+    original = np.asarray(tile_image, dtype=np.int16)
+    diff = np.abs(original - recompressed).astype(np.float32)
+    h, w = diff.shape[0] // BLOCK, diff.shape[1] // BLOCK
+    diff = diff[:h * BLOCK, :w * BLOCK]
+    return diff.reshape(h, BLOCK, w, BLOCK, 3).mean(axis=(1, 3, 4))
+
+def _write_heatmap(blocks, path):
+    peak = float(blocks.max()) or 1.0
+    pixels = (blocks / peak * 255.0).clip(0, 255).astype(np.uint8)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    Image.fromarray(pixels, mode="L").save(path)
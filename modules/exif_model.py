@@ -0,0 +1,230 @@
+import struct
+
+# Tag tables per IFD. Unlisted tags are still recorded, named "Tag0xNNNN".
+TIFF_TAGS = {
+    0x00FE: "NewSubfileType", 0x0100: "ImageWidth", 0x0101: "ImageLength",
+    0x0102: "BitsPerSample", 0x0103: "Compression", 0x0106: "PhotometricInterpretation",
+    0x010D: "DocumentName", 0x010E: "ImageDescription", 0x010F: "Make", 0x0110: "Model",
+    0x0111: "StripOffsets", 0x0112: "Orientation", 0x0115: "SamplesPerPixel",
+    0x0116: "RowsPerStrip", 0x0117: "StripByteCounts", 0x011A: "XResolution",
+    0x011B: "YResolution", 0x011C: "PlanarConfiguration", 0x0128: "ResolutionUnit",
+    0x012D: "TransferFunction", 0x0131: "Software", 0x0132: "DateTime", 0x013B: "Artist",
+    0x013C: "HostComputer", 0x013E: "WhitePoint", 0x013F: "PrimaryChromaticities",
+    0x0201: "JPEGInterchangeFormat", 0x0202: "JPEGInterchangeFormatLength",
+    0x0211: "YCbCrCoefficients", 0x0212: "YCbCrSubSampling", 0x0213: "YCbCrPositioning",
+    0x0214: "ReferenceBlackWhite", 0x02BC: "XMLPacket", 0x4746: "Rating",
+    0x4749: "RatingPercent", 0x8298: "Copyright", 0x83BB: "IPTC-NAA",
+    0x8769: "ExifIFDPointer", 0x8773: "InterColorProfile", 0x8825: "GPSInfoIFDPointer",
+    0x9C9B: "XPTitle", 0x9C9C: "XPComment", 0x9C9D: "XPAuthor", 0x9C9E: "XPKeywords",
+    0x9C9F: "XPSubject", 0xA480: "GDALMetadata", 0xC4A5: "PrintImageMatching",
+    0xC612: "DNGVersion", 0xC614: "UniqueCameraModel", 0xC62F: "CameraSerialNumber",
+    0xEA1C: "Padding",
+}
+EXIF_TAGS = {
+    0x829A: "ExposureTime", 0x829D: "FNumber", 0x8822: "ExposureProgram",
+    0x8824: "SpectralSensitivity", 0x8827: "ISOSpeedRatings", 0x8828: "OECF",
+    0x8830: "SensitivityType", 0x8832: "RecommendedExposureIndex", 0x9000: "ExifVersion",
+    0x9003: "DateTimeOriginal", 0x9004: "DateTimeDigitized", 0x9010: "OffsetTime",
+    0x9011: "OffsetTimeOriginal", 0x9012: "OffsetTimeDigitized",
+    0x9101: "ComponentsConfiguration", 0x9102: "CompressedBitsPerPixel",
+    0x9201: "ShutterSpeedValue", 0x9202: "ApertureValue", 0x9203: "BrightnessValue",
+    0x9204: "ExposureBiasValue", 0x9205: "MaxApertureValue", 0x9206: "SubjectDistance",
+    0x9207: "MeteringMode", 0x9208: "LightSource", 0x9209: "Flash", 0x920A: "FocalLength",
+    0x9214: "SubjectArea", 0x927C: "MakerNote", 0x9286: "UserComment",
+    0x9290: "SubSecTime", 0x9291: "SubSecTimeOriginal", 0x9292: "SubSecTimeDigitized",
+    0x9400: "Temperature", 0x9401: "Humidity", 0x9402: "Pressure", 0x9403: "WaterDepth",
+    0x9404: "Acceleration", 0x9405: "CameraElevationAngle", 0xA000: "FlashpixVersion",
+    0xA001: "ColorSpace", 0xA002: "PixelXDimension", 0xA003: "PixelYDimension",
+    0xA004: "RelatedSoundFile", 0xA005: "InteroperabilityIFDPointer",
+    0xA20B: "FlashEnergy", 0xA20E: "FocalPlaneXResolution", 0xA20F: "FocalPlaneYResolution",
+    0xA210: "FocalPlaneResolutionUnit", 0xA214: "SubjectLocation", 0xA215: "ExposureIndex",
+    0xA217: "SensingMethod", 0xA300: "FileSource", 0xA301: "SceneType", 0xA302: "CFAPattern",
+    0xA401: "CustomRendered", 0xA402: "ExposureMode", 0xA403: "WhiteBalance",
+    0xA404: "DigitalZoomRatio", 0xA405: "FocalLengthIn35mmFilm", 0xA406: "SceneCaptureType",
+    0xA407: "GainControl", 0xA408: "Contrast", 0xA409: "Saturation", 0xA40A: "Sharpness",
+    0xA40C: "SubjectDistanceRange", 0xA420: "ImageUniqueID", 0xA430: "CameraOwnerName",
+    0xA431: "BodySerialNumber", 0xA432: "LensSpecification", 0xA433: "LensMake",
+    0xA434: "LensModel", 0xA435: "LensSerialNumber", 0xA460: "CompositeImage",
+    0xA461: "SourceImageNumberOfCompositeImage", 0xA462: "SourceExposureTimesOfCompositeImage",
+    0xA500: "Gamma", 0xEA1C: "Padding", 0xEA1D: "OffsetSchema",
+}
+GPS_TAGS = {
+    0x0000: "GPSVersionID", 0x0001: "GPSLatitudeRef", 0x0002: "GPSLatitude",
+    0x0003: "GPSLongitudeRef", 0x0004: "GPSLongitude", 0x0005: "GPSAltitudeRef",
+    0x0006: "GPSAltitude", 0x0007: "GPSTimeStamp", 0x0008: "GPSSatellites",
+    0x0009: "GPSStatus", 0x000A: "GPSMeasureMode", 0x000B: "GPSDOP",
+    0x000C: "GPSSpeedRef", 0x000D: "GPSSpeed", 0x000E: "GPSTrackRef", 0x000F: "GPSTrack",
+    0x0010: "GPSImgDirectionRef", 0x0011: "GPSImgDirection", 0x0012: "GPSMapDatum",
+    0x0013: "GPSDestLatitudeRef", 0x0014: "GPSDestLatitude", 0x0015: "GPSDestLongitudeRef",
+    0x0016: "GPSDestLongitude", 0x0017: "GPSDestBearingRef", 0x0018: "GPSDestBearing",
+    0x0019: "GPSDestDistanceRef", 0x001A: "GPSDestDistance", 0x001B: "GPSProcessingMethod",
+    0x001C: "GPSAreaInformation", 0x001D: "GPSDateStamp", 0x001E: "GPSDifferential",
+    0x001F: "GPSHPositioningError",
+}
+INTEROP_TAGS = {
+    0x0001: "InteroperabilityIndex", 0x0002: "InteroperabilityVersion",
+    0x1000: "RelatedImageFileFormat", 0x1001: "RelatedImageWidth", 0x1002: "RelatedImageLength",
+}
+IFD_TABLES = {"IFD0": TIFF_TAGS, "EXIF": EXIF_TAGS, "GPS": GPS_TAGS, "Interop": INTEROP_TAGS, "IFD1": TIFF_TAGS}
+
+# TIFF field type -> (struct code, size); codes without a struct form are raw bytes
+TYPES = {
+    1: ("B", 1), 2: (None, 1), 3: ("H", 2), 4: ("I", 4), 5: ("II", 8), 6: ("b", 1),
+    7: (None, 1), 8: ("h", 2), 9: ("i", 4), 10: ("ii", 8), 11: ("f", 4), 12: ("d", 8), 13: ("I", 4),
+}
+# UNDEFINED tags that are really short ASCII strings
+ASCII_UNDEFINED = {0x9000, 0xA000, 0x0002}
+# UNDEFINED text with an 8-byte character code prefix (UserComment, GPS text)
+CHARSET_PREFIXED = {0x9286, 0x001B, 0x001C}
+MAX_VALUES = 64       # Longer arrays are truncated in the dump
+MAX_HEX_BYTES = 32    # Longer binary blobs are summarised by length
+
+class ExifEntry:
+    """One IFD entry: where its value lives, not the value itself."""
+
+    def __init__(self, ifd, tag, typ, count, offset):
+        self.ifd = ifd
+        self.tag = tag
+        self.type = typ
+        self.count = count
+        self.offset = offset  # Absolute offset of the value bytes in the buffer
+
+    @property
+    def name(self):
+        return IFD_TABLES[self.ifd].get(self.tag, f"Tag0x{self.tag:04X}")
+
+class ExifModel:
+    """
+    Every entry of IFD0, EXIF, GPS, Interop and IFD1, recorded as offset and
+    type only. Values are decoded on first request and cached, so building
+    the model costs one pass over the directory entries.
+    """
+
+    def __init__(self, data, tiff):
+        self.data = data
+        self.tiff = tiff
+        self.order = None
+        self.entries = []
+        self._index = {}    # (ifd, tag) -> entry
+        self._values = {}   # (ifd, tag) -> decoded value
+        self._read()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, ifd, tag, default="Unknown"):
+        # tag may be the numeric id or the table name
+        if isinstance(tag, str):
+            tag = next((t for t, name in IFD_TABLES[ifd].items() if name == tag), None)
+        entry = self._index.get((ifd, tag))
+        if entry is None:
+            return default
+        key = (ifd, tag)
+        if key not in self._values:
+            self._values[key] = self._decode(entry)
+        return self._values[key]
+
+    def to_dict(self):
+        # Decode everything: {"EXIF.LensModel": value, ...}
+        return {f"{e.ifd}.{e.name}": self.get(e.ifd, e.tag) for e in self.entries}
+
+    def _read(self):
+        data, tiff = self.data, self.tiff
+        endian = bytes(data[tiff:tiff+2])
+        if endian == b'II':
+            self.order = '<'
+        elif endian == b'MM':
+            self.order = '>'
+        else:
+            return
+        if tiff + 8 > len(data) or self._unpack("H", tiff + 2) != 0x002A:
+            self.order = None  # Not TIFF after all
+            return
+
+        visited = set()  # Guards against IFD loops in crafted files
+        next_ifd = self._walk("IFD0", self._unpack("I", tiff + 4), visited)
+        for ifd, parent, pointer in (("EXIF", "IFD0", 0x8769), ("GPS", "IFD0", 0x8825), ("Interop", "EXIF", 0xA005)):
+            entry = self._index.get((parent, pointer))
+            # Sub-IFD pointers are a single LONG/IFD, stored inline
+            if entry is not None and entry.type in (4, 13) and entry.count == 1:
+                self._walk(ifd, self._unpack("I", entry.offset), visited)
+        if next_ifd:
+            self._walk("IFD1", next_ifd, visited)
+
+    def _walk(self, ifd, rel, visited):
+        # Record one directory; returns the relative offset of the next IFD
+        data, tiff = self.data, self.tiff
+        if rel is None or rel in visited or tiff + rel + 2 > len(data):
+            return 0  # Bad pointer: skip only this directory
+        start = tiff + rel
+        visited.add(rel)
+        count = self._unpack("H", start)
+        count = min(count, (len(data) - start - 2) // 12)  # Entries that fit
+        pos = start + 2
+        for _ in range(count):
+            tag, typ, cnt = struct.unpack_from(self.order + "HHI", data, pos)
+            size = TYPES.get(typ, (None, 1))[1] * cnt
+            offset = pos + 8 if size <= 4 else tiff + self._unpack("I", pos + 8)
+            entry = ExifEntry(ifd, tag, typ, cnt, offset)
+            self.entries.append(entry)
+            self._index.setdefault((ifd, tag), entry)
+            pos += 12
+        return self._unpack("I", pos) if pos + 4 <= len(data) else 0
+
+    def _unpack(self, code, offset):
+        # None when the value would run past the buffer
+        if offset < 0 or offset + struct.calcsize(self.order + code) > len(self.data):
+            return None
+        return struct.unpack_from(self.order + code, self.data, offset)[0]
+
+    def _decode(self, entry):
+        code, size = TYPES.get(entry.type, (None, 1))
+        total = size * entry.count
+        if entry.offset < 0 or entry.offset + total > len(self.data):
+            return "Unknown"  # Value points outside the buffer
+        if entry.type == 2 or (entry.type == 7 and entry.tag in ASCII_UNDEFINED):
+            raw = bytes(self.data[entry.offset:entry.offset + total])
+            return raw.split(b'\x00', 1)[0].decode('latin-1').strip() or "Unknown"
+        if code is None:
+            return _describe_bytes(entry, bytes(self.data[entry.offset:entry.offset + min(total, 256)]), total, self.order)
+
+        n = min(entry.count, MAX_VALUES)
+        values = struct.unpack_from(self.order + code * n, self.data, entry.offset)
+        if len(code) == 2:  # (S)RATIONAL: pairs -> floats
+            values = tuple(round(a / b, 6) if b else None for a, b in zip(values[::2], values[1::2]))
+        if entry.count == 1:
+            return values[0]
+        values = list(values)
+        if entry.count > MAX_VALUES:
+            values.append(f"... {entry.count - MAX_VALUES} more")
+        return values
+
+def read_exif(data, tiff):
+    """ExifModel for the TIFF structure at `tiff`, or None if it is not TIFF."""
+    model = ExifModel(data, tiff)
+    return model if model.order else None
+
+def _describe_bytes(entry, head, total, order='<'):
+    if entry.tag in CHARSET_PREFIXED and len(head) >= 8:
+        text = head[8:]
+        if head[:8].startswith(b'UNICODE'):
+            # UCS-2 in the TIFF byte order unless the text starts with a BOM
+            if text[:2] in (b'\xff\xfe', b'\xfe\xff'):
+                encoding = 'utf-16'
+            else:
+                encoding = 'utf-16-le' if order == '<' else 'utf-16-be'
+            text = text[:len(text) & ~1]  # Whole code units only
+        else:
+            encoding = 'latin-1'
+        try:
+            return text.decode(encoding).strip('\x00 ') or "Unknown"
+        except UnicodeDecodeError:
+            pass
+    if entry.tag == 0x927C:  # MakerNote: size plus any vendor signature
+        signature = head[:16].split(b'\x00', 1)[0]
+        if signature and all(32 <= b < 127 for b in signature):
+            return f"<{total} bytes, {signature.decode('ascii').strip()}>"
+        return f"<{total} bytes>"
+    if total <= MAX_HEX_BYTES:
+        return head.hex()
+    return f"<{total} bytes>"
@@ -1,7 +1,18 @@
-def detect_file_type(file_path):
+from modules import metadata_docx, metadata_pdf, metadata_jpg, metadata_png
+
+# Extractor module for each detected file type
+EXTRACTORS = {
+    "docx": metadata_docx,
+    "pdf": metadata_pdf,
+    "jpg": metadata_jpg,
+    "png": metadata_png,
+}
+
+def detect_file_type(file_path, header=None):
     # Identify file format if extension has been altered
-    with open(file_path, 'rb') as f:
-        header = f.read(10)
+    if header is None:
+        with open(file_path, 'rb') as f:
+            header = f.read(10)
 
     # Splits . if filename contains more than the extension only
     ext = file_path.lower().split('.')[-1]
@@ -21,4 +32,13 @@ def detect_file_type(file_path):
     else:
         return "unknown"
     
-    # Markers extracted from https://stackoverflow.com/questions/78135164/whats-the-meaning-of-the-characters-in-the-jpeg-binary-byte-stream-opened-in-py#:~:text=A%20valid%20JPEG%20file%20must,will%20have%20a%20thumbnail%20embedded.
\ No newline at end of file
+    # Markers extracted from https://stackoverflow.com/questions/78135164/whats-the-meaning-of-the-characters-in-the-jpeg-binary-byte-stream-opened-in-py#:~:text=A%20valid%20JPEG%20file%20must,will%20have%20a%20thumbnail%20embedded.
+
+def extract_from_bytes(file_type, data, options=None):
+    # Run the matching extractor on an in-memory file.
+    # options maps file type -> keyword arguments for that extractor.
+    extractor = EXTRACTORS.get(file_type)
+    if extractor is None:
+        return None
+    kwargs = (options or {}).get(file_type, {})
+    return extractor.extract_metadata_from_bytes(data, **kwargs)
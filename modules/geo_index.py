@@ -0,0 +1,263 @@
+import os
+import math
+from datetime import datetime
+
+from modules.timeline import normalize_timestamp
+
+try:
+    import numpy as np
+except ImportError:  # Index still works, just without vectorised distances
+    np = None
+
+EARTH_RADIUS_M = 6371008.8
+# Anything faster than an airliner between two shots is flagged
+DEFAULT_MAX_SPEED_KMH = 1000.0
+
+class GeoIndex:
+    """
+    Grid index over geotagged scan records.
+
+    Points are bucketed into cells of `cell_deg` degrees. A radius query only
+    visits the cells overlapping the search circle and computes haversine
+    distances for those candidates in one NumPy call. Cell columns wrap at
+    the antimeridian, so a query at 179.9 E also sees points at 179.9 W.
+    """
+
+    def __init__(self, cell_deg=0.01):
+        self.cell_deg = cell_deg
+        self.columns = max(1, math.ceil(360.0 / cell_deg - 1e-9))  # Cells around a parallel
+        self.lats = []
+        self.lons = []
+        self.paths = []
+        self.cameras = []
+        self.times = []
+        self.cells = {}  # (row, col) -> [point ids]
+        self._frozen = None
+
+    def __len__(self):
+        return len(self.paths)
+
+    def add_record(self, record):
+        metadata = record.get("metadata") or {}
+        lat = _to_float(metadata.get("gps_latitude"))
+        lon = _to_float(metadata.get("gps_longitude"))
+        if lat is None or lon is None or not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            return False
+        self.add_point(lat, lon, record.get("path", ""),
+                       camera=_camera_key(metadata),
+                       timestamp=_capture_time(metadata))
+        return True
+
+    def add_point(self, lat, lon, path, camera=None, timestamp=None):
+        point_id = len(self.paths)
+        self.lats.append(lat)
+        self.lons.append(lon)
+        self.paths.append(path)
+        self.cameras.append(camera)
+        self.times.append(timestamp)
+        self.cells.setdefault(self._cell(lat, lon), []).append(point_id)
+        self._frozen = None
+        return point_id
+
+    def points(self):
+        # [(lat, lon, path, camera, timestamp)] in insertion order
+        return list(zip(self.lats, self.lons, self.paths, self.cameras, self.times))
+
+    def query_radius(self, lat, lon, radius_m):
+        # Returns [(distance_m, path)] sorted by distance
+        candidates = self._candidates(lat, lon, radius_m)
+        if not candidates:
+            return []
+        distances = self._distances(lat, lon, candidates)
+        hits = [(d, self.paths[i]) for i, d in zip(candidates, distances) if d <= radius_m]
+        hits.sort()
+        return hits
+
+    def clusters(self, eps_m=200.0, min_points=3):
+        """
+        Grid clustering: snap points to cells about eps_m wide and join
+        occupied neighbouring cells into clusters.
+        """
+        step = eps_m / 111_320.0
+        groups = {}
+        for i, (lat, lon) in enumerate(zip(self.lats, self.lons)):
+            groups.setdefault((math.floor(lat / step), math.floor(lon / step)), []).append(i)
+
+        seen = set()
+        found = []
+        for start in groups:
+            if start in seen:
+                continue
+            members = []
+            stack = [start]
+            seen.add(start)
+            while stack:
+                cell = stack.pop()
+                members.extend(groups[cell])
+                for dr in (-1, 0, 1):
+                    for dc in (-1, 0, 1):
+                        nxt = (cell[0] + dr, cell[1] + dc)
+                        if nxt in groups and nxt not in seen:
+                            seen.add(nxt)
+                            stack.append(nxt)
+            if len(members) >= min_points:
+                c_lat = sum(self.lats[i] for i in members) / len(members)
+                c_lon = sum(self.lons[i] for i in members) / len(members)
+                found.append({
+                    "latitude": c_lat,
+                    "longitude": c_lon,
+                    "size": len(members),
+                    "paths": sorted(self.paths[i] for i in members),
+                })
+        found.sort(key=lambda c: (-c["size"], c["latitude"], c["longitude"]))
+        return found
+
+    def impossible_travel(self, max_speed_kmh=DEFAULT_MAX_SPEED_KMH):
+        # Consecutive shots from the same camera body that imply impossible
+        # speed; points without a body serial are never compared
+        by_camera = {}
+        for i, (camera, stamp) in enumerate(zip(self.cameras, self.times)):
+            if camera and stamp:
+                by_camera.setdefault(camera, []).append(i)
+
+        flags = []
+        for camera, ids in sorted(by_camera.items()):
+            ids.sort(key=lambda i: (self.times[i], self.paths[i]))
+            for a, b in zip(ids, ids[1:]):
+                distance_m = haversine_m(self.lats[a], self.lons[a], self.lats[b], self.lons[b])
+                hours = (_parse_time(self.times[b]) - _parse_time(self.times[a])).total_seconds() / 3600.0
+                if distance_m < 1000:
+                    continue  # GPS jitter, not travel
+                speed = distance_m / 1000.0 / hours if hours > 0 else float("inf")
+                if speed > max_speed_kmh:
+                    flags.append({
+                        "camera": camera,
+                        "from": self.paths[a],
+                        "to": self.paths[b],
+                        "distance_km": distance_m / 1000.0,
+                        "hours": hours,
+                        "speed_kmh": speed,
+                    })
+        return flags
+
+    def travel_skipped(self):
+        # Points impossible_travel() cannot compare: {"no_serial": n, "no_time": n}
+        no_serial = sum(1 for camera in self.cameras if not camera)
+        no_time = sum(1 for camera, stamp in zip(self.cameras, self.times) if camera and not stamp)
+        return {"no_serial": no_serial, "no_time": no_time}
+
+    def write_report(self, out_dir="reports", eps_m=200.0, min_points=3, max_speed_kmh=DEFAULT_MAX_SPEED_KMH):
+        lines = ["=== GEOLOCATION REPORT ==="]
+        lines.append(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        lines.append(f"Geotagged files: {len(self)}")
+        lines.append("")
+        lines.append(f"Location Clusters (within ~{eps_m:g} m, at least {min_points} files):")
+        clusters = self.clusters(eps_m, min_points)
+        if not clusters:
+            lines.append("  - None found.")
+        for c in clusters:
+            lines.append(f"  - {c['latitude']:.6f}, {c['longitude']:.6f}: {c['size']} file(s)")
+            for path in c["paths"][:20]:
+                lines.append(f"      {path}")
+            if c["size"] > 20:
+                lines.append(f"      ... {c['size'] - 20} more")
+        lines.append("")
+        lines.append(f"Impossible Travel (faster than {max_speed_kmh:g} km/h):")
+        lines.append("  Only shots from the same camera body (EXIF BodySerialNumber) are compared.")
+        skipped = self.travel_skipped()
+        if skipped["no_serial"] or skipped["no_time"]:
+            lines.append(f"  Not compared: {skipped['no_serial']} file(s) without a body serial, "
+                         f"{skipped['no_time']} without a capture time.")
+        flags = self.impossible_travel(max_speed_kmh)
+        if not flags:
+            lines.append("  - None detected.")
+        for f in flags:
+            speed = "instant" if math.isinf(f["speed_kmh"]) else f"{f['speed_kmh']:.0f} km/h"
+            lines.append(f"  - {f['camera']}: {f['distance_km']:.1f} km in {f['hours']:.2f} h ({speed})")
+            lines.append(f"      {f['from']} -> {f['to']}")
+
+        os.makedirs(out_dir, exist_ok=True)
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        report_file = os.path.join(out_dir, f"geo_report_{timestamp}.txt")
+        with open(report_file, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines))
+        return report_file
+
+    def _cell(self, lat, lon):
+        return (math.floor(lat / self.cell_deg), self._column(lon) % self.columns)
+
+    def _column(self, lon):
+        # Unwrapped column; callers take it modulo self.columns
+        return math.floor((lon + 180.0) / self.cell_deg)
+
+    def _candidates(self, lat, lon, radius_m):
+        # Cells overlapping the circle's bounding box (clamped near the poles),
+        # with columns taken round the antimeridian
+        dlat = math.degrees(radius_m / EARTH_RADIUS_M)
+        coslat = max(math.cos(math.radians(lat)), 1e-6)
+        dlon = min(180.0, dlat / coslat)
+        r0, r1 = math.floor((lat - dlat) / self.cell_deg), math.floor((lat + dlat) / self.cell_deg)
+        c0, c1 = self._column(lon - dlon), self._column(lon + dlon)
+        if c1 - c0 + 1 >= self.columns:
+            columns = range(self.columns)
+        else:
+            columns = [col % self.columns for col in range(c0, c1 + 1)]
+        if (r1 - r0 + 1) * len(columns) > len(self.cells):
+            # Huge radius: walking occupied cells is cheaper than the box
+            return list(range(len(self.paths)))
+        ids = []
+        for row in range(r0, r1 + 1):
+            for col in columns:
+                ids.extend(self.cells.get((row, col), ()))
+        return ids
+
+    def _distances(self, lat, lon, ids):
+        if np is None:
+            return [haversine_m(lat, lon, self.lats[i], self.lons[i]) for i in ids]
+        if self._frozen is None:
+            self._frozen = (np.radians(np.asarray(self.lats)), np.radians(np.asarray(self.lons)))
+        lats, lons = self._frozen
+        idx = np.asarray(ids)
+        return haversine_np(math.radians(lat), math.radians(lon), lats[idx], lons[idx]).tolist()
+
+def haversine_np(lat1, lon1, lat2, lon2):
+    # Inputs in radians; lat2/lon2 may be arrays
+    sin_dlat = np.sin((lat2 - lat1) / 2.0)
+    sin_dlon = np.sin((lon2 - lon1) / 2.0)
+    a = sin_dlat ** 2 + np.cos(lat1) * np.cos(lat2) * sin_dlon ** 2
+    return 2.0 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    # Inputs in degrees
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    a = math.sin((p2 - p1) / 2.0) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(math.radians(lon2 - lon1) / 2.0) ** 2
+    return 2.0 * EARTH_RADIUS_M * math.asin(math.sqrt(min(a, 1.0)))
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def _camera_key(metadata):
+    # One physical camera: make + model alone would merge every phone of a
+    # model in the case, so without a body serial there is no key
+    serial = metadata.get("body_serial", "Unknown")
+    if serial in (None, "", "Unknown"):
+        return None
+    make = metadata.get("make", "Unknown")
+    model = metadata.get("camera_model", "Unknown")
+    name = " ".join(part for part in (make, model) if part != "Unknown")
+    return f"{name} #{serial}".strip()
+
+def _capture_time(metadata):
+    for field in ("datetime", "datetime_digitized"):
+        raw = metadata.get(field)
+        if isinstance(raw, str) and raw != "Unknown":
+            stamp = normalize_timestamp(raw)
+            if stamp:
+                return stamp
+    return None
+
+def _parse_time(stamp):
+    return datetime.strptime(stamp, "%Y-%m-%dT%H:%M:%S")
@@ -0,0 +1,186 @@
+import os
+import time
+import queue
+import threading
+import multiprocessing
+
+from modules.anomaly_checker import calculate_risk_score
+
+# Default per-file limits; None disables a limit
+DEFAULT_TIMEOUT = 60.0            # Wall-clock seconds per file
+DEFAULT_MAX_RSS_MB = 1024         # Resident memory of a worker process
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024  # Largest file we are willing to read
+
+_POLL_INTERVAL = 0.05
+
+class GovernedPool:
+    """
+    Pool of extraction worker processes with per-file resource limits.
+
+    Each file runs in a worker; if it exceeds the wall-clock timeout or RSS
+    limit the worker is killed and replaced, and the file is returned as an
+    "extraction aborted" record so the rest of the batch keeps going.
+    """
+
+    def __init__(self, workers=None, timeout=DEFAULT_TIMEOUT, max_rss_mb=DEFAULT_MAX_RSS_MB, extract_options=None):
+        self.timeout = timeout
+        self.max_rss = max_rss_mb * 1024 * 1024 if max_rss_mb else None
+        self.size = max(1, workers or os.cpu_count() or 1)
+        self.extract_options = extract_options or {}
+        self.aborted = 0
+        self._ctx = multiprocessing.get_context("spawn")  # Safe to start from threads
+        self._idle = queue.Queue()
+        self._all = set()
+        self._lock = threading.Lock()
+        for _ in range(self.size):
+            self._idle.put(self._spawn())
+
+    def run(self, path, file_type, data):
+        # Blocking; safe to call from several threads at once
+        worker = self._idle.get()
+        try:
+            worker.conn.send((path, file_type, data))
+            reason = self._wait(worker)
+            if reason is None:
+                record = worker.conn.recv()
+                if isinstance(record, dict):
+                    self._idle.put(worker)
+                    return record
+                reason = record  # Worker gave up before it could read the file
+        except (EOFError, OSError, BrokenPipeError):
+            reason = "worker process crashed"
+        self._retire(worker)
+        self._idle.put(self._spawn())
+        self.aborted += 1
+        return aborted_record(path, file_type, reason)
+
+    def _wait(self, worker):
+        # Returns None when a result is ready, otherwise the abort reason
+        started = time.monotonic()
+        while not worker.conn.poll(_POLL_INTERVAL):
+            if not worker.process.is_alive():
+                if worker.conn.poll():
+                    return None  # Sent its last message just before exiting
+                return "worker process crashed"
+            if self.timeout and time.monotonic() - started > self.timeout:
+                return f"timeout after {self.timeout:g}s"
+            if self.max_rss:
+                rss = _rss_bytes(worker.process.pid)
+                if rss and rss > self.max_rss:
+                    return f"memory limit exceeded ({rss // (1024 * 1024)} MB RSS)"
+        return None
+
+    def _spawn(self):
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(target=_worker_main, args=(child_conn, self.max_rss, self.extract_options), daemon=True)
+        process.start()
+        child_conn.close()
+        worker = _Worker(process, parent_conn)
+        if parent_conn.poll(30):
+            parent_conn.recv()  # Ready signal once extractors are imported
+        with self._lock:
+            self._all.add(worker)
+        return worker
+
+    def _retire(self, worker):
+        with self._lock:
+            self._all.discard(worker)
+        if worker.process.is_alive():
+            worker.process.kill()
+        worker.process.join(timeout=5)
+        worker.conn.close()
+
+    def close(self):
+        with self._lock:
+            workers = list(self._all)
+        for worker in workers:
+            try:
+                worker.conn.send(None)  # Ask for a clean exit
+            except (OSError, BrokenPipeError):
+                pass
+        for worker in workers:
+            worker.process.join(timeout=2)
+            self._retire(worker)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class _Worker:
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+
+def aborted_record(path, file_type, reason):
+    anomalies = [f"Extraction aborted: {reason}."]
+    return {
+        "path": path,
+        "file_type": file_type,
+        "metadata": {"file_type": file_type, "extraction_status": "aborted"},
+        "anomalies": anomalies,
+        "risk_score": calculate_risk_score(anomalies),
+    }
+
+def _worker_main(conn, max_rss, extract_options):
+    # Extractors are imported once per worker, not once per file
+    from modules.pipeline import scan_bytes
+    _limit_address_space(max_rss)
+    conn.send("ready")
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        except MemoryError:
+            conn.send("memory limit exceeded")
+            return
+        if task is None:
+            return
+        path, file_type, data = task
+        try:
+            record = scan_bytes(path, file_type, data, extract_options)
+        except MemoryError:
+            record = aborted_record(path, file_type, "memory limit exceeded")
+        except Exception as e:
+            record = aborted_record(path, file_type, f"extractor error ({e})")
+        conn.send(record)
+
+def _limit_address_space(max_rss):
+    # Hard backstop next to the parent's RSS polling: allocations past the
+    # budget raise MemoryError inside the worker instead of swapping the box
+    if not max_rss:
+        return
+    try:
+        import resource
+    except ImportError:
+        return  # Not available on Windows
+    base = _vm_size_bytes()
+    if base is None:
+        return
+    limit = base + max_rss
+    try:
+        soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+        if hard != resource.RLIM_INFINITY:
+            limit = min(limit, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    except (ValueError, OSError):
+        pass
+
+def _rss_bytes(pid):
+    return _proc_status_kb(f"/proc/{pid}/status", "VmRSS:")
+
+def _vm_size_bytes():
+    return _proc_status_kb("/proc/self/status", "VmSize:")
+
+def _proc_status_kb(status_path, field):
+    # Linux only; other platforms just skip the RSS check
+    try:
+        with open(status_path, 'r') as f:
+            for line in f:
+                if line.startswith(field):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        return None
+    return None
@@ -1,7 +1,27 @@
+import io
+import os
 import zipfile
 import xml.etree.ElementTree as ET
 
+from modules import metadata_jpg, metadata_png
+
+# Largest docProps/settings part we will parse (guards against bloated XML)
+MAX_PART_BYTES = 8 * 1024 * 1024
+# Embedded images under word/media/ examined per document
+MAX_MEDIA_FILES = 64
+# Media members larger than this (uncompressed) are counted but not opened
+MAX_MEDIA_BYTES = 64 * 1024 * 1024
+# Media extension -> extractor type
+MEDIA_TYPES = {".jpg": "jpg", ".jpeg": "jpg", ".png": "png"}
+
 def extract_metadata(file_path):
+    return _extract(file_path)
+
+def extract_metadata_from_bytes(data):
+    # ZipFile needs a seekable file object
+    return _extract(io.BytesIO(data))
+
+def _extract(source):
     # Default metadata values
     metadata = {
         "file_type": "docx",
@@ -36,17 +56,28 @@ def extract_metadata(file_path):
         "scale_crop": "Unknown",
         "custom_properties": {},
         "has_macros": False,             
-        "track_changes": False            
+        "track_changes": False,
+        "rsid_root": "Unknown",           # First editing session (settings.xml)
+        "rsid_sessions": "Unknown",       # Sessions listed in settings w:rsids
+        "rsid_body_sessions": "Unknown",  # Distinct rsids used in document.xml
+        "rsid_foreign": "Unknown",        # Body rsids missing from settings
+        "rsid_paragraphs": "Unknown",
+        "rsid_runs": "Unknown",
+        "rsid_top": {},                   # rsid -> [paragraphs, runs] for the busiest sessions
+        "media_files": 0,                 # Members under word/media/
+        "media_images_examined": 0,       # JPEG/PNG members passed to the image extractors
+        "parts_aborted": [],              # Why docProps/settings parts were skipped
+        "embedded_images": []             # Child entries; the pipeline turns them into records
     }
 
     try:
         # Open docx 
-        with zipfile.ZipFile(file_path, 'r') as z:
+        with zipfile.ZipFile(source, 'r') as z:
             names = set(z.namelist())
             
             # core.xml contains basic data
             if "docProps/core.xml" in names:
-                core_root = ET.fromstring(z.read("docProps/core.xml"))
+                core_root = _parse_part(z, "docProps/core.xml", metadata)
                 for elem in core_root.iter():
                     tag = _local(elem.tag)
                     txt = (elem.text or "").strip() if elem.text else ""
@@ -80,7 +111,7 @@ def extract_metadata(file_path):
 
             # app.xml contains application details
             if "docProps/app.xml" in names:
-                app_root = ET.fromstring(z.read("docProps/app.xml"))
+                app_root = _parse_part(z, "docProps/app.xml", metadata)
                 for elem in app_root.iter():
                     tag = _local(elem.tag)
                     txt = (elem.text or "").strip() if elem.text else ""
@@ -121,7 +152,7 @@ def extract_metadata(file_path):
             # custom.xml has user-defined properties
             if "docProps/custom.xml" in names:
                 try:
-                    cust_root = ET.fromstring(z.read("docProps/custom.xml"))
+                    cust_root = _parse_part(z, "docProps/custom.xml", metadata)
                     for prop in cust_root.iter():
                         if _local(prop.tag) != "property":
                             continue
@@ -142,17 +173,39 @@ def extract_metadata(file_path):
             if "word/vbaProject.bin" in names or "word/vbaData.xml" in names:
                 metadata["has_macros"] = True
 
-            # Check if track changes is enabled
+            # Check if track changes is enabled and collect revision session IDs
+            settings_rsids = None
             if "word/settings.xml" in names:
                 try:
-                    settings_root = ET.fromstring(z.read("word/settings.xml"))
+                    settings_root = _parse_part(z, "word/settings.xml", metadata)
                     for elem in settings_root.iter():
-                        if _local(elem.tag) == "trackRevisions":
+                        tag = _local(elem.tag)
+                        if tag == "trackRevisions":
                             metadata["track_changes"] = True
-                            break
+                        elif tag == "rsidRoot":
+                            metadata["rsid_root"] = _attr(elem, "val") or "Unknown"
+                        elif tag == "rsid":
+                            if settings_rsids is None:
+                                settings_rsids = set()
+                            val = _attr(elem, "val")
+                            if val:
+                                settings_rsids.add(val.upper())
+                    if settings_rsids is not None:
+                        metadata["rsid_sessions"] = len(settings_rsids)
                 except Exception:
                     pass
 
+            # Count paragraphs/runs per editing session in the body
+            if "word/document.xml" in names:
+                try:
+                    with z.open("word/document.xml") as body:
+                        _scan_rsids(body, metadata, settings_rsids)
+                except Exception:
+                    pass
+
+            # Embedded photos/screenshots keep their own EXIF
+            _scan_media(z, metadata)
+
             # Fill missing creator fields
             if metadata["last_modified_by"] != "Unknown":
                 metadata["modified_by"] = metadata["last_modified_by"]
@@ -175,3 +228,103 @@ def _local(tag):
     if '}' in tag:
         return tag.split('}', 1)[1]
     return tag
+
+# Attribute lookup ignoring the namespace (w:val, w:rsidR, ...)
+def _attr(elem, name):
+    for key, value in elem.attrib.items():
+        if _local(key) == name:
+            return value
+    return None
+
+# WordprocessingML main namespace, as it appears in parsed tag names
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+# Number of busiest sessions kept in rsid_top
+RSID_TOP_N = 5
+
+def _scan_rsids(stream, metadata, settings_rsids):
+    # Streaming pass over document.xml; finished elements are dropped as we
+    # go so memory depends on nesting depth, not document length
+    p_tag, r_tag = W_NS + "p", W_NS + "r"
+    rsid_r, rsid_rpr = W_NS + "rsidR", W_NS + "rsidRPr"
+    paragraphs = {}
+    runs = {}
+    total_p = total_r = 0
+    stack = []
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            tag = elem.tag
+            if tag == p_tag:
+                total_p += 1
+                rsid = elem.get(rsid_r)
+                if rsid:
+                    rsid = rsid.upper()
+                    paragraphs[rsid] = paragraphs.get(rsid, 0) + 1
+            elif tag == r_tag:
+                total_r += 1
+                rsid = elem.get(rsid_r) or elem.get(rsid_rpr)
+                if rsid:
+                    rsid = rsid.upper()
+                    runs[rsid] = runs.get(rsid, 0) + 1
+            stack.append(elem)
+        else:
+            stack.pop()
+            if stack:
+                del stack[-1][:]  # All earlier siblings are finished too
+
+    used = set(paragraphs) | set(runs)
+    metadata["rsid_paragraphs"] = total_p
+    metadata["rsid_runs"] = total_r
+    metadata["rsid_body_sessions"] = len(used)
+    if settings_rsids is not None:
+        metadata["rsid_foreign"] = len(used - settings_rsids)
+    busiest = sorted(used, key=lambda r: (-(paragraphs.get(r, 0) + runs.get(r, 0)), r))[:RSID_TOP_N]
+    metadata["rsid_top"] = {r: [paragraphs.get(r, 0), runs.get(r, 0)] for r in busiest}
+
+def _scan_media(z, metadata):
+    # Members are streamed straight from the archive; the JPEG reader stops at
+    # the scan data and the PNG reader at the first IDAT, so only the header
+    # part of each image is ever inflated
+    for info in z.infolist():
+        if not info.filename.startswith("word/media/") or info.is_dir():
+            continue
+        metadata["media_files"] += 1
+        file_type = MEDIA_TYPES.get(os.path.splitext(info.filename)[1].lower())
+        if file_type is None or info.file_size > MAX_MEDIA_BYTES or metadata["media_images_examined"] >= MAX_MEDIA_FILES:
+            continue
+        metadata["media_images_examined"] += 1
+        try:
+            with z.open(info) as member:
+                if file_type == "jpg":
+                    child = metadata_jpg.extract_metadata_from_stream(member)
+                else:
+                    child = metadata_png.extract_metadata_from_stream(member, verify_idat_crc=False, header_only=True)
+        except Exception as e:  # A damaged member must not cost the document fields
+            print(f"[Error] Could not read {info.filename}: {e}")
+            continue
+        metadata["embedded_images"].append({
+            "name": info.filename,
+            "file_type": file_type,
+            "length": info.file_size,
+            "metadata": child,
+        })
+
+# Parse an XML part. A part over MAX_PART_BYTES is skipped with its reason in
+# parts_aborted, and an empty element is returned so the rest of the document
+# is still read
+def _parse_part(z, name, metadata):
+    try:
+        return ET.fromstring(_read_member(z, name))
+    except ValueError as e:
+        metadata["parts_aborted"].append(str(e))
+        return ET.Element(name)
+
+# Read a zip member, refusing parts larger than MAX_PART_BYTES
+def _read_member(z, name):
+    info = z.getinfo(name)
+    if info.file_size > MAX_PART_BYTES:
+        raise ValueError(f"{name} is {info.file_size} bytes (limit {MAX_PART_BYTES})")
+    with z.open(info) as f:
+        data = f.read(MAX_PART_BYTES + 1)  # Declared size can lie
+    if len(data) > MAX_PART_BYTES:
+        raise ValueError(f"{name} exceeds {MAX_PART_BYTES} bytes")
+    return data
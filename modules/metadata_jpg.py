@@ -1,4 +1,59 @@
-def extract_metadata(file_path):
+import re
+
+from modules import xmp
+from modules.exif_model import read_exif
+from modules.software_fingerprint import identify as identify_software
+
+# Most header bytes read in stream mode (APPn segments are at most 64 KB each)
+MAX_HEADER_BYTES = 4 * 1024 * 1024
+# Segments recorded per file; real JPEGs have a few dozen
+MAX_SEGMENTS = 10000
+# Bytes read per call in stream mode
+STREAM_BLOCK = 64 * 1024
+# A real marker: 0xFF followed by neither a stuffed 0x00, a fill 0xFF nor RSTn.
+# re works on bytes and memoryview alike, and skips entropy-coded data in C.
+_MARKER = re.compile(rb'\xff[^\x00\xff\xd0-\xd7]')
+# Markers without a length field
+_STANDALONE = {0x01, 0xD8, 0xD9}
+SOF_PROCESSES = {
+    0xC0: "baseline", 0xC1: "extended sequential", 0xC2: "progressive", 0xC3: "lossless",
+    0xC5: "differential sequential", 0xC6: "differential progressive", 0xC7: "differential lossless",
+    0xC9: "arithmetic sequential", 0xCA: "arithmetic progressive", 0xCB: "arithmetic lossless",
+    0xCD: "arithmetic differential sequential", 0xCE: "arithmetic differential progressive",
+    0xCF: "arithmetic differential lossless",
+}
+XMP_HEADER = b'http://ns.adobe.com/xap/1.0/\x00'
+ICC_HEADER = b'ICC_PROFILE\x00'
+MPF_HEADER = b'MPF\x00'
+# IJG standard luminance table in zigzag order (DQT stores tables this way)
+STD_LUMINANCE_ZIGZAG = (
+    16, 11, 12, 14, 12, 10, 16, 14, 13, 14, 18, 17, 16, 19, 24, 40,
+    26, 24, 22, 22, 24, 49, 35, 37, 29, 40, 58, 51, 61, 60, 57, 51,
+    56, 55, 64, 72, 92, 78, 64, 68, 87, 69, 55, 56, 80, 109, 81, 87,
+    95, 98, 103, 104, 103, 62, 77, 113, 121, 112, 100, 120, 92, 101, 103, 99,
+)
+
+def extract_metadata(file_path, full_exif=False):
+    try:
+        with open(file_path, 'rb') as f:
+            data = f.read()  # Read whole file
+    except Exception as e:
+        print(f"[Error] Could not extract image metadata: {e}")  # Log error
+        data = None
+    return extract_metadata_from_bytes(data, full_exif)
+
+def extract_metadata_from_stream(f, full_exif=False):
+    # Read only the marker segments before the scan data (SOS); enough for
+    # EXIF and SOF dimensions without pulling the compressed image
+    try:
+        head = _read_header_segments(f)
+    except Exception as e:
+        print(f"[Error] Could not extract image metadata: {e}")  # Log error
+        head = None
+    return extract_metadata_from_bytes(head, full_exif)
+
+def extract_metadata_from_bytes(data, full_exif=False):
+    # full_exif=True adds "exif_tags": every tag of every IFD, decoded
     # Default metadata dict
     metadata = {
         "file_type": "image",
@@ -8,6 +63,7 @@ def extract_metadata(file_path):
         "datetime": "Unknown",            # EXIF DateTimeOriginal / DateTime
         "datetime_digitized": "Unknown",  # EXIF DateTimeDigitized
         "exif_version": "Unknown",
+        "body_serial": "Unknown",         # EXIF BodySerialNumber (tells bodies of one model apart)
         "width": "Unknown",
         "height": "Unknown",
         "gps_latitude": "Unknown",
@@ -16,108 +72,43 @@ def extract_metadata(file_path):
         "modified_by": "Unknown",
         "title": "Unknown",
         "author": "Unknown",
-        "description": "Unknown"
+        "description": "Unknown",
+        "frame_width": "Unknown",         # From SOF (the pixels actually encoded)
+        "frame_height": "Unknown",
+        "jpeg_process": "Unknown",        # baseline / progressive / ...
+        "chroma_subsampling": "Unknown",
+        "jpeg_quality": "Unknown",        # Estimated from the luminance DQT
+        "comment": "Unknown",             # COM segment
+        "icc_profile": "Unknown",         # ICC profile description (APP2)
+        "xmp_create": "Unknown",          # XMP packet (APP1)
+        "xmp_modify": "Unknown",
+        "xmp_creator_tool": "Unknown",
+        "xmp_history": "Unknown",         # xmpMM:History edit events
+        "mpf_images": "Unknown",          # Images listed in the APP2 MPF index
+        "trailing_bytes_after_eoi": "Unknown"  # Bytes after EOI not accounted for by MPF
     }
 
+    if data is None:
+        return metadata
+
     try:
-        with open(file_path, 'rb') as f:
-            data = f.read()  # Read whole file
+        segments = index_segments(data)  # One pass over the marker stream
+        if segments is None:
+            _fallback_created_modified_unknown(metadata)  # Not a JPEG
+            return metadata
+        _assign_segment_fields(data, segments, metadata)
 
-        tiff = _find_exif_tiff_base(data)  # Locate EXIF TIFF header
-        if tiff is None:
+        tiff = _exif_tiff_base(data, segments)  # Locate EXIF TIFF header
+        if tiff is None or not parse_tiff_exif(data, tiff, metadata):
+            _fill_frame_dimensions(metadata)
             _fallback_created_modified_unknown(metadata)  # No EXIF → fallback
             return metadata
 
-        endian = data[tiff:tiff+2]  # 'II' or 'MM'
-        if endian == b'II':
-            byte_order = 'little'
-        elif endian == b'MM':
-            byte_order = 'big'
-        else:
-            _fallback_created_modified_unknown(metadata)
-            return metadata
+        if full_exif:
+            metadata["exif_tags"] = full_exif_tags(data, tiff)
 
-        if _u16(data, tiff+2, byte_order) != 0x002A:  # TIFF magic number
-            _fallback_created_modified_unknown(metadata)
-            return metadata
-
-        ifd0_rel = _u32(data, tiff+4, byte_order)  # IFD0 offset
-        ifd0 = tiff + ifd0_rel
-        tags0 = _parse_ifd(data, tiff, ifd0, byte_order)  # Parse IFD0
-
-        if 0x010F in tags0:  # Make
-            metadata["make"] = _get_ascii(data, tiff, tags0[0x010F], byte_order)
-        if 0x0110 in tags0:  # Model
-            metadata["camera_model"] = _get_ascii(data, tiff, tags0[0x0110], byte_order)
-        if 0x0131 in tags0:  # Software
-            sw = _get_ascii(data, tiff, tags0[0x0131], byte_order)
-            metadata["software"] = sw
-            metadata["modified_by"] = _normalize_software(sw, metadata.get("make"))
-
-        if 0x0132 in tags0 and metadata["datetime"] == "Unknown":  # DateTime
-            dt0 = _get_ascii(data, tiff, tags0[0x0132], byte_order)
-            if dt0 and dt0 != "Unknown":
-                metadata["datetime"] = dt0
-
-        if 0x0100 in tags0:  # ImageWidth
-            metadata["width"]  = _get_numeric(data, tiff, tags0[0x0100], byte_order)
-        if 0x0101 in tags0:  # ImageLength
-            metadata["height"] = _get_numeric(data, tiff, tags0[0x0101], byte_order)
-
-        # Pointers to EXIF and GPS IFDs
-        exif_ifd_ptr = _get_offset_value(data, tiff, tags0.get(0x8769), byte_order) if 0x8769 in tags0 else None
-        gps_ifd_ptr  = _get_offset_value(data, tiff, tags0.get(0x8825), byte_order) if 0x8825 in tags0 else None
-
-        if exif_ifd_ptr:
-            exif_ifd = tiff + exif_ifd_ptr
-            tags_exif = _parse_ifd(data, tiff, exif_ifd, byte_order)
-
-            if 0x9003 in tags_exif:  # DateTimeOriginal
-                metadata["datetime"] = _get_ascii(data, tiff, tags_exif[0x9003], byte_order)
-            if 0x9004 in tags_exif:  # DateTimeDigitized
-                metadata["datetime_digitized"] = _get_ascii(data, tiff, tags_exif[0x9004], byte_order)
-            if 0x9000 in tags_exif:  # ExifVersion
-                exv = _get_bytes(data, tiff, tags_exif[0x9000], byte_order)
-                if exv:
-                    try:
-                        s = "".join(chr(b) for b in exv if 48 <= b <= 57)  # Keep digits
-                        metadata["exif_version"] = s if s else exv.hex()
-                    except:
-                        metadata["exif_version"] = exv.hex()
-
-            if 0xA002 in tags_exif:  # PixelXDimension
-                w = _get_numeric(data, tiff, tags_exif[0xA002], byte_order)
-                if w: metadata["width"] = w
-            if 0xA003 in tags_exif:  # PixelYDimension
-                h = _get_numeric(data, tiff, tags_exif[0xA003], byte_order)
-                if h: metadata["height"] = h
-
-        if gps_ifd_ptr:
-            gps_ifd = tiff + gps_ifd_ptr
-            tags_gps = _parse_ifd(data, tiff, gps_ifd, byte_order)
-
-            lat = lon = None
-            lat_ref = _get_ascii(data, tiff, tags_gps.get(0x0001), byte_order) if 0x0001 in tags_gps else None
-            lon_ref = _get_ascii(data, tiff, tags_gps.get(0x0003), byte_order) if 0x0003 in tags_gps else None
-
-            if 0x0002 in tags_gps:  # GPSLatitude
-                lat = _get_rational_array(data, tiff, tags_gps[0x0002], byte_order)
-            if 0x0004 in tags_gps:  # GPSLongitude
-                lon = _get_rational_array(data, tiff, tags_gps[0x0004], byte_order)
-
-            if lat and lon and len(lat) == 3 and len(lon) == 3 and lat_ref and lon_ref:
-                lat_dec = _dms_to_decimal(lat, lat_ref)  # Convert DMS→decimal
-                lon_dec = _dms_to_decimal(lon, lon_ref)
-                metadata["gps_latitude"]  = f"{lat_dec:.6f}"
-                metadata["gps_longitude"] = f"{lon_dec:.6f}"
-
-        # If EXIF dims missing, try SOF in JPEG stream
-        if metadata["width"] == "Unknown" or metadata["height"] == "Unknown":
-            sof_w, sof_h = _jpeg_dimensions_from_sof(data)
-            if sof_w and metadata["width"] == "Unknown":
-                metadata["width"] = sof_w
-            if sof_h and metadata["height"] == "Unknown":
-                metadata["height"] = sof_h
+        # If EXIF dims missing, use the SOF frame size
+        _fill_frame_dimensions(metadata)
 
         # Fill missing digitized time from datetime
         if metadata["datetime_digitized"] == "Unknown" and metadata["datetime"] != "Unknown":
@@ -142,33 +133,319 @@ def extract_metadata(file_path):
 
     return metadata  # Return filled dict
 
-def _find_exif_tiff_base(buf: bytes):
-    if not buf.startswith(b'\xff\xd8'):  # Ensure JPEG
+def parse_tiff_exif(data, tiff, metadata):
+    # Fill metadata from a TIFF/EXIF structure starting at offset tiff.
+    # Shared with other extractors (e.g. PNG eXIf); returns False if not TIFF.
+    endian = data[tiff:tiff+2]  # 'II' or 'MM'
+    if endian == b'II':
+        byte_order = 'little'
+    elif endian == b'MM':
+        byte_order = 'big'
+    else:
+        return False
+
+    if _u16(data, tiff+2, byte_order) != 0x002A:  # TIFF magic number
+        return False
+
+    ifd0_rel = _u32(data, tiff+4, byte_order)  # IFD0 offset
+    ifd0 = tiff + ifd0_rel
+    tags0 = _parse_ifd(data, tiff, ifd0, byte_order)  # Parse IFD0
+
+    if 0x010F in tags0:  # Make
+        metadata["make"] = _get_ascii(data, tiff, tags0[0x010F], byte_order)
+    if 0x0110 in tags0:  # Model
+        metadata["camera_model"] = _get_ascii(data, tiff, tags0[0x0110], byte_order)
+    if 0x0131 in tags0:  # Software
+        sw = _get_ascii(data, tiff, tags0[0x0131], byte_order)
+        metadata["software"] = sw
+        metadata["modified_by"] = _normalize_software(sw, metadata.get("make"))
+
+    if 0x0132 in tags0 and metadata["datetime"] == "Unknown":  # DateTime
+        dt0 = _get_ascii(data, tiff, tags0[0x0132], byte_order)
+        if dt0 and dt0 != "Unknown":
+            metadata["datetime"] = dt0
+
+    if 0x0100 in tags0:  # ImageWidth
+        metadata["width"]  = _get_numeric(data, tiff, tags0[0x0100], byte_order)
+    if 0x0101 in tags0:  # ImageLength
+        metadata["height"] = _get_numeric(data, tiff, tags0[0x0101], byte_order)
+
+    # Pointers to EXIF and GPS IFDs
+    exif_ifd_ptr = _get_offset_value(data, tiff, tags0.get(0x8769), byte_order) if 0x8769 in tags0 else None
+    gps_ifd_ptr  = _get_offset_value(data, tiff, tags0.get(0x8825), byte_order) if 0x8825 in tags0 else None
+
+    if exif_ifd_ptr:
+        exif_ifd = tiff + exif_ifd_ptr
+        tags_exif = _parse_ifd(data, tiff, exif_ifd, byte_order)
+
+        if 0x9003 in tags_exif:  # DateTimeOriginal
+            metadata["datetime"] = _get_ascii(data, tiff, tags_exif[0x9003], byte_order)
+        if 0x9004 in tags_exif:  # DateTimeDigitized
+            metadata["datetime_digitized"] = _get_ascii(data, tiff, tags_exif[0x9004], byte_order)
+        if 0xA431 in tags_exif:  # BodySerialNumber
+            metadata["body_serial"] = _get_ascii(data, tiff, tags_exif[0xA431], byte_order)
+        if 0x9000 in tags_exif:  # ExifVersion
+            exv = _get_bytes(data, tiff, tags_exif[0x9000], byte_order)
+            if exv:
+                try:
+                    s = "".join(chr(b) for b in exv if 48 <= b <= 57)  # Keep digits
+                    metadata["exif_version"] = s if s else exv.hex()
+                except:
+                    metadata["exif_version"] = exv.hex()
+
+        if 0xA002 in tags_exif:  # PixelXDimension
+            w = _get_numeric(data, tiff, tags_exif[0xA002], byte_order)
+            if w: metadata["width"] = w
+        if 0xA003 in tags_exif:  # PixelYDimension
+            h = _get_numeric(data, tiff, tags_exif[0xA003], byte_order)
+            if h: metadata["height"] = h
+
+    if gps_ifd_ptr:
+        gps_ifd = tiff + gps_ifd_ptr
+        tags_gps = _parse_ifd(data, tiff, gps_ifd, byte_order)
+
+        lat = lon = None
+        lat_ref = _get_ascii(data, tiff, tags_gps.get(0x0001), byte_order) if 0x0001 in tags_gps else None
+        lon_ref = _get_ascii(data, tiff, tags_gps.get(0x0003), byte_order) if 0x0003 in tags_gps else None
+
+        if 0x0002 in tags_gps:  # GPSLatitude
+            lat = _get_rational_array(data, tiff, tags_gps[0x0002], byte_order)
+        if 0x0004 in tags_gps:  # GPSLongitude
+            lon = _get_rational_array(data, tiff, tags_gps[0x0004], byte_order)
+
+        if lat and lon and len(lat) == 3 and len(lon) == 3 and lat_ref and lon_ref:
+            lat_dec = _dms_to_decimal(lat, lat_ref)  # Convert DMS→decimal
+            lon_dec = _dms_to_decimal(lon, lon_ref)
+            metadata["gps_latitude"]  = f"{lat_dec:.6f}"
+            metadata["gps_longitude"] = f"{lon_dec:.6f}"
+    return True
+
+def full_exif_tags(data, tiff):
+    # Complete tag dump from the lazy EXIF model; decoding happens here only
+    model = read_exif(data, tiff)
+    return model.to_dict() if model else "Unknown"
+
+def index_segments(buf):
+    """
+    Single pass over a JPEG marker stream. Returns [(marker, offset, length)]
+    where offset is the position of the 0xFF and length the segment length
+    field (0 for standalone markers), or None if buf is not a JPEG. Fill
+    bytes and entropy-coded data are skipped by a regex search, not a loop.
+    """
+    if buf[:2] != b'\xff\xd8':
         return None
-    i = 2
+    segments = [(0xD8, 0, 0)]
     n = len(buf)
-    while i + 4 <= n:
-        if buf[i] != 0xFF:  # Seek marker
-            i += 1
+    pos = 2
+    while len(segments) < MAX_SEGMENTS:
+        m = _MARKER.search(buf, pos)
+        if m is None:
+            break
+        offset = m.start()
+        marker = buf[offset + 1]
+        if marker in _STANDALONE:
+            segments.append((marker, offset, 0))
+            if marker == 0xD9:
+                break  # EOI
+            pos = offset + 2
+            continue
+        if offset + 4 > n:
+            break
+        length = int.from_bytes(buf[offset+2:offset+4], 'big')
+        if length < 2 or offset + 2 + length > n:
+            break  # Truncated segment
+        segments.append((marker, offset, length))
+        pos = offset + 2 + length
+    return segments
+
+def _segment_data(buf, segment):
+    _marker, offset, length = segment
+    return buf[offset + 4:offset + 2 + length]
+
+def _exif_tiff_base(buf, segments):
+    # First APP1 carrying "Exif\0\0"; the TIFF header follows it
+    for segment in segments:
+        if segment[0] == 0xE1 and segment[2] >= 16 and buf[segment[1]+4:segment[1]+10] == b'Exif\x00\x00':
+            return segment[1] + 10
+    return None
+
+def _assign_segment_fields(buf, segments, metadata):
+    # Everything except EXIF comes straight from the segment index
+    icc_parts = []
+    xmp_done = False  # Only the first standard XMP packet counts
+    mpf_end = None    # End of the last image the MPF index lists
+    for segment in segments:
+        marker = segment[0]
+        if marker in SOF_PROCESSES and metadata["jpeg_process"] == "Unknown":
+            _assign_sof(_segment_data(buf, segment), marker, metadata)
+        elif marker == 0xDB and metadata["jpeg_quality"] == "Unknown":  # DQT
+            metadata["jpeg_quality"] = _estimate_quality(_segment_data(buf, segment))
+        elif marker == 0xFE and metadata["comment"] == "Unknown":  # COM
+            text = bytes(_segment_data(buf, segment)).split(b'\x00', 1)[0].decode('latin-1').strip()
+            metadata["comment"] = text[:1000] or "Unknown"
+        elif marker == 0xE1 and not xmp_done:
+            data = _segment_data(buf, segment)
+            if data[:len(XMP_HEADER)] == XMP_HEADER:
+                _assign_xmp(data[len(XMP_HEADER):], metadata)
+                xmp_done = True
+        elif marker == 0xE2:
+            data = _segment_data(buf, segment)
+            if data[:len(ICC_HEADER)] == ICC_HEADER and len(data) > 14:
+                icc_parts.append((data[12], bytes(data[14:])))  # (sequence number, chunk)
+            elif data[:len(MPF_HEADER)] == MPF_HEADER and mpf_end is None:
+                mpf_end = _assign_mpf(buf, segment[1] + 8, metadata)
+    if icc_parts:
+        icc_parts.sort(key=lambda part: part[0])
+        metadata["icc_profile"] = _icc_description(b''.join(part[1] for part in icc_parts))
+
+    last = segments[-1]
+    if last[0] == 0xD9:  # Bytes after EOI: appended archives, hidden payloads
+        # Multi-picture files (MPF) store further JPEGs after the first EOI,
+        # and motion photos an MP4; neither is hidden data
+        tail = buf[max(last[1] + 2, mpf_end or 0):]
+        if mpf_end is not None and (tail[:2] == b'\xff\xd8' or tail[4:8] == b'ftyp'):
+            tail = b''
+        # Zero/0xFF padding some encoders add is not data
+        metadata["trailing_bytes_after_eoi"] = len(tail) if bytes(tail).strip(b'\x00\xff') else 0
+
+def _assign_mpf(buf, base, metadata):
+    # MP Index IFD (CIPA DC-007): MPEntry (0xB002) holds 16 bytes per image,
+    # with size and offset relative to the MPF TIFF header at base.
+    # Returns the end of the furthest image listed, or 0.
+    order = {b'II': 'little', b'MM': 'big'}.get(bytes(buf[base:base+2]))
+    if order is None or _u16(buf, base+2, order) != 0x002A:
+        return 0
+    tags = _parse_ifd(buf, base, base + _u32(buf, base+4, order), order)
+    entries = _get_bytes(buf, base, tags.get(0xB002), order) or b''
+    end = 0
+    count = 0
+    for pos in range(0, len(entries) - 15, 16):
+        count += 1
+        size = int.from_bytes(entries[pos+4:pos+8], order)
+        offset = int.from_bytes(entries[pos+8:pos+12], order)
+        if offset:  # The first image (offset 0) is this file itself
+            end = max(end, min(len(buf), base + offset + size))
+    metadata["mpf_images"] = count
+    return end
+
+def _assign_sof(seg, marker, metadata):
+    if len(seg) < 6:
+        return
+    metadata["frame_height"] = int.from_bytes(seg[1:3], 'big')
+    metadata["frame_width"] = int.from_bytes(seg[3:5], 'big')
+    metadata["jpeg_process"] = SOF_PROCESSES[marker]
+    components = seg[5]
+    if components == 1:
+        metadata["chroma_subsampling"] = "grayscale"
+    elif components >= 3 and len(seg) >= 6 + 3 * 3:
+        # Sampling factors of Y relative to Cb (4:4:4, 4:2:2, 4:2:0, ...)
+        y, cb = seg[7], seg[10]
+        h = (y >> 4) // max(1, cb >> 4)
+        v = (y & 0x0F) // max(1, cb & 0x0F)
+        metadata["chroma_subsampling"] = {(1, 1): "4:4:4", (2, 1): "4:2:2", (2, 2): "4:2:0",
+                                          (1, 2): "4:4:0", (4, 1): "4:1:1"}.get((h, v), f"{h}x{v}")
+
+def _estimate_quality(dqt):
+    # Match the luminance table (id 0) against IJG tables scaled for Q=1..100
+    pos = 0
+    while pos < len(dqt):
+        precision, table_id = dqt[pos] >> 4, dqt[pos] & 0x0F
+        size = 128 if precision else 64
+        values = dqt[pos + 1:pos + 1 + size]
+        if len(values) < size:
+            return "Unknown"
+        if table_id == 0:
+            if precision:
+                values = [int.from_bytes(values[i:i+2], 'big') for i in range(0, 128, 2)]
+            best, best_error = "Unknown", None
+            for quality in range(1, 101):
+                scale = 5000 // quality if quality < 50 else 200 - 2 * quality
+                error = 0
+                for std, actual in zip(STD_LUMINANCE_ZIGZAG, values):
+                    error += abs(min(255, max(1, (std * scale + 50) // 100)) - actual)
+                if best_error is None or error < best_error:
+                    best, best_error = quality, error
+            return best
+        pos += 1 + size
+    return "Unknown"
+
+def _assign_xmp(packet, metadata):
+    fields = xmp.summary(xmp.parse(packet))
+    for key in ("xmp_create", "xmp_modify", "xmp_creator_tool", "xmp_history"):
+        metadata[key] = fields[key]
+
+def _icc_description(profile):
+    # 'desc' tag: v2 textDescriptionType (ASCII) or v4 multiLocalizedUnicode
+    if len(profile) < 132:
+        return "Unknown"
+    count = int.from_bytes(profile[128:132], 'big')
+    for i in range(min(count, (len(profile) - 132) // 12)):
+        entry = 132 + 12 * i
+        if profile[entry:entry+4] != b'desc':
+            continue
+        offset = int.from_bytes(profile[entry+4:entry+8], 'big')
+        size = int.from_bytes(profile[entry+8:entry+12], 'big')
+        tag = profile[offset:offset + size]
+        if tag[:4] == b'desc' and len(tag) >= 12:
+            length = int.from_bytes(tag[8:12], 'big')
+            text = tag[12:12 + length].split(b'\x00', 1)[0].decode('latin-1')
+        elif tag[:4] == b'mluc' and len(tag) >= 28:
+            length = int.from_bytes(tag[20:24], 'big')
+            start = int.from_bytes(tag[24:28], 'big')
+            text = tag[start:start + length].decode('utf-16-be', errors='ignore')
+        else:
+            break
+        return text.strip() or "Unknown"
+    return "Unknown"
+
+def _fill_frame_dimensions(metadata):
+    if metadata["width"] == "Unknown" and metadata["frame_width"] != "Unknown":
+        metadata["width"] = metadata["frame_width"]
+    if metadata["height"] == "Unknown" and metadata["frame_height"] != "Unknown":
+        metadata["height"] = metadata["frame_height"]
+
+def _read_header_segments(f):
+    # Bytes before the scan data (SOS) or EOI, read in blocks. Markers are
+    # found with index_segments' regex, so fill bytes and garbage between
+    # segments are skipped in C rather than one read(1) at a time.
+    head = bytearray(f.read(2))
+    if head != b'\xff\xd8':
+        return bytes(head)  # Not a JPEG; the parser will say so
+
+    def more():
+        if len(head) >= MAX_HEADER_BYTES:
+            return False
+        block = f.read(STREAM_BLOCK)
+        head.extend(block)
+        return bool(block)
+
+    pos = 2
+    while True:
+        m = _MARKER.search(head, pos)
+        if m is None:
+            pos = max(pos, len(head) - 1)  # A final 0xFF may start a marker
+            if not more():
+                break
             continue
-        marker = buf[i+1]
-        i += 2
-        if marker in (0xD8, 0xD9):  # SOI/EOI skip
+        offset = m.start()
+        marker = head[offset + 1]
+        if marker in (0xD9, 0xDA):  # EOI / SOS: image data follows
+            del head[offset:]
+            break
+        if marker in _STANDALONE:
+            pos = offset + 2
             continue
-        if i + 2 > n:
-            return None
-        seg_len = int.from_bytes(buf[i:i+2], 'big')  # Segment length
-        if seg_len < 2 or i + seg_len > n:
-            return None
-        seg_data_start = i + 2
-        seg_data_end   = i + seg_len
-        if marker == 0xE1:  # APP1 (EXIF)
-            if seg_data_end - seg_data_start >= 6 and buf[seg_data_start:seg_data_start+6] == b'Exif\x00\x00':
-                tiff_base = seg_data_start + 6
-                if tiff_base + 8 <= n:
-                    return tiff_base  # TIFF start
-        i += seg_len
-    return None  # No EXIF
+        while len(head) < offset + 4 and more():
+            pass
+        if len(head) < offset + 4:
+            break
+        end = offset + 2 + int.from_bytes(head[offset+2:offset+4], 'big')
+        while len(head) < end and more():
+            pass
+        if len(head) < end:
+            break  # Truncated segment
+        pos = end
+    return bytes(head)
 
 def _u16(b, off, order):
     if off+2 > len(b): return 0  # Bounds check
@@ -179,7 +456,7 @@ def _u32(b, off, order):
     return int.from_bytes(b[off:off+4], order)
 
 def _type_size(t):
-    sizes = {1:1,2:1,3:2,4:4,5:8,7:1}  # TIFF type sizes
+    sizes = {1:1,2:1,3:2,4:4,5:8,7:1,9:4,10:8,13:4}  # TIFF type sizes
     return sizes.get(t, 1)
 
 def _parse_ifd(buf, tiff_base, ifd_off, order):
@@ -187,6 +464,7 @@ def _parse_ifd(buf, tiff_base, ifd_off, order):
     if ifd_off is None or ifd_off < 0 or ifd_off+2 > len(buf):
         return tags
     count = _u16(buf, ifd_off, order)  # Number of entries
+    count = min(count, (len(buf) - ifd_off - 2) // 12)  # Only entries that fit the buffer
     entry = ifd_off + 2
     for _ in range(count):
         if entry+12 > len(buf):  # Each entry 12 bytes
@@ -205,9 +483,9 @@ def _is_inline(typ, cnt):
 def _get_offset_value(buf, tiff_base, entry, order):
     if entry is None: return None
     typ, cnt, value4 = entry
-    if _is_inline(typ, cnt):
-        return None  # No offset if inline
-    return int.from_bytes(value4, order)
+    if typ not in (4, 13) or cnt != 1:  # Sub-IFD pointers are a single LONG/IFD
+        return None
+    return int.from_bytes(value4, order)  # Offset is stored inline
 
 def _get_bytes(buf, tiff_base, entry, order):
     if entry is None: return None
@@ -225,7 +503,7 @@ def _get_ascii(buf, tiff_base, entry, order):
     b = _get_bytes(buf, tiff_base, entry, order)
     if not b: return "Unknown"
     try:
-        s = b.split(b'\x00', 1)[0].decode(errors='ignore').strip()
+        s = bytes(b).split(b'\x00', 1)[0].decode(errors='ignore').strip()
         return s if s else "Unknown"
     except:
         return "Unknown"
@@ -276,45 +554,11 @@ def _dms_to_decimal(dms, ref):
         val = -val
     return val
 
-def _jpeg_dimensions_from_sof(buf: bytes):
-    if not buf.startswith(b'\xff\xd8'):
-        return (None, None)
-    i, n = 2, len(buf)
-    while i + 4 <= n:
-        if buf[i] != 0xFF:
-            i += 1
-            continue
-        marker = buf[i+1]
-        i += 2
-        if marker in (0xD8, 0xD9):  # Skip SOI/EOI
-            continue
-        if i + 2 > n:
-            break
-        seg_len = int.from_bytes(buf[i:i+2], 'big')
-        if seg_len < 2 or i + seg_len > n:
-            break
-        seg_data_start = i + 2
-        seg_data_end   = i + seg_len
-        # SOF markers (baseline/progressive)
-        if (0xC0 <= marker <= 0xC3) or (0xC5 <= marker <= 0xC7) or (0xC9 <= marker <= 0xCB) or (0xCD <= marker <= 0xCF):
-            seg = buf[seg_data_start:seg_data_end]
-            if len(seg) >= 7:
-                height = int.from_bytes(seg[1:3], 'big')
-                width  = int.from_bytes(seg[3:5], 'big')
-                return (width, height)
-        i += seg_len
-    return (None, None)
-
 def _normalize_software(sw, make=None):
     s = (sw or "").strip()
-    sl = s.lower()
-    if "snapseed" in sl:   return "Google Snapseed"
-    if "photoshop" in sl:  return "Adobe Photoshop"
-    if "lightroom" in sl:  return "Adobe Lightroom"
-    if "instagram" in sl:  return "Instagram"
-    if "whatsapp" in sl:   return "WhatsApp (metadata stripped)"
-    if "gimp" in sl:       return "GIMP"
-    if "apple" in sl and "photos" in sl: return "Apple Photos"
+    label = identify_software(s, "image")
+    if label:
+        return label
     if make and isinstance(make, str):
         mk = make.lower()
         if mk == "apple" and all(ch.isdigit() or ch == '.' for ch in s) and any(ch == '.' for ch in s):
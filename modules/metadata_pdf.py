@@ -1,6 +1,27 @@
 import re
+import hashlib
 
-def extract_metadata(file_path):
+from modules import metadata_jpg, xmp
+from modules.software_fingerprint import identify as identify_software
+
+# Embedded JPEG (DCTDecode) image streams examined per PDF
+MAX_EMBEDDED_IMAGES = 32
+# How far around a /DCTDecode name the object header and stream keyword may be
+DICT_WINDOW = 4096
+# Longest literal string read for an Info field
+MAX_STRING_CHARS = 4096
+
+def extract_metadata(file_path, max_images=MAX_EMBEDDED_IMAGES):
+    try:
+        with open(file_path, 'rb') as f:
+            raw = f.read()  # Read full file
+    except Exception as e:
+        print(f"[Error] Could not extract PDF metadata: {e}")  # Log error
+        raw = None
+    return extract_metadata_from_bytes(raw, max_images)
+
+def extract_metadata_from_bytes(raw, max_images=MAX_EMBEDDED_IMAGES):
+    # max_images=0 skips embedded image extraction
     # Default PDF metadata container
     metadata = {
         "file_type": "pdf",
@@ -17,6 +38,7 @@ def extract_metadata(file_path):
         "xmp_creator_tool": "Unknown",
         "xmp_document_id": "Unknown",
         "xmp_instance_id": "Unknown",
+        "xmp_history": "Unknown",  # xmpMM:History edit events
         "created_by": "Unknown",   # Normalised creator name
         "modified_by": "Unknown",  # Normalised producer name
         "pdf_version": "Unknown",
@@ -28,13 +50,17 @@ def extract_metadata(file_path):
         "has_acroform": False,
         "has_annotations": False,
         "has_javascript": False,
-        "trailer_id": "Unknown"    # /ID [ <hex1> <hex2> ]
+        "trailer_id": "Unknown",   # /ID [ <hex1> <hex2> ]
+        "embedded_jpegs": 0,             # DCTDecode image XObjects found
+        "embedded_jpegs_examined": 0,    # Unique ones passed to the JPEG extractor
+        "embedded_jpegs_duplicate": 0,   # Byte-identical repeats skipped
+        "embedded_images": []            # Child entries; the pipeline turns them into records
     }
 
-    try:
-        with open(file_path, 'rb') as f:
-            raw = f.read()  # Read full file
+    if raw is None:
+        return metadata
 
+    try:
         text = raw.decode('latin-1', errors='ignore')  # Lenient decode
 
         # Extract %PDF-x.y version
@@ -49,9 +75,7 @@ def extract_metadata(file_path):
 
         # Helper: grab simple (/Key (Value)) pairs
         def _grab(name):
-            pat = rf'/{name}\s*\((.*?)\)'
-            m = re.search(pat, text, flags=re.DOTALL)
-            return _clean_pdf_string(m.group(1)) if m else "Unknown"
+            return _clean_pdf_string(_literal_string(text, name))
 
         # Basic Info dictionary fields
         metadata["title"]    = _grab("Title")
@@ -63,14 +87,13 @@ def extract_metadata(file_path):
         metadata["created"]  = _grab("CreationDate")
         metadata["modified"] = _grab("ModDate")
 
-        # XMP packet (if present)
-        xmp = _extract_xmp(text)
-        if xmp:
-            metadata["xmp_create"]       = _xml_tag(xmp, r'(?:(?:xmp|xmpMM|pdfx):)?CreateDate')
-            metadata["xmp_modify"]       = _xml_tag(xmp, r'(?:(?:xmp|xmpMM|pdfx):)?ModifyDate')
-            metadata["xmp_creator_tool"] = _xml_tag(xmp, r'(?:(?:xmp|xmpMM|pdfx):)?CreatorTool')
-            metadata["xmp_document_id"]  = _xml_tag(xmp, r'(?:xmpMM:DocumentID)')
-            metadata["xmp_instance_id"]  = _xml_tag(xmp, r'(?:xmpMM:InstanceID)')
+        # XMP packet (if present), parsed once for every xmp_* field
+        packet = xmp.find_packet(raw)
+        if packet:
+            fields = xmp.summary(xmp.parse(packet))
+            for key in ("xmp_create", "xmp_modify", "xmp_creator_tool",
+                        "xmp_document_id", "xmp_instance_id", "xmp_history"):
+                metadata[key] = fields[key]
 
             # Prefer XMP dates/tools if Info fields missing
             if metadata["created"] == "Unknown" and metadata["xmp_create"] != "Unknown":
@@ -100,11 +123,42 @@ def extract_metadata(file_path):
         metadata["created_by"]  = _normalize_app(created_by)
         metadata["modified_by"] = _normalize_app(modified_by)
 
+        # EXIF of embedded JPEGs often names the real camera/scanner
+        if max_images:
+            _extract_embedded_jpegs(raw, text, metadata, max_images)
+
     except Exception as e:
         print(f"[Error] Could not extract PDF metadata: {e}")  # Log error
 
     return metadata  # Return filled dict
 
+def _literal_string(text: str, name: str):
+    """
+    Value of the first /Name (literal string) pair, honouring nested parens
+    and backslash escapes. Each string is read at most MAX_STRING_CHARS far
+    and skipped regions are never rescanned, so the search stays linear.
+    """
+    scanned = 0
+    for m in re.finditer(rf'/{name}\s*\(', text):
+        if m.start() < scanned:
+            continue  # Inside a string we already gave up on
+        depth, i = 1, m.end()
+        limit = min(len(text), i + MAX_STRING_CHARS)
+        while i < limit:
+            ch = text[i]
+            if ch == '\\':
+                i += 2
+                continue
+            if ch == '(':
+                depth += 1
+            elif ch == ')':
+                depth -= 1
+                if depth == 0:
+                    return text[m.end():i]
+            i += 1
+        scanned = i
+    return None
+
 def _clean_pdf_string(s: str) -> str:
     """Unescape PDF string escapes; trim."""
     if s is None:
@@ -113,17 +167,88 @@ def _clean_pdf_string(s: str) -> str:
     s = s.replace(r'\n', '\n').replace(r'\r', '\r').replace(r'\t', '\t')
     return s.strip() if s.strip() else "Unknown"
 
-def _extract_xmp(text: str) -> str | None:
-    # Grab full XMP packet if embedded
-    m = re.search(r'(<x:xmpmeta[\s\S]+?</x:xmpmeta>)', text)
-    return m.group(1) if m else None
+def _extract_embedded_jpegs(raw, text, metadata, max_images):
+    # DCT streams go to the JPEG extractor as memoryview slices, no copies
+    view = memoryview(raw)
+    seen = set()
+    for start, end, obj in _dct_image_streams(text):
+        if view[start:start+2] != b'\xff\xd8':
+            continue  # Not a JPEG after all
+        metadata["embedded_jpegs"] += 1
+        stream = view[start:end]
+        digest = hashlib.sha1(stream).hexdigest()
+        if digest in seen:
+            metadata["embedded_jpegs_duplicate"] += 1
+            continue
+        seen.add(digest)
+        if metadata["embedded_jpegs_examined"] >= max_images:
+            continue  # Keep counting, stop extracting
+        metadata["embedded_jpegs_examined"] += 1
+        metadata["embedded_images"].append({
+            "name": f"obj{obj}",
+            "file_type": "jpg",
+            "offset": start,
+            "length": end - start,
+            "sha1": digest,
+            "metadata": metadata_jpg.extract_metadata_from_bytes(stream),
+        })
+
+def _dct_image_streams(text: str):
+    """
+    Yield (data_start, data_end, object_number) for image XObjects whose only
+    filter is DCTDecode. The object dictionary is found around each
+    /DCTDecode name; /Length is used when direct, else endstream.
+    Look-behind windows never overlap and keyword searches only move
+    forward, so a file full of /DCTDecode names is still scanned once.
+    """
+    consumed = 0       # Everything before this is already examined
+    next_stream = -1   # Cached positions of the next keywords
+    next_end = -1
+    for m in re.finditer(r'/DCTDecode\b', text):
+        if m.start() < consumed:
+            continue  # Inside the previous image's data
+        window_start = max(consumed, m.start() - DICT_WINDOW)
+        headers = list(re.finditer(r'(\d+)\s+\d+\s+obj\b', text[window_start:m.start()]))
+        consumed = m.end()
+        if not headers:
+            continue
+        dict_start = window_start + headers[-1].start()
+        if next_stream < m.end():
+            next_stream = text.find("stream", m.end())
+        if next_stream == -1:
+            return  # No stream keyword anywhere after this point
+        stream = next_stream
+        if stream - m.end() > DICT_WINDOW:
+            continue
+        dictionary = text[dict_start:stream]
+        if "endobj" in dictionary or not re.search(r'/Subtype\s*/Image\b', dictionary):
+            continue
+        filters = re.search(r'/Filter\s*(\[[^\]]*\]|/\w+)', dictionary)
+        if not filters or re.findall(r'/(\w+)', filters.group(1)) != ["DCTDecode"]:
+            continue  # Chained filters would need decoding first
 
-def _xml_tag(xmp: str, qname_regex: str) -> str:
-    # Extract value for a namespaced XMP tag
-    m = re.search(rf'<{qname_regex}[^>]*>(.*?)</{qname_regex}>', xmp, flags=re.DOTALL)
-    if m:
-        return m.group(1).strip() or "Unknown"
-    return "Unknown"
+        data_start = stream + len("stream")
+        if text.startswith("\r\n", data_start):
+            data_start += 2
+        elif text.startswith("\n", data_start):
+            data_start += 1
+        data_end = None
+        length = re.search(r'/Length\s+(\d+)(?!\s+\d+\s+R)', dictionary)
+        if length:
+            end = data_start + int(length.group(1))
+            if text[end:end + 32].lstrip().startswith("endstream"):
+                data_end = end
+        if data_end is None:  # Indirect or wrong /Length
+            if next_end < data_start:
+                next_end = text.find("endstream", data_start)
+            if next_end == -1:
+                return  # Unterminated stream; nothing after it can be complete
+            end = next_end
+            while end > data_start and text[end - 1] in "\r\n":
+                end -= 1  # EOL before endstream is not data
+            data_end = end
+        consumed = data_end
+        yield data_start, data_end, headers[-1].group(1)
 
 def _first_page_mediabox(text: str):
     """
@@ -152,17 +277,4 @@ def _normalize_app(s: str) -> str:
     #Map nisy creator/producer strings to friendly names.
     if not s or s == "Unknown":
         return "Unknown"
-    sl = s.lower()
-    if "microsoft word" in sl: return "Microsoft Word"
-    if "word" in sl and "microsoft" in sl: return "Microsoft Word"
-    if "adobe acrobat" in sl: return "Adobe Acrobat"
-    if "acrobat" in sl:       return "Adobe Acrobat"
-    if "distiller" in sl:     return "Adobe Distiller"
-    if "libreoffice" in sl:   return "LibreOffice"
-    if "google docs" in sl:   return "Google Docs"
-    if "mac os x" in sl or "quartz" in sl: return "Apple Quartz PDFContext"
-    if "itext" in sl:         return "iText"
-    if "wkhtmltopdf" in sl:   return "wkhtmltopdf"
-    if "prince" in sl:        return "Prince"
-    if "ghostscript" in sl:   return "Ghostscript"
-    return s
\ No newline at end of file
+    return identify_software(s, "pdf") or s
\ No newline at end of file
@@ -1,7 +1,46 @@
+import io
 import struct  
 import zlib    
 
-def extract_metadata(file_path):
+from modules import metadata_jpg, xmp
+from modules.software_fingerprint import identify as identify_software
+
+# Cap on decompressed text chunk size (guards against zlib bombs)
+MAX_TEXT_BYTES = 4 * 1024 * 1024
+# Ancillary chunks bigger than this are CRC-checked while streaming but not parsed
+MAX_CHUNK_BYTES = 64 * 1024 * 1024
+# Block size for streaming IDAT and trailing data
+STREAM_BLOCK = 64 * 1024
+# Chunk types remembered for the report when their CRC fails
+MAX_CRC_ERRORS_LISTED = 10
+# Largest chunk length the PNG spec allows (2^31 - 1)
+MAX_CHUNK_LENGTH = 0x7FFFFFFF
+# zTXt/iTXt chunks decoded per file (each may inflate to MAX_TEXT_BYTES)
+MAX_COMPRESSIBLE_TEXT_CHUNKS = 64
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+# iTXt keyword of an embedded XMP packet
+XMP_KEYWORD = "XML:com.adobe.xmp"
+
+def extract_metadata(file_path, verify_idat_crc=True, full_exif=False):
+    try:
+        f = open(file_path, 'rb')
+    except Exception as e:
+        print(f"[Error] Could not extract PNG metadata: {e}")  # Log failure
+        return extract_metadata_from_stream(None)
+    with f:
+        return extract_metadata_from_stream(f, verify_idat_crc, full_exif)
+
+def extract_metadata_from_bytes(data, verify_idat_crc=True, full_exif=False):
+    if data is None:
+        return extract_metadata_from_stream(None)
+    return extract_metadata_from_stream(io.BytesIO(data), verify_idat_crc, full_exif)
+
+def extract_metadata_from_stream(f, verify_idat_crc=True, full_exif=False, header_only=False):
+    # Chunks are read one at a time; IDAT is CRC-checked in blocks and never
+    # buffered. verify_idat_crc=False is the fast mode that skips IDAT data.
+    # header_only=True stops at the first IDAT (embedded images): IEND and
+    # trailing data are then left "Unknown".
     # Default PNG metadata
     metadata = {
         "file_type": "image",
@@ -9,35 +48,80 @@ def extract_metadata(file_path):
         "camera_model": "Unknown",
         "software": "Unknown",
         "datetime": "Unknown",            # Creation time (if present)
-        "datetime_digitized": "Unknown",  # Not typical for PNG
-        "exif_version": "Unknown",        # PNG usually lacks EXIF
+        "datetime_digitized": "Unknown",  # eXIf DateTimeDigitized
+        "exif_version": "Unknown",        # From eXIf chunk if present
+        "body_serial": "Unknown",
         "width": "Unknown",
         "height": "Unknown",
-        "gps_latitude": "Unknown",        # Rare in PNG
+        "gps_latitude": "Unknown",        # From eXIf chunk if present
         "gps_longitude": "Unknown",
         "created_by": "Unknown",
         "modified_by": "Unknown",
         "title": "Unknown",
         "author": "Unknown",
-        "description": "Unknown"
+        "description": "Unknown",
+        "xmp_create": "Unknown",          # XMP packet (iTXt XML:com.adobe.xmp)
+        "xmp_modify": "Unknown",
+        "xmp_creator_tool": "Unknown",
+        "xmp_history": "Unknown",
+        "crc_checked": 0,                 # Chunks whose CRC was verified
+        "crc_errors": 0,
+        "crc_error_chunks": [],
+        "idat_crc_verified": verify_idat_crc,
+        "iend_found": False,
+        "trailing_bytes_after_iend": 0,
+        "chunks_after_iend": 0,
+        "chunk_error": "Unknown"          # First structural error (bad length/type)
     }
 
-    try:
-        with open(file_path, 'rb') as f:
-            data = f.read()  # Read entire file
+    if f is None:
+        return metadata
 
-        png_sig = b'\x89PNG\r\n\x1a\n'  # PNG signature
-        if not data.startswith(png_sig):
+    try:
+        if f.read(8) != PNG_SIGNATURE:
             return metadata  # Not PNG
 
-        pos = 8  # Skip signature
-        while pos + 8 <= len(data):
-            length = struct.unpack(">I", data[pos:pos+4])[0]  # Chunk length
-            ctype  = data[pos+4:pos+8]                        # Chunk type
-            cdata  = data[pos+8:pos+8+length]                 # Chunk data
-            pos += 12 + length                                 # Move to next chunk
+        text_chunks = 0  # zTXt/iTXt chunks decoded so far
+
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                break  # Truncated: no IEND
+            length, ctype = struct.unpack(">I4s", header)  # Chunk length and type
+            if length > MAX_CHUNK_LENGTH or not ctype.isalpha():
+                # Lengths/types from here on cannot be trusted; stop parsing
+                metadata["chunk_error"] = f"invalid chunk header {header.hex()} at offset {f.tell() - 8}"
+                break
+
+            if ctype == b'IDAT' and header_only:
+                metadata["iend_found"] = "Unknown"
+                metadata["trailing_bytes_after_iend"] = "Unknown"
+                metadata["chunks_after_iend"] = "Unknown"
+                break
+
+            if ctype == b'IDAT' or length > MAX_CHUNK_BYTES:
+                check = verify_idat_crc or ctype != b'IDAT'
+                crc, complete = _stream_chunk_data(f, ctype, length, check)
+                cdata = None
+            else:
+                cdata = f.read(length)  # Chunk data
+                complete = len(cdata) == length
+                crc = zlib.crc32(cdata, zlib.crc32(ctype))
+            stored = f.read(4)
+            if not complete or len(stored) < 4:
+                break  # Truncated mid-chunk
+
+            if crc is not None:
+                metadata["crc_checked"] += 1
+                if crc != struct.unpack(">I", stored)[0]:
+                    metadata["crc_errors"] += 1
+                    if len(metadata["crc_error_chunks"]) < MAX_CRC_ERRORS_LISTED:
+                        metadata["crc_error_chunks"].append(ctype.decode('latin-1'))
+
+            if cdata is None:
+                pass  # IDAT or oversized chunk: CRC only
 
-            if ctype == b'IHDR' and length >= 8:
+            elif ctype == b'IHDR' and length >= 8:
                 metadata["width"]  = struct.unpack(">I", cdata[0:4])[0]
                 metadata["height"] = struct.unpack(">I", cdata[4:8])[0]
 
@@ -46,14 +130,28 @@ def extract_metadata(file_path):
                 _assign_text_field(metadata, kw, text)
 
             elif ctype == b'iTXt':  # UTF-8, optional compression
-                kw, text = _parse_iTXt(cdata)
-                _assign_text_field(metadata, kw, text)
+                text_chunks += 1
+                if text_chunks <= MAX_COMPRESSIBLE_TEXT_CHUNKS:
+                    kw, text = _parse_iTXt(cdata)
+                    if kw == XMP_KEYWORD:
+                        _assign_xmp(metadata, text)
+                    else:
+                        _assign_text_field(metadata, kw, text)
 
             elif ctype == b'zTXt':  # Compressed Latin-1
-                kw, text = _parse_zTXt(cdata)
-                _assign_text_field(metadata, kw, text)
+                text_chunks += 1
+                if text_chunks <= MAX_COMPRESSIBLE_TEXT_CHUNKS:
+                    kw, text = _parse_zTXt(cdata)
+                    _assign_text_field(metadata, kw, text)
+
+            elif ctype == b'eXIf':  # EXIF as a bare TIFF structure
+                _assign_exif_fields(metadata, cdata, full_exif)
 
             if ctype == b'IEND':  # End of PNG
+                metadata["iend_found"] = True
+                chunks, extra = _scan_after_iend(f)
+                metadata["chunks_after_iend"] = chunks
+                metadata["trailing_bytes_after_iend"] = extra
                 break
 
         # Derive created/modified by from Software if present
@@ -61,9 +159,12 @@ def extract_metadata(file_path):
             metadata["modified_by"] = _normalize_software(metadata["software"])
             if metadata["created_by"] == "Unknown":
                 metadata["created_by"] = metadata["modified_by"]
+        # eXIf camera wins for created_by, as in JPEG
+        if metadata["camera_model"] != "Unknown" and metadata["make"] != "Unknown":
+            metadata["created_by"] = metadata["camera_model"]
 
         # If no useful textual fields → likely stripped
-        if all(metadata[k] == "Unknown" for k in ["software", "title", "author", "description", "datetime"]):
+        if all(metadata[k] == "Unknown" for k in ["software", "title", "author", "description", "datetime", "camera_model"]):
             metadata["created_by"]  = "Unknown (Possibly Metadata-Stripped Image)"
             metadata["modified_by"] = "Unknown (Possibly Metadata-Stripped Image)"
 
@@ -72,6 +173,84 @@ def extract_metadata(file_path):
 
     return metadata  # Return results
 
+def _stream_chunk_data(f, ctype, length, check_crc):
+    # Consume chunk data in blocks; returns (crc or None, complete).
+    # Skipping only ever moves forward: a zip member can seek forward by
+    # inflating on, but any backward seek makes it inflate again from the start.
+    if not check_crc and f.seekable():
+        if length == 0:
+            return None, True
+        f.seek(length - 1, io.SEEK_CUR)
+        if f.read(1):
+            return None, True
+        f.seek(0, io.SEEK_END)  # Truncated: leave the position at the real end
+        return None, False
+    crc = zlib.crc32(ctype)
+    remaining = length
+    while remaining:
+        block = f.read(min(STREAM_BLOCK, remaining))
+        if not block:
+            return None, False
+        if check_crc:
+            crc = zlib.crc32(block, crc)
+        remaining -= len(block)
+    return (crc if check_crc else None), True
+
+def _scan_after_iend(f):
+    # Count chunk-shaped records and total bytes following IEND
+    start = f.tell() if f.seekable() else None
+    chunks = 0
+    consumed = 0
+    while True:
+        header = f.read(8)
+        consumed += len(header)
+        if len(header) < 8 or not header[4:8].isalpha():
+            break
+        length = struct.unpack(">I", header[:4])[0]
+        _crc, complete = _stream_chunk_data(f, header[4:8], length + 4, False)
+        if not complete:
+            break
+        consumed += length + 4
+        chunks += 1
+    # Whatever is left (a partial chunk, an appended archive, ...)
+    while True:
+        block = f.read(STREAM_BLOCK)
+        if not block:
+            break
+        consumed += len(block)
+    if start is not None:
+        consumed = f.tell() - start  # Exact even if a trailing chunk was cut short
+    return chunks, consumed
+
+def _assign_exif_fields(meta: dict, chunk_data: bytes, full_exif=False):
+    # Reuse the JPEG TIFF/IFD parser; PNG keeps its own IHDR dimensions
+    if chunk_data.startswith(b'Exif\x00\x00'):
+        chunk_data = chunk_data[6:]  # Some writers keep the JPEG APP1 prefix
+    exif = {"datetime": "Unknown"}
+    if not metadata_jpg.parse_tiff_exif(chunk_data, 0, exif):
+        return
+    for key in ("make", "camera_model", "software", "datetime", "datetime_digitized",
+                "exif_version", "body_serial", "gps_latitude", "gps_longitude"):
+        value = exif.get(key, "Unknown")
+        if value != "Unknown" and meta[key] == "Unknown":
+            meta[key] = value
+    if full_exif:
+        meta["exif_tags"] = metadata_jpg.full_exif_tags(chunk_data, 0)
+
+def _assign_xmp(meta: dict, packet: str):
+    # XMP fields, plus text fields that no tEXt/zTXt/iTXt chunk has filled
+    properties = xmp.parse(packet)
+    fields = xmp.summary(properties)
+    for key in ("xmp_create", "xmp_modify", "xmp_creator_tool", "xmp_history"):
+        meta[key] = fields[key]
+    for key, value in (("title", xmp.text_value(properties, "dc:title")),
+                       ("author", xmp.text_value(properties, "dc:creator")),
+                       ("description", xmp.text_value(properties, "dc:description")),
+                       ("software", fields["xmp_creator_tool"]),
+                       ("datetime", fields["xmp_create"])):
+        if meta[key] == "Unknown":
+            meta[key] = value
+
 def _parse_tEXt(chunk_data: bytes):
     # tEXt: keyword\0text (Latin-1)
     if b'\x00' not in chunk_data:
@@ -103,10 +282,7 @@ def _parse_iTXt(chunk_data: bytes):
     try:
         kw_str = keyword.decode('latin-1', errors='ignore').strip()
         if comp_flag == 1:
-            try:
-                text = zlib.decompress(text_bytes).decode('utf-8', errors='ignore').strip()
-            except:
-                text = zlib.decompress(text_bytes).decode('latin-1', errors='ignore').strip()
+            text = _inflate(text_bytes).decode('utf-8', errors='ignore').strip()
         else:
             text = text_bytes.decode('utf-8', errors='ignore').strip()
         return (kw_str, text)
@@ -122,18 +298,20 @@ def _parse_zTXt(chunk_data: bytes):
         return ("", "")
     comp_bytes = rest[1:]  # Skip comp method byte
     try:
-        text = zlib.decompress(comp_bytes).decode('utf-8', errors='ignore').strip()
+        text = _inflate(comp_bytes).decode('utf-8', errors='ignore').strip()
     except:
-        try:
-            text = zlib.decompress(comp_bytes).decode('latin-1', errors='ignore').strip()
-        except:
-            text = ""
+        text = ""
     try:
         kw_str = kw.decode('latin-1', errors='ignore').strip()
     except:
         kw_str = ""
     return (kw_str, text)
 
+def _inflate(comp_bytes: bytes) -> bytes:
+    # Decompress at most MAX_TEXT_BYTES; anything beyond is dropped
+    d = zlib.decompressobj()
+    return d.decompress(comp_bytes, MAX_TEXT_BYTES)
+
 def _split_nulls(buf: bytes, count: int):
     # Split buffer by N nulls; return parts
     out = []
@@ -169,12 +347,4 @@ def _assign_text_field(meta: dict, keyword: str, text: str):
 
 def _normalize_software(sw: str):
     # Normalise common software strings
-    s = sw.lower()
-    if "snapseed" in s:   return "Google Snapseed"
-    if "photoshop" in s:  return "Adobe Photoshop"
-    if "lightroom" in s:  return "Adobe Lightroom"
-    if "instagram" in s:  return "Instagram"
-    if "whatsapp" in s:   return "WhatsApp (metadata stripped)"
-    if "gimp" in s:       return "GIMP"
-    if "apple" in s and "photos" in s: return "Apple Photos"
-    return sw
\ No newline at end of file
+    return identify_software(sw, "image") or sw
\ No newline at end of file
@@ -0,0 +1,188 @@
+import io
+import os
+from datetime import datetime
+
+from modules.anomaly_checker import calculate_risk_score
+
+# Decoding pixels needs Pillow; without it no hashes are produced
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+HASH_SIZE = 8                  # 8x8 gradient grid -> 64-bit dHash
+DEFAULT_RADIUS = 6             # Max Hamming distance treated as "near duplicate"
+# Near-duplicate pairs listed in the report; later pairs are only counted
+MAX_FINDINGS = 10000
+# Near-duplicate anomalies attached to one file's record
+MAX_RECORD_FINDINGS = 3
+# Metadata compared between near-duplicates
+COMPARE_FIELDS = (
+    "make", "camera_model", "software", "datetime", "datetime_digitized",
+    "gps_latitude", "gps_longitude", "author", "created_by", "modified_by",
+)
+
+def is_available():
+    return Image is not None
+
+def dhash(data, size=HASH_SIZE):
+    """
+    Difference hash of an image: resize to (size+1) x size grayscale and set
+    one bit per horizontal gradient. Returns a hex string or None.
+    """
+    if Image is None:
+        return None
+    try:
+        image = Image.open(io.BytesIO(data))
+        image.draft("L", ((size + 1) * 8, size * 8))  # JPEG: decode at reduced scale
+        pixels = list(image.convert("L").resize((size + 1, size), Image.LANCZOS).getdata())
+    except Exception:
+        return None
+    bits = 0
+    for row in range(size):
+        base = row * (size + 1)
+        for col in range(size):
+            bits = (bits << 1) | (pixels[base + col] > pixels[base + col + 1])
+    return f"{bits:0{size * size // 4}x}"
+
+class BKTree:
+    """
+    Burkhard-Keller tree over integer hashes with Hamming distance.
+
+    Children are keyed by their distance to the parent, so a radius query
+    only descends into children whose key is within [d - r, d + r].
+    """
+
+    def __init__(self):
+        self.root = None  # [hash, items, {distance: child}]
+        self.size = 0
+
+    def add(self, value, item):
+        self.size += 1
+        if self.root is None:
+            self.root = [value, [item], {}]
+            return
+        node = self.root
+        while True:
+            d = (node[0] ^ value).bit_count()
+            if d == 0:
+                node[1].append(item)  # Identical hash: share the node
+                return
+            child = node[2].get(d)
+            if child is None:
+                node[2][d] = [value, [item], {}]
+                return
+            node = child
+
+    def query(self, value, radius):
+        # Returns [(distance, item)] within radius, nearest first
+        found = []
+        if self.root is None:
+            return found
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            d = (node[0] ^ value).bit_count()
+            if d <= radius:
+                found.extend((d, item) for item in node[1])
+            for key, child in node[2].items():
+                if d - radius <= key <= d + radius:
+                    stack.append(child)
+        found.sort(key=lambda pair: (pair[0], pair[1][0]))
+        return found
+
+class DuplicateIndex:
+    """
+    Collects hashed images from a scan and reports near-duplicates whose
+    metadata disagree (camera, times, GPS, software, ...).
+
+    Each new image is compared with the ones added before it, so a pair's
+    finding is attached to the later file's record as an anomaly.
+    """
+
+    def __init__(self, radius=DEFAULT_RADIUS):
+        self.radius = radius
+        self.tree = BKTree()
+        self.findings = []
+        self.pairs = 0
+
+    def add_record(self, record):
+        # Adds the record's hash; anomalies found are appended to the record
+        # and its risk_score is recomputed. Returns the new anomalies.
+        entry = duplicate_entry(record)
+        if not entry:
+            return []
+        anomalies = self.add_entry(*entry)
+        if anomalies:
+            record["anomalies"] = list(record.get("anomalies") or []) + anomalies
+            record["risk_score"] = calculate_risk_score(record["anomalies"])
+        return anomalies
+
+    def add_entry(self, value, path, summary):
+        # value is the dHash hex string, summary the COMPARE_FIELDS of the file;
+        # returns the anomalies for path
+        value = int(value, 16)
+        item = (path, summary)
+        anomalies = []
+        for distance, (other_path, other_summary) in self.tree.query(value, self.radius):
+            differences = [f for f in COMPARE_FIELDS if summary[f] != other_summary[f]]
+            self.pairs += 1
+            if len(self.findings) < MAX_FINDINGS:
+                self.findings.append({
+                    "path": item[0],
+                    "duplicate_of": other_path,
+                    "distance": distance,
+                    "differences": differences,
+                    "anomalies": [_difference_anomaly(other_path, distance, field, other_summary[field], summary[field])
+                                  for field in differences],
+                })
+            if differences and len(anomalies) < MAX_RECORD_FINDINGS:
+                anomalies.append(_record_anomaly(other_path, distance, differences))
+        self.tree.add(value, item)
+        return anomalies
+
+    def write_report(self, out_dir="reports"):
+        lines = ["=== NEAR-DUPLICATE IMAGE REPORT ==="]
+        lines.append(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        lines.append(f"Hashed images: {self.tree.size}")
+        lines.append(f"Hamming radius: {self.radius}")
+        lines.append(f"Near-duplicate pairs: {self.pairs}")
+        lines.append("")
+        if not self.findings:
+            lines.append("  - None found.")
+        for finding in self.findings:
+            lines.append(f"File: {finding['path']}")
+            lines.append(f"  Near-duplicate of: {finding['duplicate_of']} (distance {finding['distance']})")
+            if finding["anomalies"]:
+                for anomaly in finding["anomalies"]:
+                    lines.append(f"  - {anomaly}")
+            else:
+                lines.append("  - Metadata identical.")
+            lines.append("")
+        if self.pairs > len(self.findings):
+            lines.append(f"... {self.pairs - len(self.findings)} more pair(s) not listed.")
+
+        os.makedirs(out_dir, exist_ok=True)
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        report_file = os.path.join(out_dir, f"duplicates_report_{timestamp}.txt")
+        with open(report_file, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines))
+        return report_file
+
+def duplicate_entry(record):
+    # (dhash, path, compared fields) for a hashed record, else None; this is
+    # what a shard keeps so hashes from several shards can be compared later
+    metadata = record.get("metadata") or {}
+    value = metadata.get("dhash")
+    if not isinstance(value, str) or value == "Unknown":
+        return None
+    summary = {field: metadata.get(field, "Unknown") for field in COMPARE_FIELDS}
+    return value, record.get("path", ""), summary
+
+def _record_anomaly(other_path, distance, differences):
+    name = os.path.basename(other_path)
+    return f"Near-duplicate of '{name}' (distance {distance}) with different {', '.join(differences)}. Possible re-saved or altered copy."
+
+def _difference_anomaly(other_path, distance, field, before, after):
+    name = os.path.basename(other_path)
+    return f"Near-duplicate of {name} (distance {distance}) but {field} differs: '{before}' vs '{after}'."
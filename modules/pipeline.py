@@ -0,0 +1,219 @@
+import asyncio
+import os
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+
+from modules.file_loader import EXTRACTORS, detect_file_type, extract_from_bytes
+from modules.anomaly_checker import check_anomalies, check_embedded_anomalies, calculate_risk_score
+from modules import governor, ela, phash
+
+# Marks the end of work on a queue
+_DONE = None
+
+class ScanPipeline:
+    """
+    Async scan pipeline: walk -> read -> extract -> results.
+
+    Walking and reads run as asyncio tasks (blocking calls go to threads),
+    extraction and anomaly checks run in governed worker processes. Stages
+    are joined by bounded queues, so at most (readers + queue_size + workers)
+    files are held in memory at any time regardless of corpus size.
+    """
+
+    def __init__(self, read_concurrency=8, workers=None, queue_size=32,
+                 timeout=governor.DEFAULT_TIMEOUT,
+                 max_rss_mb=governor.DEFAULT_MAX_RSS_MB,
+                 max_bytes=governor.DEFAULT_MAX_BYTES,
+                 extract_options=None, pool=None):
+        # pool: a running GovernedPool to reuse (and leave open) instead of
+        # starting one per run
+        self.read_concurrency = max(1, read_concurrency)
+        self.workers = pool.size if pool else max(1, workers or os.cpu_count() or 1)
+        self.queue_size = max(1, queue_size)
+        self.timeout = timeout
+        self.max_rss_mb = max_rss_mb
+        self.max_bytes = max_bytes
+        self.extract_options = extract_options or {}
+        self.pool = pool
+        self.counters = {"found": 0, "read": 0, "skipped": 0, "extracted": 0, "aborted": 0, "errors": 0}
+        self._queues = {}
+
+    def stats(self):
+        # Current queue depth per stage plus running counters
+        depths = {name: q.qsize() for name, q in self._queues.items()}
+        return {"queue_depths": depths, "queue_size": self.queue_size, **self.counters}
+
+    async def run(self, roots, on_result):
+        # on_result(record) is called on the event loop for every scanned file
+        self._queues = {
+            "paths": asyncio.Queue(self.queue_size),
+            "data": asyncio.Queue(self.queue_size),
+            "results": asyncio.Queue(self.queue_size),
+        }
+        loop = asyncio.get_running_loop()
+        governed = (contextlib.nullcontext(self.pool) if self.pool else
+                    governor.GovernedPool(self.workers, self.timeout, self.max_rss_mb, self.extract_options))
+        with governed as pool, \
+                ThreadPoolExecutor(max_workers=self.workers) as waiters:
+            readers = [asyncio.create_task(self._read_stage()) for _ in range(self.read_concurrency)]
+            extractors = [asyncio.create_task(self._extract_stage(loop, pool, waiters)) for _ in range(self.workers)]
+            sink = asyncio.create_task(self._result_stage(on_result))
+
+            await self._walk_stage(roots)
+            for _ in readers:
+                await self._queues["paths"].put(_DONE)
+            await asyncio.gather(*readers)
+            for _ in extractors:
+                await self._queues["data"].put(_DONE)
+            await asyncio.gather(*extractors)
+            await self._queues["results"].put(_DONE)
+            await sink
+        return self.stats()
+
+    async def _walk_stage(self, roots):
+        # Depth-first walk; each listing runs in a thread so slow mounts don't block the loop
+        pending = []
+        for root in roots:
+            if os.path.isdir(root):
+                pending.append(root)
+            elif os.path.isfile(root):
+                self.counters["found"] += 1
+                await self._queues["paths"].put(root)
+        while pending:
+            folder = pending.pop()
+            dirs, files = await asyncio.to_thread(_list_dir, folder)
+            pending.extend(dirs)
+            for path in files:
+                self.counters["found"] += 1
+                await self._queues["paths"].put(path)  # Blocks when readers fall behind
+
+    async def _read_stage(self):
+        paths = self._queues["paths"]
+        while True:
+            path = await paths.get()
+            if path is _DONE:
+                return
+            try:
+                file_type, data, size = await asyncio.to_thread(_read_file, path, self.max_bytes)
+            except OSError as e:
+                print(f"[Error] Could not read {path}: {e}")
+                self.counters["errors"] += 1
+                continue
+            if file_type not in EXTRACTORS:
+                self.counters["skipped"] += 1
+                continue
+            if self.max_bytes and size > self.max_bytes:
+                # Over the cap: record it without handing it to an extractor
+                self.counters["aborted"] += 1
+                reason = f"file exceeds size limit ({self.max_bytes} bytes)"
+                await self._queues["results"].put(governor.aborted_record(path, file_type, reason))
+                continue
+            self.counters["read"] += 1
+            await self._queues["data"].put((path, file_type, data))
+
+    async def _extract_stage(self, loop, pool, waiters):
+        data_queue = self._queues["data"]
+        while True:
+            item = await data_queue.get()
+            if item is _DONE:
+                return
+            path, file_type, data = item
+            try:
+                # Each waiter thread blocks on one governed worker process
+                record = await loop.run_in_executor(waiters, pool.run, path, file_type, data)
+            except Exception as e:
+                print(f"[Error] Extraction failed for {path}: {e}")
+                self.counters["errors"] += 1
+                continue
+            if record["metadata"].get("extraction_status") == "aborted":
+                self.counters["aborted"] += 1
+            else:
+                self.counters["extracted"] += 1
+            await self._queues["results"].put(record)
+
+    async def _result_stage(self, on_result):
+        results = self._queues["results"]
+        while True:
+            record = await results.get()
+            if record is _DONE:
+                return
+            on_result(record)
+
+def scan_bytes(path, file_type, data, options=None):
+    # CPU-bound part of the pipeline; runs in a worker process
+    metadata = extract_from_bytes(file_type, data, options)
+    if (options or {}).get("phash") and file_type in ("jpg", "png"):
+        metadata["dhash"] = phash.dhash(data) or "Unknown"  # For near-duplicate search
+    anomalies = check_anomalies(metadata)
+
+    # Opt-in pixel analysis for JPEGs: suspicious ones only unless asked for all
+    ela_options = (options or {}).get("ela")
+    if ela_options and file_type == "jpg":
+        reasons = ["all JPEGs"] if ela_options.get("all") else ela.suspicious_findings(metadata)
+        if reasons:
+            heatmap = ela.heatmap_path_for(path, ela_options.get("heatmap_dir", "reports"))
+            metadata.update(ela.error_level_analysis(data, ela_options.get("quality", ela.DEFAULT_QUALITY),
+                                                     heatmap_path=heatmap,
+                                                     max_pixels=ela_options.get("max_pixels", ela.MAX_PIXELS)))
+            metadata["ela_reason"] = "; ".join(reasons)
+            anomalies = check_anomalies(metadata)
+    record = {
+        "path": path,
+        "file_type": file_type,
+        "metadata": metadata,
+        "anomalies": anomalies,
+        "risk_score": calculate_risk_score(anomalies),
+    }
+    children = child_records(path, metadata)
+    if children:
+        record["children"] = children
+    return record
+
+def child_records(path, metadata):
+    # Embedded files reported by an extractor become records of their own,
+    # named "<parent>#<name>", linked back through "parent" and checked
+    # against the parent's created/modified times
+    children = []
+    for child in metadata.pop("embedded_images", None) or []:
+        anomalies = check_anomalies(child["metadata"]) + check_embedded_anomalies(child["metadata"], metadata)
+        children.append({
+            "path": f"{path}#{child['name']}",
+            "parent": path,
+            "file_type": child["file_type"],
+            "metadata": child["metadata"],
+            "anomalies": anomalies,
+            "risk_score": calculate_risk_score(anomalies),
+            "offset": child.get("offset"),
+            "sha1": child.get("sha1"),
+        })
+    return children
+
+def scan_paths(roots, on_result, **options):
+    # Blocking entry point for callers outside an event loop
+    pipeline = ScanPipeline(**options)
+    return asyncio.run(pipeline.run(roots, on_result))
+
+def _list_dir(folder):
+    dirs, files = [], []
+    try:
+        with os.scandir(folder) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    dirs.append(entry.path)
+                elif entry.is_file():
+                    files.append(entry.path)
+    except OSError as e:
+        print(f"[Error] Could not list {folder}: {e}")
+    return dirs, sorted(files)
+
+def _read_file(path, max_bytes=None):
+    # Returns (file_type, data, size). The type comes from the extension and
+    # a 16-byte header; the body is read only for supported types under the
+    # cap, so skipped and oversized files cost one small read
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        header = f.read(16)
+        file_type = detect_file_type(path, header)
+        if file_type not in EXTRACTORS or (max_bytes and size > max_bytes):
+            return file_type, None, size
+        return file_type, header + f.read(), size
@@ -0,0 +1,190 @@
+import sys
+
+# Strings up to this length are interned, so repeated makes, models,
+# software names and anomaly texts share one object across records
+MAX_INTERN_LENGTH = 128
+_MISSING = object()
+# Record key orders seen so far; records with the same layout share one tuple
+_KEY_ORDERS = {}
+
+class _Unknown:
+    """The one shared stand-in for the "Unknown" placeholder string."""
+
+    __slots__ = ()
+
+    def __repr__(self):
+        return "UNKNOWN"
+
+    def __reduce__(self):
+        return "UNKNOWN"  # Unpickles as the module-level singleton
+
+UNKNOWN = _Unknown()
+
+class CompactMetadata:
+    """
+    Metadata dict stored as slots, one per field the extractor always emits.
+
+    Fields an extractor did not set stay unset (and cost no object), "Unknown"
+    becomes the UNKNOWN sentinel, and keys outside FIELDS (exif_tags, ela_*,
+    dhash, ...) go to a small overflow dict. to_dict() gives back the
+    original dict, in the same key order.
+    """
+
+    FIELDS = ()
+    _fields = frozenset()
+    __slots__ = ("_extra",)
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._fields = frozenset(cls.FIELDS)
+
+    @classmethod
+    def from_dict(cls, metadata):
+        compact = cls()
+        extra = None
+        fields = cls._fields
+        for key, value in metadata.items():
+            if key in fields:
+                setattr(compact, key, _pack(value))
+            else:
+                if extra is None:
+                    extra = {}
+                extra[sys.intern(key)] = _pack(value)
+        compact._extra = extra
+        return compact
+
+    def to_dict(self):
+        metadata = {}
+        for field in self.FIELDS:
+            value = getattr(self, field, _MISSING)
+            if value is not _MISSING:
+                metadata[field] = _unpack(value)
+        if self._extra:
+            for key, value in self._extra.items():
+                metadata[key] = _unpack(value)
+        return metadata
+
+    def get(self, key, default=None):
+        if key in self._fields:
+            value = getattr(self, key, _MISSING)
+        elif self._extra:
+            value = self._extra.get(key, _MISSING)
+        else:
+            value = _MISSING
+        return default if value is _MISSING else _unpack(value)
+
+class JpgMetadata(CompactMetadata):
+    FIELDS = (
+        "file_type", "make", "camera_model", "software", "datetime", "datetime_digitized",
+        "exif_version", "body_serial", "width", "height", "gps_latitude", "gps_longitude",
+        "created_by", "modified_by", "title", "author", "description",
+        "frame_width", "frame_height", "jpeg_process", "chroma_subsampling", "jpeg_quality",
+        "comment", "icc_profile", "xmp_create", "xmp_modify", "xmp_creator_tool",
+        "xmp_history", "mpf_images", "trailing_bytes_after_eoi",
+    )
+    __slots__ = FIELDS
+
+class PngMetadata(CompactMetadata):
+    FIELDS = (
+        "file_type", "make", "camera_model", "software", "datetime", "datetime_digitized",
+        "exif_version", "body_serial", "width", "height", "gps_latitude", "gps_longitude",
+        "created_by", "modified_by", "title", "author", "description",
+        "xmp_create", "xmp_modify", "xmp_creator_tool", "xmp_history", "crc_checked", "crc_errors", "crc_error_chunks", "idat_crc_verified",
+        "iend_found", "trailing_bytes_after_iend", "chunks_after_iend", "chunk_error",
+    )
+    __slots__ = FIELDS
+
+class PdfMetadata(CompactMetadata):
+    FIELDS = (
+        "file_type", "title", "author", "subject", "keywords", "creator", "producer",
+        "created", "modified", "xmp_create", "xmp_modify", "xmp_creator_tool",
+        "xmp_document_id", "xmp_instance_id", "xmp_history", "created_by", "modified_by",
+        "pdf_version", "page_count", "page_width", "page_height", "encrypted",
+        "linearized", "has_acroform", "has_annotations", "has_javascript", "trailer_id",
+        "embedded_jpegs", "embedded_jpegs_examined", "embedded_jpegs_duplicate",
+    )
+    __slots__ = FIELDS
+
+class DocxMetadata(CompactMetadata):
+    FIELDS = (
+        "file_type", "title", "subject", "description", "keywords", "category", "language",
+        "author", "created", "modified", "last_modified_by", "revision", "last_printed",
+        "created_by", "modified_by", "app_version", "company", "template", "total_time",
+        "pages", "words", "characters", "characters_with_spaces", "lines", "paragraphs",
+        "doc_security", "hyperlinks_changed", "shared_doc", "links_up_to_date", "scale_crop",
+        "custom_properties", "has_macros", "track_changes",
+        "rsid_root", "rsid_sessions", "rsid_body_sessions", "rsid_foreign",
+        "rsid_paragraphs", "rsid_runs", "rsid_top", "media_files", "media_images_examined",
+        "parts_aborted",
+    )
+    __slots__ = FIELDS
+
+class OtherMetadata(CompactMetadata):
+    __slots__ = ()  # Everything lives in the overflow dict
+
+METADATA_CLASSES = {
+    "jpg": JpgMetadata,
+    "png": PngMetadata,
+    "pdf": PdfMetadata,
+    "docx": DocxMetadata,
+}
+
+class CompactRecord:
+    """
+    Slotted scan record: path, type, compact metadata, anomalies and score.
+
+    Anything else a record carries (parent, offset, sha1 for embedded files)
+    goes to an overflow dict; children are stored as CompactRecords too. The
+    record's key order is kept (shared between records with the same
+    layout), so to_dict() serializes exactly like the original.
+    """
+
+    __slots__ = ("path", "file_type", "metadata", "anomalies", "risk_score", "children", "_extra", "_keys")
+    _CORE_KEYS = ("path", "file_type", "metadata", "anomalies", "risk_score")
+
+    @classmethod
+    def from_dict(cls, record):
+        compact = cls()
+        compact.path = record.get("path", "")
+        compact.file_type = sys.intern(record.get("file_type", "unknown"))
+        metadata_class = METADATA_CLASSES.get(compact.file_type, OtherMetadata)
+        compact.metadata = metadata_class.from_dict(record.get("metadata") or {})
+        compact.anomalies = tuple(_pack(a) for a in record.get("anomalies") or ())
+        compact.risk_score = record.get("risk_score", 0)
+        children = record.get("children")
+        compact.children = tuple(cls.from_dict(child) for child in children) if children else None
+        extra = {key: _pack(value) for key, value in record.items()
+                 if key not in cls.__slots__}
+        compact._extra = extra or None
+        keys = tuple(record) + tuple(key for key in cls._CORE_KEYS if key not in record)
+        compact._keys = _KEY_ORDERS.setdefault(keys, keys)
+        return compact
+
+    def to_dict(self):
+        record = {}
+        for key in self._keys:
+            if key == "metadata":
+                record[key] = self.metadata.to_dict()
+            elif key == "anomalies":
+                record[key] = list(self.anomalies)
+            elif key == "children":
+                record[key] = [child.to_dict() for child in self.children or ()]
+            elif key in self._CORE_KEYS:
+                record[key] = getattr(self, key)
+            else:
+                record[key] = _unpack(self._extra[key])
+        return record
+
+def compact_record(record):
+    return CompactRecord.from_dict(record)
+
+def _pack(value):
+    if type(value) is str:
+        if value == "Unknown":
+            return UNKNOWN
+        if len(value) <= MAX_INTERN_LENGTH:
+            return sys.intern(value)
+    return value
+
+def _unpack(value):
+    return "Unknown" if value is UNKNOWN else value
@@ -1,17 +1,44 @@
 import os
+import re
+import json
+import hashlib
 from datetime import datetime
+from modules.anomaly_checker import calculate_risk_score
 
-def generate_report(file_path, metadata, anomalies):
-    filename = os.path.basename(file_path)
+def generate_report(file_path, metadata, anomalies, echo=True, parent=None):
+    # Embedded children are named "<parent>#<member>"; parent comes from the
+    # child record, since real paths may contain "#" too
+    digest = path_digest(file_path)
+    member = ""
+    if parent and file_path.startswith(parent + "#"):
+        file_path, member = parent, file_path[len(parent) + 1:]
+    filename = os.path.basename(file_path) + (f"#{member}" if member else "")
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    if member:
+        stem += "_" + re.sub(r'[^\w.-]', '_', member)
     report_lines = []
 
-    print("\n=== METADATA REPORT ===")
+    if echo:
+        print("\n=== METADATA REPORT ===")
     report_lines.append(f"File: {filename}")
     report_lines.append(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     report_lines.append("")
 
     report_lines.append("Extracted Metadata:")
     for key, value in metadata.items():
+        if isinstance(value, dict):  # Nested tag dumps, e.g. exif_tags
+            report_lines.append(f"  - {key.capitalize()}:")
+            for sub_key, sub_value in value.items():
+                report_lines.append(f"      {sub_key}: {sub_value}")
+            continue
+        if isinstance(value, list):  # One entry per line, e.g. xmp_history
+            if not value:
+                report_lines.append(f"  - {key.capitalize()}: None")
+                continue
+            report_lines.append(f"  - {key.capitalize()}:")
+            for item in value:
+                report_lines.append(f"      {item}")
+            continue
         report_lines.append(f"  - {key.capitalize()}: {value}")
     report_lines.append("")
 
@@ -23,8 +50,7 @@ def generate_report(file_path, metadata, anomalies):
         report_lines.append("  - None detected.")
     report_lines.append("")
 
-    # Simple risk score: 20 points per anomaly
-    risk_score = min(len(anomalies) * 20, 100)
+    risk_score = calculate_risk_score(anomalies)
     report_lines.append(f"Risk Score: {risk_score}/100")
     if risk_score >= 80:
         report_lines.append("→ High likelihood of tampering or metadata manipulation.")
@@ -34,14 +60,28 @@ def generate_report(file_path, metadata, anomalies):
         report_lines.append("→ Low likelihood of tampering.")
 
     report_output = "\n".join(report_lines)
-    print(report_output)
+    if echo:
+        print(report_output)
 
-    # Save report to a file and force UTF8 for encoding
+    # Save report to a file and force UTF8 for encoding; the path digest keeps
+    # same-named files from different folders apart within one second
     os.makedirs("reports", exist_ok=True)
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    report_file = f"reports/forensic_report_{os.path.splitext(filename)[0]}_{timestamp}.txt"
+    report_file = f"reports/forensic_report_{stem}_{digest}_{timestamp}.txt"
 
     with open(report_file, 'w', encoding='utf-8') as f:
         f.write(report_output)
 
-    print(f"\nReport saved to: {report_file}")
\ No newline at end of file
+    if echo:
+        print(f"\nReport saved to: {report_file}")
+    return report_file
+
+def append_record(record, out_path):
+    # Append one scan record as a JSON line to a running results file
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    with open(out_path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+def path_digest(file_path):
+    # Short stable tag of a file's location, for output names
+    return hashlib.sha1(os.path.abspath(file_path).encode('utf-8', 'surrogateescape')).hexdigest()[:10]
@@ -0,0 +1,90 @@
+import bisect
+
+from modules.anomaly_checker import extract_datetime
+from modules.records import compact_record
+
+# Fields tried in order when picking a record's timestamp for sorting
+_TIMESTAMP_FIELDS = ("modified", "datetime", "created", "xmp_modify", "xmp_create")
+
+class ResultStore:
+    """
+    In-memory store of scan records with paging and sorting on the data.
+
+    Rows are kept as small summary tuples (risk, type, timestamp, path) next
+    to the full records, and the active sort order is maintained as a sorted
+    key list, so new records slot in without re-sorting everything and a UI
+    only ever asks for one page at a time. Full records are held as
+    CompactRecords and turned back into dicts only when get() asks for one.
+    """
+
+    SORT_KEYS = ("risk_score", "file_type", "timestamp", "path")
+
+    def __init__(self):
+        self._records = []
+        self._rows = []
+        self._sort_key = None
+        self._descending = False
+        self._order = []  # Sorted (key, index) pairs when a sort is active
+
+    def __len__(self):
+        return len(self._records)
+
+    def add(self, record):
+        index = len(self._records)
+        row = _summary_row(record)
+        self._records.append(compact_record(record))
+        self._rows.append(row)
+        if self._sort_key is not None:
+            bisect.insort(self._order, (self._key(row), index))
+        return index
+
+    def sort_by(self, key, descending=False):
+        if key not in self.SORT_KEYS:
+            raise ValueError(f"Unknown sort key: {key}")
+        self._sort_key = key
+        self._descending = descending
+        self._order = sorted((self._key(row), i) for i, row in enumerate(self._rows))
+
+    @property
+    def sort_state(self):
+        return self._sort_key, self._descending
+
+    def page(self, offset, limit):
+        # Returns [(index, row)] for one page in the current order
+        total = len(self._rows)
+        offset = max(0, min(offset, total))
+        stop = min(total, offset + limit)
+        if self._sort_key is None:
+            return [(i, self._rows[i]) for i in range(offset, stop)]
+        if self._descending:
+            picked = [self._order[total - 1 - pos][1] for pos in range(offset, stop)]
+        else:
+            picked = [pair[1] for pair in self._order[offset:stop]]
+        return [(i, self._rows[i]) for i in picked]
+
+    def get(self, index):
+        return self._records[index].to_dict()
+
+    def _key(self, row):
+        value = row[self.SORT_KEYS.index(self._sort_key)]
+        return (value, row[3])  # Path as tie-breaker keeps ordering stable
+
+def _summary_row(record):
+    metadata = record.get("metadata") or {}
+    return (
+        record.get("risk_score", 0),
+        record.get("file_type", "unknown"),
+        _record_timestamp(metadata),
+        record.get("path", ""),
+    )
+
+def _record_timestamp(metadata):
+    # Normalised "YYYY-MM-DD HH:MM:SS" so string order matches time order
+    for field in _TIMESTAMP_FIELDS:
+        raw = metadata.get(field)
+        if not isinstance(raw, str) or raw == "Unknown":
+            continue
+        dt = extract_datetime(raw)
+        if dt:
+            return dt.strftime("%Y-%m-%d %H:%M:%S")
+    return ""
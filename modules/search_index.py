@@ -0,0 +1,252 @@
+import os
+import re
+import json
+import sqlite3
+
+from modules.timeline import normalize_timestamp
+
+DEFAULT_DB = os.path.join("reports", "metadata_index.sqlite")
+# Records written per transaction
+COMMIT_EVERY = 1000
+# Metadata fields that get their own full-text column (query as field:term);
+# every other string field is searchable through the "other" column
+TEXT_FIELDS = (
+    "author", "title", "subject", "keywords", "description", "category", "company",
+    "creator", "producer", "software", "make", "camera_model",
+    "created_by", "modified_by", "last_modified_by", "template", "comment", "icc_profile",
+    "xmp_creator_tool", "xmp_document_id", "xmp_instance_id",
+)
+FTS_COLUMNS = ("path",) + TEXT_FIELDS + ("anomalies", "other")
+# Structured timestamp columns and the metadata fields they are filled from
+TIME_COLUMNS = {
+    "created": ("created", "xmp_create"),
+    "modified": ("modified", "xmp_modify"),
+    "captured": ("datetime", "datetime_digitized"),
+}
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    parent TEXT,
+    file_type TEXT NOT NULL,
+    risk_score INTEGER NOT NULL,
+    anomaly_count INTEGER NOT NULL,
+    created TEXT,
+    modified TEXT,
+    captured TEXT
+);
+CREATE INDEX IF NOT EXISTS files_type_risk ON files (file_type, risk_score);
+CREATE INDEX IF NOT EXISTS files_risk ON files (risk_score);
+CREATE INDEX IF NOT EXISTS files_created ON files (created);
+CREATE INDEX IF NOT EXISTS files_modified ON files (modified);
+CREATE INDEX IF NOT EXISTS files_captured ON files (captured);
+CREATE VIRTUAL TABLE IF NOT EXISTS fields USING fts5 ({", ".join(FTS_COLUMNS)}, tokenize = 'unicode61');
+"""
+
+# Structured parts of a query; whatever is left is an FTS5 match expression
+_DATE_FILTER = re.compile(r'\b(created|modified|captured)\s+(after|before)\s+(\d{4})(?:-(\d{1,2}))?(?:-(\d{1,2}))?\b', re.I)
+_TYPE_FILTER = re.compile(r'\btype:(\w+)', re.I)
+_RISK_FILTER = re.compile(r'\brisk\s*(>=|<=|>|<|=)\s*(\d+)', re.I)
+# A term: optional field prefix, then a "quoted phrase" or a bare word
+_TERM = re.compile(r'(?:(\w+):(?=\S))?("[^"]*"?|\S+)')
+OPERATORS = ("AND", "OR", "NOT")
+
+class MetadataIndex:
+    """
+    SQLite index of scan records: one row of structured columns (type, risk,
+    created/modified/capture time) per file plus an FTS5 row holding its
+    text fields, joined on the row id.
+
+    Re-adding a path replaces its rows, so re-scans and overlapping record
+    files do not produce duplicates.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.pending = 0
+        self.added = 0
+
+    def add_record(self, record):
+        # Indexes a record and its children (embedded files)
+        for item in [record] + record.get("children", []):
+            self._add(item)
+
+    def _add(self, record):
+        metadata = record.get("metadata") or {}
+        path = record.get("path", "")
+        row = self.conn.execute("SELECT id FROM files WHERE path = ?", (path,)).fetchone()
+        if row:
+            self.conn.execute("DELETE FROM fields WHERE rowid = ?", row)
+            self.conn.execute("DELETE FROM files WHERE id = ?", row)
+        anomalies = record.get("anomalies") or []
+        times = [_first_timestamp(metadata, fields) for fields in TIME_COLUMNS.values()]
+        cursor = self.conn.execute(
+            "INSERT INTO files (path, parent, file_type, risk_score, anomaly_count, created, modified, captured)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (path, record.get("parent"), record.get("file_type", "unknown"),
+             record.get("risk_score", 0), len(anomalies), *times))
+        texts = [_text(metadata.get(field)) for field in TEXT_FIELDS]
+        other = " ".join(f"{key} {_text(value)}" for key, value in metadata.items()
+                         if key not in TEXT_FIELDS and _text(value))
+        self.conn.execute(
+            f"INSERT INTO fields (rowid, {', '.join(FTS_COLUMNS)}) VALUES ({', '.join('?' * (len(FTS_COLUMNS) + 1))})",
+            (cursor.lastrowid, path, *texts, " ".join(anomalies), other))
+        self.added += 1
+        self.pending += 1
+        if self.pending >= COMMIT_EVERY:
+            self.commit()
+
+    def add_records_file(self, jsonl_path):
+        # Loads records.jsonl / watch_results.jsonl style files
+        count = 0
+        with open(jsonl_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    self.add_record(json.loads(line))
+                    count += 1
+        return count
+
+    def commit(self):
+        self.conn.commit()
+        self.pending = 0
+
+    def close(self):
+        self.commit()
+        self.conn.execute("PRAGMA optimize")
+        self.conn.close()
+
+    def query(self, text, limit=50):
+        """
+        Search with FTS5 syntax plus a few structured filters:
+          author:Smith AND producer:iText      field terms, AND/OR/NOT, "phrases", prefix*
+        Terms are matched literally (iText 5.5, x.pdf, O'Brien); a leading
+        NOT excludes its term from the rest of the results.
+          created|modified|captured after|before YYYY[-MM[-DD]]
+          type:pdf    risk>=40
+        "after" includes the given period (after 2024 = from 2024-01-01);
+        "before" excludes it. Returns row dicts, best match first.
+        """
+        match, conditions, params = parse_query(text)
+        columns = "files.path, files.file_type, files.risk_score, files.created, files.modified, files.captured"
+        if match:
+            sql = f"SELECT {columns} FROM fields JOIN files ON files.id = fields.rowid WHERE fields MATCH ?"
+            params = [match] + params
+        else:
+            sql = f"SELECT {columns} FROM files WHERE 1"
+        for condition in conditions:
+            sql += f" AND {condition}"
+        sql += " ORDER BY " + ("fields.rank, files.path" if match else "files.path") + " LIMIT ?"
+        rows = self.conn.execute(sql, params + [limit]).fetchall()
+        keys = ("path", "file_type", "risk_score", "created", "modified", "captured")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+def parse_query(text):
+    # Splits a query into (FTS5 expression, SQL conditions, parameters)
+    conditions, params = [], []
+
+    def date_filter(m):
+        column, direction = m.group(1).lower(), m.group(2).lower()
+        bound = f"{int(m.group(3)):04d}-{int(m.group(4) or 1):02d}-{int(m.group(5) or 1):02d}T00:00:00"
+        conditions.append(f"files.{column} {'>=' if direction == 'after' else '<'} ?")
+        params.append(bound)
+        return " "
+
+    def type_filter(m):
+        conditions.append("files.file_type = ?")
+        params.append(m.group(1).lower())
+        return " "
+
+    def risk_filter(m):
+        conditions.append(f"files.risk_score {m.group(1)} ?")
+        params.append(int(m.group(2)))
+        return " "
+
+    text = _DATE_FILTER.sub(date_filter, text)
+    text = _TYPE_FILTER.sub(type_filter, text)
+    text = _RISK_FILTER.sub(risk_filter, text)
+    match, excluded = _match_expression(text)
+    if excluded and not match:
+        # Only negated terms: FTS5 NOT needs a left operand, so filter on the row ids instead
+        conditions.append("files.id NOT IN (SELECT rowid FROM fields WHERE fields MATCH ?)")
+        params.append(excluded)
+    elif excluded:
+        match = f"({match}) NOT ({excluded})"
+    return match, conditions, params
+
+def _match_expression(text):
+    """
+    Rebuilds the free-text part of a query as an FTS5 expression. Every term
+    becomes a quoted phrase, so punctuation (x.pdf, O'Brien, 5.5) is matched
+    literally instead of being read as FTS5 syntax; AND/OR/NOT and a trailing
+    * (prefix) are the only operators kept. Returns (expression, excluded),
+    where excluded ORs the terms of a leading NOT, which FTS5 cannot express.
+    """
+    tokens = []
+    for m in _TERM.finditer(text):
+        field, value = m.group(1), m.group(2)
+        if field is None and value in OPERATORS:
+            tokens.append(value)
+            continue
+        if field is not None and field.lower() not in FTS_COLUMNS:
+            value, field = m.group(0), None  # Not a column: search the text as written
+        term = _phrase(value)
+        if term:
+            tokens.append(f"{field.lower()} : {term}" if field else term)
+
+    # Operators between two terms; a run of them keeps NOT if present, else the first
+    expression, pending = [], []
+    for token in tokens:
+        if token in OPERATORS:
+            pending.append(token)
+            continue
+        operator = ("NOT" if "NOT" in pending else pending[0]) if pending else None
+        if operator and (expression or operator == "NOT"):
+            expression.append(operator)
+        expression.append(token)
+        pending = []
+
+    excluded = []
+    while expression[:1] == ["NOT"]:
+        excluded.append(expression[1])
+        expression = expression[2:]
+        if expression[:1] in (["AND"], ["OR"]):
+            expression = expression[1:]
+    return " ".join(expression), " OR ".join(excluded)
+
+def _phrase(value):
+    # An FTS5 phrase for a term, or "" when it has nothing to search for
+    prefix = value.endswith("*") and not value.startswith('"')
+    value = value.rstrip("*") if prefix else value
+    if value.startswith('"'):
+        value = value[1:-1] if len(value) > 1 and value.endswith('"') else value[1:]
+    if not re.search(r'\w', value):
+        return ""
+    return '"' + value.replace('"', '""') + '"' + ("*" if prefix else "")
+
+def _first_timestamp(metadata, fields):
+    for field in fields:
+        raw = metadata.get(field)
+        if isinstance(raw, str) and raw != "Unknown":
+            stamp = normalize_timestamp(raw)
+            if stamp:
+                return stamp
+    return None
+
+def _text(value):
+    # Searchable text of a metadata value; "Unknown" and empty values are skipped
+    if value is None or value == "Unknown" or value == "":
+        return ""
+    if isinstance(value, dict):
+        return " ".join(f"{k} {_text(v)}" for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return " ".join(_text(v) for v in value)
+    return str(value)
@@ -0,0 +1,267 @@
+import os
+import json
+import time
+import socket
+import ipaddress
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+from modules.file_loader import detect_file_type, EXTRACTORS
+from modules import governor
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Seconds a request waits for a free slot before getting 503
+QUEUE_WAIT = 30.0
+# Largest request body accepted when no per-file max_bytes is set
+MAX_BODY_BYTES = governor.DEFAULT_MAX_BYTES
+# Largest {"paths": [...]} JSON body
+MAX_JSON_BYTES = 1024 * 1024
+
+class ScanService:
+    """
+    Long-running local scan service around a warm GovernedPool.
+
+    Workers import the extractors once at startup, so each request only pays
+    for the extraction itself. A semaphore caps concurrent scans.
+    """
+
+    def __init__(self, workers=None, max_concurrent=None, timeout=governor.DEFAULT_TIMEOUT,
+                 max_rss_mb=governor.DEFAULT_MAX_RSS_MB, max_bytes=governor.DEFAULT_MAX_BYTES,
+                 extract_options=None):
+        self.pool = governor.GovernedPool(workers, timeout, max_rss_mb, extract_options)
+        self.max_concurrent = max_concurrent or self.pool.size
+        self.slots = threading.BoundedSemaphore(self.max_concurrent)
+        self.max_bytes = max_bytes
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self.counters = {"requests": 0, "files": 0, "aborted": 0, "rejected": 0, "in_flight": 0, "scan_seconds": 0.0}
+
+    def health(self):
+        return {"status": "ok", "workers": self.pool.size, "uptime_s": round(time.time() - self.started, 1)}
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+        files = stats["files"] or 1
+        stats["avg_scan_ms"] = round(stats.pop("scan_seconds") / files * 1000.0, 2)
+        stats["max_concurrent"] = self.max_concurrent
+        stats["workers"] = self.pool.size
+        return stats
+
+    def scan_paths(self, paths):
+        results = []
+        for path in paths:
+            if not isinstance(path, str):
+                # open() would take an int as one of the service's own descriptors
+                results.append({"path": repr(path), "error": "Path must be a string."})
+                continue
+            try:
+                with open(path, 'rb') as f:
+                    size = os.fstat(f.fileno()).st_size
+                    data = f.read(16) if self.max_bytes and size > self.max_bytes else f.read()
+            except OSError as e:
+                results.append({"path": path, "error": str(e)})
+                continue
+            file_type = detect_file_type(path, data[:10])
+            if self.max_bytes and size > self.max_bytes:
+                reason = f"file exceeds size limit ({self.max_bytes} bytes)"
+                results.append(self._count(governor.aborted_record(path, file_type, reason)))
+                continue
+            results.append(self.scan_bytes(data, path, file_type))
+        return results
+
+    def scan_bytes(self, data, name="upload", file_type=None):
+        file_type = file_type or detect_file_type(name, data[:10])
+        if file_type == "unknown":
+            file_type = _sniff_type(data[:10])
+        if file_type not in EXTRACTORS:
+            return {"path": name, "error": "Unsupported file type."}
+        started = time.monotonic()
+        with self._lock:
+            self.counters["in_flight"] += 1
+        try:
+            record = self.pool.run(name, file_type, data)
+        finally:
+            with self._lock:
+                self.counters["in_flight"] -= 1
+                self.counters["scan_seconds"] += time.monotonic() - started
+        return self._count(record)
+
+    def acquire(self):
+        if self.slots.acquire(timeout=QUEUE_WAIT):
+            return True
+        with self._lock:
+            self.counters["rejected"] += 1
+        return False
+
+    def release(self):
+        self.slots.release()
+
+    def close(self):
+        self.pool.close()
+
+    def _count(self, record):
+        with self._lock:
+            self.counters["files"] += 1
+            if record.get("metadata", {}).get("extraction_status") == "aborted":
+                self.counters["aborted"] += 1
+        return record
+
+class _Handler(BaseHTTPRequestHandler):
+    service = None  # Set by serve()
+    allow_remote = False
+
+    def do_GET(self):
+        if not self._host_allowed():
+            return
+        route = urlparse(self.path).path
+        if route == "/health":
+            self._send(200, self.service.health())
+        elif route == "/stats":
+            self._send(200, self.service.stats())
+        else:
+            self._send(404, {"error": "Not found."})
+
+    def do_POST(self):
+        if not self._host_allowed():
+            return
+        url = urlparse(self.path)
+        if url.path != "/scan":
+            self._send(404, {"error": "Not found."})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self._send(400, {"error": "Invalid Content-Length."})
+            return
+        is_json = (self.headers.get("Content-Type") or "").startswith("application/json")
+        limit = MAX_JSON_BYTES if is_json else (self.service.max_bytes or MAX_BODY_BYTES)
+        if length > limit:
+            self._send(413, {"error": f"Body exceeds {limit} bytes."})
+            return
+        with self.service._lock:
+            self.service.counters["requests"] += 1
+        # Take the slot before reading the body, so --max-concurrent also
+        # bounds how many uploads are held in memory
+        if not self.service.acquire():
+            self._send(503, {"error": "Service busy, try again."})
+            self.close_connection = True  # The unread body is left on the socket
+            return
+        try:
+            body = self.rfile.read(length)
+            if len(body) < length:
+                self._send(400, {"error": "Body shorter than Content-Length."})
+                return
+            if is_json:
+                # {"paths": [...]} scans files visible to the service
+                try:
+                    request = json.loads(body or b"{}")
+                    paths = request["paths"]
+                except (ValueError, KeyError, TypeError):
+                    paths = None
+                if not isinstance(paths, list) or not all(isinstance(p, str) and p for p in paths):
+                    self._send(400, {"error": "Expected JSON body {\"paths\": [...]} with path strings."})
+                    return
+                self._send(200, {"results": self.service.scan_paths(paths)})
+            else:
+                # Raw file bytes; ?name= and/or ?type= help type detection
+                query = parse_qs(url.query)
+                name = query.get("name", ["upload"])[0]
+                file_type = query.get("type", [None])[0]
+                self._send(200, {"results": [self.service.scan_bytes(body, name, file_type)]})
+        finally:
+            self.service.release()
+
+    def _host_allowed(self):
+        # A loopback bind alone does not stop DNS rebinding: a web page can
+        # point its own host name at 127.0.0.1, and the browser then sends
+        # that name in Host. Only loopback names and literals are accepted.
+        if self.allow_remote or is_loopback_host(self.headers.get("Host")):
+            return True
+        self._send(403, {"error": "Host header must name a loopback address."})
+        self.close_connection = True
+        return False
+
+    def log_message(self, format, *args):
+        pass  # Keep the console for our own output
+
+    def _send(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def make_server(service, host=DEFAULT_HOST, port=DEFAULT_PORT, allow_remote=False):
+    # The service reads any path it is given, without authentication, so it
+    # only listens beyond loopback when explicitly allowed to
+    if not allow_remote and not is_loopback(host):
+        raise ValueError(f"Refusing to listen on non-loopback address {host} (needs allow_remote).")
+    handler = type("ScanHandler", (_Handler,), {"service": service, "allow_remote": allow_remote})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, allow_remote=False, **service_options):
+    if not allow_remote and not is_loopback(host):
+        print(f"[Error] Refusing to listen on {host}: the service reads local files without "
+              f"authentication. Use a loopback address or pass --allow-remote.")
+        return
+    service = ScanService(**service_options)
+    server = make_server(service, host, port, allow_remote)
+    print(f"Scan service listening on http://{host}:{server.server_port} "
+          f"({service.pool.size} warm workers, {service.max_concurrent} concurrent scans)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nService stopped.")
+    finally:
+        server.server_close()
+        service.close()
+
+def is_loopback(host):
+    # True when every address host resolves to is a loopback address
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        pass
+    try:
+        infos = socket.getaddrinfo(host, None)
+    except OSError:
+        return False
+    return bool(infos) and all(ipaddress.ip_address(info[4][0].split("%", 1)[0]).is_loopback for info in infos)
+
+def is_loopback_host(value):
+    # True for a Host header naming localhost or a loopback IP literal (with
+    # or without a port); names are not resolved, since resolving is what a
+    # rebinding attack controls
+    if not value:
+        return False
+    host = value.strip().lower()
+    if host.startswith("["):
+        host = host[1:].split("]", 1)[0]
+    elif host.count(":") == 1:
+        host = host.split(":", 1)[0]
+    if host.rstrip(".") == "localhost" or host.endswith(".localhost"):
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+def _sniff_type(header):
+    # Magic-number detection for uploads without a usable file name
+    if header.startswith(b'%PDF'):
+        return "pdf"
+    if header[0:2] == b'\xFF\xD8':
+        return "jpg"
+    if header.startswith(b'\x89PNG'):
+        return "png"
+    if header.startswith(b'PK'):
+        return "docx"
+    return "unknown"
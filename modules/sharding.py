@@ -0,0 +1,267 @@
+import os
+import json
+import heapq
+
+from modules.file_loader import detect_file_type
+from modules.anomaly_checker import calculate_risk_score
+from modules.pipeline import scan_paths
+from modules.corpus_summary import CorpusSummary
+from modules.timeline import TimelineBuilder, merge_timelines
+from modules.geo_index import GeoIndex
+from modules.phash import DuplicateIndex, duplicate_entry, DEFAULT_RADIUS
+from modules.watcher import SnapshotIndex
+
+MANIFEST_VERSION = 1
+# Files a shard worker writes next to its manifest
+RECORDS_FILE = "records.jsonl"
+STATE_FILE = "state.json"
+TIMELINE_FILE = "timeline.jsonl"
+INDEX_FILE = "watch_index.json"
+
+def plan_shards(roots, shard_count):
+    """
+    Split the supported files under roots into shard_count manifests.
+
+    Each file type is placed largest file first onto the shard holding the
+    fewest bytes of that type (ties: fewest bytes overall, then lowest
+    index), so every shard gets a similar byte total and a similar mix of
+    types. The walk is sorted, so one corpus always gives the same plan.
+    """
+    shard_count = max(1, shard_count)
+    by_type = {}
+    for path, size, mtime_ns in _walk(roots):
+        try:
+            file_type = detect_file_type(path)
+        except OSError as e:
+            print(f"[Error] Could not read {path}: {e}")
+            continue
+        if file_type != "unknown":
+            by_type.setdefault(file_type, []).append([path, file_type, size, mtime_ns])
+
+    shards = [{"version": MANIFEST_VERSION, "shard": i, "shards": shard_count,
+               "bytes": 0, "bytes_by_type": {}, "files": []} for i in range(shard_count)]
+    for file_type in sorted(by_type):
+        # Only this type changes the loads while it is placed, so one heap per type stays exact
+        heap = [(0, shard["bytes"], shard["shard"]) for shard in shards]
+        heapq.heapify(heap)
+        for entry in sorted(by_type[file_type], key=lambda e: (-e[2], e[0])):
+            type_bytes, total, index = heapq.heappop(heap)
+            shard = shards[index]
+            shard["files"].append(entry)
+            shard["bytes"] += entry[2]
+            shard["bytes_by_type"][file_type] = type_bytes + entry[2]
+            heapq.heappush(heap, (type_bytes + entry[2], total + entry[2], index))
+    for shard in shards:
+        shard["files"].sort()
+    return shards
+
+def write_manifests(shards, out_dir):
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for shard in shards:
+        path = os.path.join(out_dir, f"shard_{shard['shard']:03d}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(shard, f, ensure_ascii=False)
+        paths.append(path)
+    return paths
+
+def run_shard(manifest_path, out_dir=None, **pipeline_options):
+    """
+    Scan the files of one manifest and write the shard's outputs.
+
+    Records are spooled as they finish, then copied out in path order and
+    only then fed to the summary, timeline, geo and duplicate sinks, so a
+    shard's outputs do not depend on worker timing. out_dir defaults to the
+    manifest path without ".json".
+    """
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"Unsupported shard manifest version: {manifest.get('version')}")
+    out_dir = out_dir or os.path.splitext(manifest_path)[0]
+    os.makedirs(out_dir, exist_ok=True)
+
+    stamps = {path: (size, mtime_ns) for path, _file_type, size, mtime_ns in manifest["files"]}
+    spool_path = os.path.join(out_dir, RECORDS_FILE + ".spool")
+    offsets = []  # (path, offset, length) per spooled record
+    with open(spool_path, 'wb') as spool:
+        def on_result(record):
+            line = (json.dumps(record, ensure_ascii=False, default=str) + "\n").encode('utf-8')
+            offsets.append((record.get("path", ""), spool.tell(), len(line)))
+            spool.write(line)
+
+        stats = scan_paths([path for path, _t, _s, _m in manifest["files"]], on_result, **pipeline_options)
+
+    summary = CorpusSummary()
+    timeline = TimelineBuilder(tmp_dir=out_dir)
+    geo = GeoIndex()
+    dupes = []
+    index = SnapshotIndex(os.path.join(out_dir, INDEX_FILE))
+    offsets.sort()
+    with open(spool_path, 'rb') as spool, open(os.path.join(out_dir, RECORDS_FILE), 'wb') as out:
+        for path, offset, length in offsets:
+            spool.seek(offset)
+            line = spool.read(length)
+            out.write(line)
+            record = json.loads(line)
+            for item in [record] + record.get("children", []):
+                summary.update(item)
+                timeline.add_record(item)
+                geo.add_record(item)
+                entry = duplicate_entry(item)
+                if entry:
+                    dupes.append(entry)
+            if path in stamps:
+                index.update(path, *stamps[path])
+    os.remove(spool_path)
+
+    timeline.finish(os.path.join(out_dir, TIMELINE_FILE))
+    index.save()
+    state = {
+        "version": MANIFEST_VERSION,
+        "shard": manifest["shard"],
+        "shards": manifest["shards"],
+        "stats": {key: value for key, value in stats.items() if key not in ("queue_depths", "queue_size")},
+        "summary": summary.to_state(),
+        "geo": geo.points(),
+        "dupes": dupes,
+    }
+    with open(os.path.join(out_dir, STATE_FILE), 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, default=str)
+    return out_dir
+
+def merge_shards(shard_dirs, case_dir, dupe_radius=DEFAULT_RADIUS):
+    """
+    Combine shard outputs into one case result in case_dir.
+
+    Shards are taken in shard-index order and every merged output is in
+    path (or timestamp) order, so the same shards always give the same case.
+    Returns {output name: path}.
+    """
+    shards = []
+    for shard_dir in _shard_dirs(shard_dirs):
+        with open(os.path.join(shard_dir, STATE_FILE), 'r', encoding='utf-8') as f:
+            shards.append((json.load(f), shard_dir))
+    if not shards:
+        raise ValueError("No shard outputs found to merge.")
+    shards.sort(key=lambda pair: pair[0]["shard"])
+    seen = [state["shard"] for state, _dir in shards]
+    if len(set(seen)) != len(seen):
+        raise ValueError(f"Shard outputs listed more than once: {seen}")
+    expected = max(state["shards"] for state, _dir in shards)
+    missing = sorted(set(range(expected)) - set(seen))
+    if missing:
+        print(f"[Error] Merging without shard(s) {missing}; the case result is incomplete.")
+
+    os.makedirs(case_dir, exist_ok=True)
+    outputs = {}
+
+    summary = CorpusSummary()
+    stats = {}
+    for state, _dir in shards:
+        summary.merge(CorpusSummary.from_state(state["summary"]))
+        for key, value in state["stats"].items():
+            stats[key] = stats.get(key, 0) + value
+
+    # Correlation indexes are rebuilt from all shards' entries in path order,
+    # so matches across shard boundaries are found
+    geo = GeoIndex()
+    points = [point for state, _dir in shards for point in state["geo"]]
+    for lat, lon, path, camera, timestamp in sorted(points, key=lambda p: (p[2], p[0], p[1])):
+        geo.add_point(lat, lon, path, camera, timestamp)
+    if len(geo):
+        outputs["geo"] = geo.write_report(case_dir)
+    dupes = DuplicateIndex(dupe_radius)
+    found = {}  # path -> near-duplicate anomalies for its record
+    entries = [entry for state, _dir in shards for entry in state["dupes"]]
+    for value, path, fields in sorted(entries, key=lambda e: (e[1], e[0])):
+        anomalies = dupes.add_entry(value, path, fields)
+        if anomalies:
+            found[path] = anomalies
+    if dupes.tree.size:
+        outputs["duplicates"] = dupes.write_report(case_dir)
+
+    # Records: every shard file is already in path order; near-duplicate
+    # findings are attached as the batch scan does
+    outputs["records"] = os.path.join(case_dir, RECORDS_FILE)
+    sources = [_keyed_lines(os.path.join(d, RECORDS_FILE)) for _state, d in shards]
+    with open(outputs["records"], 'wb') as out:
+        for _path, line in heapq.merge(*sources):
+            if found:
+                line = _attach_duplicates(line, found, summary)
+            out.write(line)
+    outputs["summary"] = summary.write_report(case_dir)
+
+    outputs["timeline"] = merge_timelines([os.path.join(d, TIMELINE_FILE) for _state, d in shards],
+                                          os.path.join(case_dir, TIMELINE_FILE))
+
+    index = SnapshotIndex(os.path.join(case_dir, INDEX_FILE))
+    for _state, d in shards:
+        index.entries.update(SnapshotIndex(os.path.join(d, INDEX_FILE)).entries)
+    index.entries = dict(sorted(index.entries.items()))
+    index.save()
+    outputs["watch_index"] = index.index_path
+
+    outputs["case"] = os.path.join(case_dir, "case.json")
+    with open(outputs["case"], 'w', encoding='utf-8') as f:
+        json.dump({"shards": seen, "missing_shards": missing, "stats": stats,
+                   "outputs": outputs}, f, ensure_ascii=False, indent=2)
+    return outputs
+
+def _walk(roots):
+    # Sorted [(path, size, mtime_ns)] for every file under roots
+    found = []
+    pending = []
+    for root in roots:
+        if os.path.isdir(root):
+            pending.append(root)
+        elif os.path.isfile(root):
+            st = os.stat(root)
+            found.append((root, st.st_size, st.st_mtime_ns))
+    while pending:
+        folder = pending.pop()
+        try:
+            with os.scandir(folder) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.is_file():
+                        st = entry.stat()
+                        found.append((entry.path, st.st_size, st.st_mtime_ns))
+        except OSError as e:
+            print(f"[Error] Could not list {folder}: {e}")
+    found.sort()
+    return found
+
+def _shard_dirs(paths):
+    # Accepts shard output dirs or a folder holding them (e.g. the plan dir)
+    dirs = []
+    for path in paths:
+        if os.path.isfile(os.path.join(path, STATE_FILE)):
+            dirs.append(path)
+        elif os.path.isdir(path):
+            dirs.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                        if os.path.isfile(os.path.join(path, name, STATE_FILE)))
+    return dirs
+
+def _attach_duplicates(line, found, summary):
+    # Adds found[path] to the record (or its children) in one records line
+    record = json.loads(line)
+    changed = False
+    for item in [record] + record.get("children", []):
+        anomalies = found.pop(item.get("path", ""), None)
+        if not anomalies:
+            continue
+        old_score = item.get("risk_score", 0)
+        item["anomalies"] = list(item.get("anomalies") or []) + anomalies
+        item["risk_score"] = calculate_risk_score(item["anomalies"])
+        summary.amend(item.get("file_type", "unknown"), old_score, item["risk_score"], anomalies)
+        changed = True
+    if not changed:
+        return line
+    return (json.dumps(record, ensure_ascii=False, default=str) + "\n").encode('utf-8')
+
+def _keyed_lines(path):
+    with open(path, 'rb') as f:
+        for line in f:
+            yield json.loads(line).get("path", ""), line
@@ -0,0 +1,112 @@
+import os
+import json
+from collections import deque
+from functools import lru_cache
+
+# Signature table: {"label", "match": [terms, all required], "scope": [...]}.
+# Earlier entries win when several signatures match the same string.
+# The shipped table names products only; versioned or OS-build entries can be
+# added ahead of them without code changes.
+SIGNATURES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "software_signatures.json")
+SCOPES = ("image", "pdf")
+
+class Matcher:
+    """
+    Aho-Corasick automaton over the lower-cased terms of a signature list.
+
+    identify() walks the text once, collecting every term that occurs, then
+    only checks the signatures that contain one of those terms. Lookup cost
+    depends on the text length and the hits, not on the table size.
+    """
+
+    def __init__(self, signatures):
+        self.labels = []
+        self.required = []       # Signature index -> frozenset of term ids
+        self.by_term = {}        # Term id -> [signature indexes]
+        term_ids = {}
+        for signature in signatures:
+            terms = {term.lower() for term in signature["match"] if term}
+            if not terms:
+                continue
+            index = len(self.labels)
+            self.labels.append(signature["label"])
+            ids = frozenset(term_ids.setdefault(term, len(term_ids)) for term in terms)
+            self.required.append(ids)
+            for term_id in ids:
+                self.by_term.setdefault(term_id, []).append(index)
+        self._build(term_ids)
+
+    def _build(self, term_ids):
+        # goto[state] maps a character to the next state; out[state] holds
+        # the term ids ending there (including those reached via fail links)
+        self.goto = [{}]
+        self.out = [()]
+        for term, term_id in term_ids.items():
+            state = 0
+            for ch in term:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto.append({})
+                    self.out.append(())
+                    self.goto[state][ch] = nxt
+                state = nxt
+            self.out[state] += (term_id,)
+
+        self.fail = [0] * len(self.goto)
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                back = self.fail[state]
+                while back and ch not in self.goto[back]:
+                    back = self.fail[back]
+                target = self.goto[back].get(ch, 0)
+                self.fail[nxt] = target if target != nxt else 0
+                self.out[nxt] += self.out[self.fail[nxt]]
+
+    def terms_in(self, text):
+        found = set()
+        goto, fail, out = self.goto, self.fail, self.out
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+    def identify(self, text):
+        # Label of the highest-priority signature whose terms all occur, or None
+        found = self.terms_in(text.lower())
+        best = None
+        for term_id in found:
+            for index in self.by_term[term_id]:
+                if (best is None or index < best) and self.required[index] <= found:
+                    best = index
+                    break  # by_term lists are in priority order
+        return None if best is None else self.labels[best]
+
+@lru_cache(maxsize=None)
+def load_signatures(path=SIGNATURES_PATH):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return tuple(json.load(f)["signatures"])
+    except (OSError, ValueError, KeyError) as e:
+        print(f"[Error] Could not load software signatures: {e}")
+        return ()
+
+@lru_cache(maxsize=None)
+def matcher(scope):
+    # One compiled automaton per scope, built on first use and kept
+    signatures = [s for s in load_signatures() if scope in s.get("scope", ()) or "any" in s.get("scope", ())]
+    return Matcher(signatures)
+
+@lru_cache(maxsize=4096)
+def identify(text, scope="image"):
+    """Friendly product name for a software/creator/producer string, or None."""
+    if not text or not isinstance(text, str):
+        return None
+    return matcher(scope).identify(text)
@@ -0,0 +1,208 @@
+import os
+import re
+import csv
+import json
+import heapq
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+from modules.anomaly_checker import extract_datetime
+
+# Metadata fields that become timeline events
+TIMESTAMP_FIELDS = (
+    "created", "modified", "last_printed",
+    "datetime", "datetime_digitized",
+    "xmp_create", "xmp_modify",
+)
+EVENT_COLUMNS = ("timestamp", "path", "file_type", "field", "raw")
+# PDF date: D:YYYY[MM[DD[HH[mm[SS]]]]][O[HH['mm']]] with O one of + - Z
+PDF_DATE = re.compile(r"D:(\d{4})(\d\d)?(\d\d)?(\d\d)?(\d\d)?(\d\d)?(?:([+\-Z])(?:(\d\d)'?(?:(\d\d)'?)?)?)?")
+
+class TimelineBuilder:
+    """
+    Builds one sorted case timeline from scan records.
+
+    Events are buffered up to `run_size`; each full buffer is sorted and
+    spilled to a temporary run file. finish() k-way merges the runs with
+    heapq.merge, so the corpus never has to fit in memory.
+    """
+
+    def __init__(self, run_size=200_000, tmp_dir=None):
+        self.run_size = run_size
+        self.tmp_dir = tmp_dir
+        self.buffer = []
+        self.runs = []
+        self.events = 0
+
+    def add_record(self, record):
+        metadata = record.get("metadata") or {}
+        for field in TIMESTAMP_FIELDS:
+            raw = metadata.get(field)
+            if not isinstance(raw, str) or raw in ("", "Unknown"):
+                continue
+            stamp = normalize_timestamp(raw)
+            if stamp is None:
+                continue
+            self.buffer.append((stamp, record.get("path", ""), record.get("file_type", "unknown"), field, raw))
+            self.events += 1
+        if len(self.buffer) >= self.run_size:
+            self._spill()
+
+    def finish(self, out_path, fmt=None):
+        # Merge everything into out_path; format from the extension unless given
+        fmt = fmt or _format_for(out_path)
+        self.buffer.sort()
+        sources = [_read_run(path) for path in self.runs]
+        sources.append(iter(self.buffer))
+        os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+        try:
+            with open(out_path, 'w', encoding='utf-8', newline='') as out:
+                writer = _event_writer(out, fmt)
+                for event in heapq.merge(*sources):
+                    writer(event)
+        finally:
+            for source in sources:
+                close = getattr(source, "close", None)
+                if close:
+                    close()
+            for path in self.runs:
+                os.remove(path)
+            self.runs = []
+            self.buffer = []
+        return out_path
+
+    def _spill(self):
+        self.buffer.sort()
+        fd, path = tempfile.mkstemp(prefix="timeline_run_", suffix=".jsonl", dir=self.tmp_dir)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            for event in self.buffer:
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+        self.runs.append(path)
+        self.buffer = []
+
+def merge_timelines(paths, out_path, fmt=None):
+    # k-way merge of finished (sorted) timeline files into one
+    fmt = fmt or _format_for(out_path)
+    sources = [(tuple(event[c] for c in EVENT_COLUMNS) for event in query_range(path)) for path in paths]
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    with open(out_path, 'w', encoding='utf-8', newline='') as out:
+        writer = _event_writer(out, fmt)
+        for event in heapq.merge(*sources):
+            writer(event)
+    return out_path
+
+def normalize_timestamp(raw):
+    # Sortable "YYYY-MM-DDTHH:MM:SS" string, or None if unparseable. Values
+    # with a zone offset are converted to UTC; values without one are kept
+    # as recorded, since their zone is unknown.
+    raw = raw.strip()
+    dt = _pdf_datetime(raw) if raw.startswith("D:") else None
+    if dt is None:
+        dt = extract_datetime(raw)
+    if dt is None:
+        try:
+            dt = datetime.fromisoformat(raw.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc)
+    return dt.strftime("%Y-%m-%dT%H:%M:%S")
+
+def _pdf_datetime(raw):
+    match = PDF_DATE.match(raw)
+    if not match:
+        return None
+    year, month, day, hour, minute, second, sign, off_h, off_m = match.groups()
+    try:
+        dt = datetime(int(year), int(month or 1), int(day or 1),
+                      int(hour or 0), int(minute or 0), int(second or 0))
+    except ValueError:
+        return None
+    if sign == "Z":
+        return dt.replace(tzinfo=timezone.utc)
+    if sign and off_h:
+        offset = timedelta(hours=int(off_h), minutes=int(off_m or 0))
+        try:
+            return dt.replace(tzinfo=timezone(-offset if sign == "-" else offset))
+        except ValueError:  # Offset of a day or more
+            return None
+    return dt
+
+def query_range(timeline_path, start=None, end=None):
+    """
+    Yield events with start <= timestamp <= end from a finished timeline.
+
+    Binary-searches the sorted file by byte offset for the first event, then
+    reads forward until past `end`, so a narrow window costs O(log n) seeks.
+    """
+    fmt = _format_for(timeline_path)
+    start = normalize_timestamp(start) if start else None
+    end = normalize_timestamp(end) if end else None
+    with open(timeline_path, 'rb') as f:
+        offset = _first_offset_at_or_after(f, fmt, start) if start else _data_start(f, fmt)
+        f.seek(offset)
+        for line in f:
+            event = _parse_line(line, fmt)
+            if event is None:
+                continue
+            if end and event["timestamp"] > end:
+                break
+            yield event
+
+def _first_offset_at_or_after(f, fmt, start):
+    # Smallest position whose next line has timestamp >= start (or EOF)
+    data_start = _data_start(f, fmt)
+    lo, hi = data_start, f.seek(0, os.SEEK_END)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        _line_start, event = _line_at(f, mid, data_start, fmt)
+        if event is None or event["timestamp"] >= start:
+            hi = mid
+        else:
+            lo = mid + 1
+    return _line_at(f, lo, data_start, fmt)[0]
+
+def _line_at(f, pos, data_start, fmt):
+    # First full line starting at or after pos: (offset, event or None at EOF)
+    if pos <= data_start:
+        f.seek(data_start)
+    else:
+        f.seek(pos - 1)
+        f.readline()  # Lands on pos itself if pos - 1 was a newline
+    line_start = f.tell()
+    line = f.readline()
+    if not line:
+        return line_start, None
+    return line_start, _parse_line(line, fmt)
+
+def _data_start(f, fmt):
+    f.seek(0)
+    if fmt == "csv":
+        f.readline()  # Header row
+    return f.tell()
+
+def _parse_line(line, fmt):
+    text = line.decode('utf-8').rstrip("\r\n")
+    if not text:
+        return None
+    if fmt == "csv":
+        values = next(csv.reader([text]))
+        return dict(zip(EVENT_COLUMNS, values))
+    return json.loads(text)
+
+def _event_writer(out, fmt):
+    if fmt == "csv":
+        writer = csv.writer(out, lineterminator="\n")
+        writer.writerow(EVENT_COLUMNS)
+        return writer.writerow
+    def write_jsonl(event):
+        out.write(json.dumps(dict(zip(EVENT_COLUMNS, event)), ensure_ascii=False) + "\n")
+    return write_jsonl
+
+def _read_run(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            yield tuple(json.loads(line))
+
+def _format_for(path):
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
@@ -0,0 +1,283 @@
+import os
+import json
+import time
+import struct
+import select
+
+from modules import governor
+from modules.pipeline import scan_paths
+
+class SnapshotIndex:
+    """
+    Persistent (path -> [size, mtime_ns]) index of files already scanned.
+    """
+
+    def __init__(self, index_path=None):
+        self.index_path = index_path
+        self.entries = {}
+        self.dirty = False  # Entries changed since the last save
+        if index_path and os.path.exists(index_path):
+            try:
+                with open(index_path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except Exception as e:
+                print(f"[Error] Could not load watch index, starting fresh: {e}")
+
+    def is_changed(self, path, size, mtime_ns):
+        return self.entries.get(path) != [size, mtime_ns]
+
+    def update(self, path, size, mtime_ns):
+        if self.entries.get(path) != [size, mtime_ns]:
+            self.entries[path] = [size, mtime_ns]
+            self.dirty = True
+
+    def forget(self, path):
+        # A path not in the index may be a removed folder: drop what was under it
+        if self.entries.pop(path, None) is not None:
+            self.dirty = True
+            return
+        prefix = os.path.join(path, "")
+        for stale in [p for p in self.entries if p.startswith(prefix)]:
+            del self.entries[stale]
+            self.dirty = True
+
+    def save(self):
+        # Rewrites the file only when something changed since the last save
+        if not self.index_path or not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+        tmp = self.index_path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f)
+        os.replace(tmp, self.index_path)  # Atomic swap so a crash never leaves half an index
+        self.dirty = False
+
+class FolderWatcher:
+    """
+    Processes only new or changed files in one or more drop folders.
+
+    Uses inotify on Linux to learn which files changed; elsewhere (or if
+    inotify is unavailable) it falls back to polling with os.scandir. One
+    GovernedPool is kept warm for the watcher's lifetime.
+    """
+
+    def __init__(self, roots, on_result, index_path=None, interval=2.0, use_inotify=True, **pipeline_options):
+        self.roots = [os.path.abspath(r) for r in roots]
+        self.on_result = on_result
+        self.interval = interval
+        self.index = SnapshotIndex(index_path)
+        self.pipeline_options = pipeline_options
+        self.inotify = _Inotify.create(self.roots) if use_inotify else None
+        self.pool = None  # Started on the first cycle with changes
+
+    def run(self, cycles=None):
+        # First cycle always does a full pass to catch files dropped while we were down
+        candidates = None
+        done = 0
+        try:
+            while cycles is None or done < cycles:
+                self.run_cycle(candidates)
+                done += 1
+                if cycles is not None and done >= cycles:
+                    break
+                candidates = self._wait_for_changes()
+        except KeyboardInterrupt:
+            print("\nWatch stopped.")
+        finally:
+            self.close()
+
+    def close(self):
+        if self.pool:
+            self.pool.close()
+            self.pool = None
+        if self.inotify:
+            self.inotify.close()
+            self.inotify = None
+
+    def run_cycle(self, candidates=None):
+        # candidates=None means rescan everything under the roots
+        changed = []
+        if candidates is None:
+            stats = _walk_stats(self.roots)
+            prefixes = tuple(os.path.join(root, "") for root in self.roots)
+            for path in [p for p in self.index.entries if p.startswith(prefixes) and p not in stats]:
+                self.index.forget(path)  # Removed while we were down or events were lost
+        else:
+            stats = _stat_paths(candidates)
+            for path in candidates:
+                if path not in stats and not os.path.isdir(path):
+                    self.index.forget(path)  # Deleted or moved away
+        for path, (size, mtime_ns) in stats.items():
+            if self.index.is_changed(path, size, mtime_ns):
+                changed.append(path)
+
+        if changed:
+            pending = set(changed)
+
+            def on_result(record):
+                # Indexed only once handled, so a crash mid-cycle rescans the file
+                self.on_result(record)
+                path = record.get("path")
+                if path in pending:
+                    pending.discard(path)
+                    self.index.update(path, *stats[path])
+
+            scan_paths(sorted(changed), on_result, pool=self._pool(), **self.pipeline_options)
+            for path in pending:
+                self.index.update(path, *stats[path])  # Skipped types: no record, done all the same
+        self.index.save()
+        return changed
+
+    def _pool(self):
+        if self.pool is None:
+            options = self.pipeline_options
+            self.pool = governor.GovernedPool(options.get("workers"),
+                                              options.get("timeout", governor.DEFAULT_TIMEOUT),
+                                              options.get("max_rss_mb", governor.DEFAULT_MAX_RSS_MB),
+                                              options.get("extract_options"))
+        return self.pool
+
+    def _wait_for_changes(self):
+        # Changed paths, or None when everything must be rescanned
+        if self.inotify:
+            return self.inotify.wait(self.interval)
+        time.sleep(self.interval)
+        return None
+
+def _walk_stats(roots):
+    stats = {}
+    pending = list(roots)
+    while pending:
+        folder = pending.pop()
+        try:
+            with os.scandir(folder) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.is_file():
+                        st = entry.stat()
+                        stats[entry.path] = (st.st_size, st.st_mtime_ns)
+        except OSError as e:
+            print(f"[Error] Could not list {folder}: {e}")
+    return stats
+
+def _stat_paths(paths):
+    stats = {}
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        if os.path.isdir(path):
+            stats.update(_walk_stats([path]))  # New folder dropped in
+        else:
+            stats[path] = (st.st_size, st.st_mtime_ns)
+    return stats
+
+# inotify constants from <sys/inotify.h>
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO    = 0x00000080
+_IN_CREATE      = 0x00000100
+_IN_DELETE      = 0x00000200
+_IN_MOVED_FROM  = 0x00000040
+_IN_Q_OVERFLOW  = 0x00004000
+_IN_ISDIR       = 0x40000000
+_IN_NONBLOCK    = 0o4000
+_WATCH_MASK = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE | _IN_MOVED_FROM
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+class _Inotify:
+    """Minimal ctypes inotify wrapper that reports changed paths."""
+
+    def __init__(self, libc, fd, roots):
+        self.libc = libc
+        self.fd = fd
+        self.dirs = {}  # watch descriptor -> directory
+        for root in roots:
+            for folder in _walk_dirs(root):
+                self._add_watch(folder)
+
+    @classmethod
+    def create(cls, roots):
+        try:
+            import ctypes
+            libc = ctypes.CDLL(None, use_errno=True)
+            fd = libc.inotify_init1(_IN_NONBLOCK)
+        except (OSError, AttributeError):
+            return None  # Not Linux / no inotify: caller polls instead
+        if fd < 0:
+            return None
+        return cls(libc, fd, roots)
+
+    def _add_watch(self, folder):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(folder), _WATCH_MASK)
+        if wd >= 0:
+            self.dirs[wd] = folder
+
+    def wait(self, timeout):
+        # Block until events arrive, then collect a short burst of them.
+        # Returns None if the kernel queue overflowed and events were lost.
+        changed = set()
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        while ready:
+            try:
+                buf = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not self._parse_events(buf, changed):
+                self._drain()
+                return None
+            ready, _, _ = select.select([self.fd], [], [], 0.2)  # Debounce bursts
+        return changed
+
+    def _parse_events(self, buf, changed):
+        # Adds changed paths from one read; False on a queue overflow
+        pos = 0
+        while pos + _EVENT_HEADER.size <= len(buf):
+            wd, mask, _cookie, name_len = _EVENT_HEADER.unpack_from(buf, pos)
+            name = buf[pos + _EVENT_HEADER.size:pos + _EVENT_HEADER.size + name_len].rstrip(b'\x00')
+            pos += _EVENT_HEADER.size + name_len
+            if mask & _IN_Q_OVERFLOW:
+                return False
+            folder = self.dirs.get(wd)
+            if folder is None or not name:
+                continue
+            path = os.path.join(folder, os.fsdecode(name))
+            if mask & _IN_ISDIR:
+                if mask & (_IN_CREATE | _IN_MOVED_TO):
+                    for sub in _walk_dirs(path):
+                        self._add_watch(sub)
+                elif mask & _IN_MOVED_FROM:
+                    self._remove_watches(path)  # Its watches would report the old paths
+                changed.add(path)  # Gone folders: the caller drops their files
+                continue
+            # Plain creates are followed by CLOSE_WRITE once the writer is done
+            if mask & _IN_CREATE:
+                continue
+            changed.add(path)
+        return True
+
+    def _remove_watches(self, folder):
+        prefix = os.path.join(folder, "")
+        for wd, path in list(self.dirs.items()):
+            if path == folder or path.startswith(prefix):
+                self.libc.inotify_rm_watch(self.fd, wd)
+                del self.dirs[wd]
+
+    def _drain(self):
+        # Drop queued events; a full rescan follows
+        while select.select([self.fd], [], [], 0)[0]:
+            try:
+                os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+
+    def close(self):
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+
+def _walk_dirs(root):
+    for folder, _dirs, _files in os.walk(root):
+        yield folder
@@ -0,0 +1,317 @@
+import hashlib
+from collections import OrderedDict
+import xml.etree.ElementTree as ET
+
+# Packets bigger than this are not parsed
+MAX_PACKET_BYTES = 4 * 1024 * 1024
+# Longest property value kept (characters)
+MAX_VALUE_CHARS = 4096
+# Values (properties, array items, struct fields) kept per packet; real
+# packets have a few hundred, long edit histories a few thousand
+MAX_VALUES = 5000
+# History events listed in the xmp_history field
+MAX_HISTORY_EVENTS = 50
+# Parsed packets kept per process, keyed by SHA-1 of the packet bytes
+CACHE_SIZE = 256
+# Bytes handed to the parser per feed
+FEED_BLOCK = 64 * 1024
+
+# Standard namespaces and the prefixes properties are reported under,
+# whatever prefix a packet happens to declare
+NAMESPACES = {
+    "adobe:ns:meta/": "x",
+    "http://www.w3.org/1999/02/22-rdf-syntax-ns#": "rdf",
+    "http://www.w3.org/XML/1998/namespace": "xml",
+    "http://ns.adobe.com/xap/1.0/": "xmp",
+    "http://ns.adobe.com/xap/1.0/mm/": "xmpMM",
+    "http://ns.adobe.com/xap/1.0/rights/": "xmpRights",
+    "http://ns.adobe.com/xap/1.0/sType/ResourceEvent#": "stEvt",
+    "http://ns.adobe.com/xap/1.0/sType/ResourceRef#": "stRef",
+    "http://purl.org/dc/elements/1.1/": "dc",
+    "http://ns.adobe.com/pdf/1.3/": "pdf",
+    "http://ns.adobe.com/pdfx/1.3/": "pdfx",
+    "http://ns.adobe.com/photoshop/1.0/": "photoshop",
+    "http://ns.adobe.com/exif/1.0/": "exif",
+    "http://ns.adobe.com/exif/1.0/aux/": "aux",
+    "http://cipa.jp/exif/1.0/": "exifEX",
+    "http://ns.adobe.com/tiff/1.0/": "tiff",
+    "http://ns.adobe.com/camera-raw-settings/1.0/": "crs",
+    "http://ns.adobe.com/xmp/1.0/DynamicMedia/": "xmpDM",
+}
+# The packet is parsed inside this element, so packets that use a standard
+# prefix without declaring it (common in hand-rolled writers) still parse
+_WRAPPER_START = ("<xmp-packet " + " ".join(
+    f'xmlns:{prefix}="{uri}"' for uri, prefix in NAMESPACES.items() if prefix != "xml") + ">").encode('utf-8')
+_WRAPPER_END = b"</xmp-packet>"
+
+_RDF = "{http://www.w3.org/1999/02/22-rdf-syntax-ns#}"
+_XML_LANG = "{http://www.w3.org/XML/1998/namespace}lang"
+_ARRAYS = (_RDF + "Seq", _RDF + "Bag", _RDF + "Alt")
+# Elements that only group properties
+_CONTAINERS = ("{adobe:ns:meta/}xmpmeta", "{adobe:ns:meta/}xapmeta", _RDF + "RDF", "xmp-packet")
+
+_cache = OrderedDict()
+
+def find_packet(data):
+    # Slice holding the x:xmpmeta (or bare rdf:RDF) element, or None
+    for open_tag, close_tag in ((b"<x:xmpmeta", b"</x:xmpmeta>"), (b"<x:xapmeta", b"</x:xapmeta>"),
+                                (b"<rdf:RDF", b"</rdf:RDF>")):
+        start = data.find(open_tag)
+        if start == -1:
+            continue
+        end = data.find(close_tag, start)
+        if end != -1:
+            return data[start:end + len(close_tag)]
+    return None
+
+def parse(packet):
+    """
+    Property map of an XMP packet (bytes or str), e.g.
+        {"xmp:CreateDate": "...", "dc:creator": ["J. Smith"],
+         "xmpMM:History": [{"stEvt:action": "saved", ...}, ...]}
+    Arrays become lists (rdf:Alt gives its x-default item), structures
+    become dicts. Unchanged packets come from a per-process cache, so the
+    result must be treated as read-only. Returns None when there is nothing
+    to parse.
+    """
+    if isinstance(packet, str):
+        packet = packet.encode('utf-8')
+    packet = bytes(packet)
+    if not packet or len(packet) > MAX_PACKET_BYTES:
+        return None
+    key = hashlib.sha1(packet).digest()
+    cached = _cache.get(key)
+    if cached is not None:
+        _cache.move_to_end(key)
+        return cached
+    properties = _parse_packet(packet)
+    _cache[key] = properties
+    if len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    return properties
+
+def summary(properties):
+    # The xmp_* fields the extractors report, "Unknown" where absent
+    properties = properties or {}
+    fields = {
+        "xmp_create": _first(properties, "xmp:CreateDate", "xmpMM:CreateDate", "pdfx:CreateDate"),
+        "xmp_modify": _first(properties, "xmp:ModifyDate", "xmpMM:ModifyDate", "pdfx:ModifyDate",
+                             "xmp:MetadataDate"),
+        "xmp_creator_tool": _first(properties, "xmp:CreatorTool", "xmpMM:CreatorTool", "pdfx:CreatorTool"),
+        "xmp_document_id": _first(properties, "xmpMM:DocumentID"),
+        "xmp_instance_id": _first(properties, "xmpMM:InstanceID"),
+        "xmp_history": "Unknown",
+    }
+    events = edit_history(properties)
+    if events:
+        lines = [_describe_event(event) for event in events[:MAX_HISTORY_EVENTS]]
+        if len(events) > MAX_HISTORY_EVENTS:
+            lines.append(f"... {len(events) - MAX_HISTORY_EVENTS} more")
+        fields["xmp_history"] = lines
+    return fields
+
+def edit_history(properties):
+    # xmpMM:History as [{"action", "when", "software_agent", "changed", ...}]
+    events = []
+    history = (properties or {}).get("xmpMM:History")
+    if not isinstance(history, list):
+        return events
+    for item in history:
+        if not isinstance(item, dict):
+            continue
+        event = {}
+        for name, value in item.items():
+            local = name.split(":", 1)[-1]
+            key = {"softwareAgent": "software_agent", "instanceID": "instance_id"}.get(local, local)
+            event[key] = value if isinstance(value, str) else str(value)
+        events.append(event)
+    return events
+
+def text_value(properties, name):
+    # Single string for a property (lists joined with "; "), or "Unknown"
+    value = (properties or {}).get(name)
+    if isinstance(value, list):
+        value = "; ".join(v for v in value if isinstance(v, str) and v)
+    return value if isinstance(value, str) and value else "Unknown"
+
+class _Frame:
+    # One open element: what it is and where its value goes
+    __slots__ = ("kind", "name", "target", "value", "alt", "elem")
+
+    def __init__(self, kind, name=None, target=None, value=None):
+        self.kind = kind        # "container", "desc", "prop", "array", "item" or "skip"
+        self.name = name
+        self.target = target    # Dict properties are written to (desc) or into (prop)
+        self.value = value      # Struct dict or array list once known
+        self.alt = False
+        self.elem = None
+
+class _Full(Exception):
+    pass
+
+class _Reader:
+    """
+    Turns pull-parser events into the property map, keeping only a stack of
+    open elements: finished elements are detached from their parent, so
+    memory follows nesting depth and the number of values kept, not the
+    packet size.
+    """
+
+    def __init__(self):
+        self.properties = {}
+        self.prefixes = dict(NAMESPACES)
+        self.stack = [_Frame("container", target=self.properties)]
+        self.values = 0
+
+    def handle_events(self, parser):
+        stack = self.stack
+        for event, item in parser.read_events():
+            if event == "start-ns":
+                prefix, uri = item
+                self.prefixes.setdefault(uri, prefix or "ns")
+            elif event == "start":
+                frame = self.open(item, stack[-1])
+                frame.elem = item
+                stack.append(frame)
+            else:
+                self.close(item, stack.pop(), stack[-1])
+                item.clear()
+                if stack[-1].elem is not None:
+                    del stack[-1].elem[:]  # Detach finished children
+
+    def count(self, n=1):
+        self.values += n
+        if self.values > MAX_VALUES:
+            raise _Full()
+
+    def open(self, elem, parent):
+        tag = elem.tag
+        if tag in _CONTAINERS:
+            return _Frame("container", target=parent.target if parent.kind == "container" else None)
+
+        if tag == _RDF + "Description":
+            if parent.kind == "container" and parent.target is not None:
+                target = parent.target
+            elif parent.kind in ("prop", "item"):
+                if not isinstance(parent.value, dict):
+                    parent.value = {}
+                target = parent.value
+            else:
+                return _Frame("skip")
+            self.assign_attributes(elem, target)
+            return _Frame("desc", target=target)
+
+        if tag in _ARRAYS:
+            if parent.kind not in ("prop", "item"):
+                return _Frame("skip")
+            parent.value = []
+            parent.alt = tag == _RDF + "Alt"
+            return _Frame("array", value=parent.value)
+
+        if tag == _RDF + "li":
+            if parent.kind != "array":
+                return _Frame("skip")
+            frame = _Frame("item", name=elem.get(_XML_LANG))
+            self.struct_from_attributes(elem, frame)
+            return frame
+
+        # A property element: in a description, a struct, or (leniently)
+        # directly inside x:xmpmeta as some writers do
+        if parent.kind in ("desc", "container") and parent.target is not None:
+            target = parent.target
+        elif parent.kind in ("prop", "item") and isinstance(parent.value, dict):
+            target = parent.value
+        else:
+            return _Frame("skip")
+        frame = _Frame("prop", name=_qname(tag, self.prefixes), target=target)
+        resource = elem.get(_RDF + "resource")
+        if resource is not None:
+            frame.value = resource[:MAX_VALUE_CHARS]
+        else:
+            self.struct_from_attributes(elem, frame)
+        return frame
+
+    def close(self, elem, frame, parent):
+        if frame.kind == "prop":
+            self.count()
+            frame.target[frame.name] = _frame_value(elem, frame)
+        elif frame.kind == "item" and parent.kind == "array":
+            self.count()
+            parent.value.append((frame.name, _frame_value(elem, frame)))
+
+    def struct_from_attributes(self, elem, frame):
+        # rdf:parseType="Resource" or property attributes make the element a struct
+        if elem.get(_RDF + "parseType") == "Resource":
+            frame.value = {}
+        fields = {}
+        self.assign_attributes(elem, fields)
+        if fields:
+            if not isinstance(frame.value, dict):
+                frame.value = {}
+            frame.value.update(fields)
+
+    def assign_attributes(self, elem, target):
+        for name, value in elem.attrib.items():
+            if name.startswith(_RDF) or name == _XML_LANG or not name.startswith("{"):
+                continue  # RDF syntax, language tags and unqualified attributes
+            self.count()
+            target[_qname(name, self.prefixes)] = value.strip()[:MAX_VALUE_CHARS]
+
+def _parse_packet(packet):
+    # One pass over pull-parser events, fed in blocks
+    if b"<!DOCTYPE" in packet or b"<!ENTITY" in packet:
+        return None  # XMP has no DTDs; refuse entity tricks
+    body = packet.lstrip(b"\xef\xbb\xbf \t\r\n")
+    if body.startswith(b"<?xml"):
+        body = body[body.find(b"?>") + 2:]  # A declaration is not allowed inside the wrapper
+    reader = _Reader()
+    parser = ET.XMLPullParser(events=("start-ns", "start", "end"))
+    try:
+        parser.feed(_WRAPPER_START)
+        for pos in range(0, len(body), FEED_BLOCK):
+            parser.feed(body[pos:pos + FEED_BLOCK])
+            reader.handle_events(parser)
+        parser.feed(_WRAPPER_END)
+        parser.close()
+        reader.handle_events(parser)
+    except ET.ParseError:
+        pass  # Malformed or truncated: keep what was complete
+    except _Full:
+        pass  # Value cap reached: keep what was read
+    return reader.properties
+
+def _frame_value(elem, frame):
+    value = frame.value
+    if value is None:
+        return (elem.text or "").strip()[:MAX_VALUE_CHARS]
+    if isinstance(value, list):
+        # Items were collected as (xml:lang, value) pairs
+        if frame.alt:
+            for lang, item in value:
+                if lang == "x-default":
+                    return item
+            return value[0][1] if value else ""
+        return [item for _lang, item in value]
+    return value
+
+def _qname(name, prefixes):
+    # "{uri}Local" -> "prefix:Local"
+    if not name.startswith("{"):
+        return name
+    uri, local = name[1:].split("}", 1)
+    return f"{prefixes.get(uri, 'ns')}:{local}"
+
+def _first(properties, *names):
+    for name in names:
+        value = text_value(properties, name)
+        if value != "Unknown":
+            return value
+    return "Unknown"
+
+def _describe_event(event):
+    line = f"{event.get('when', '?')} {event.get('action', '?')}"
+    if event.get("software_agent"):
+        line += f" ({event['software_agent']})"
+    if event.get("changed"):
+        line += f" [{event['changed']}]"
+    return line
@@ -0,0 +1,63 @@
+"""
+Memory held per stored scan record, as plain dicts vs CompactRecords.
+
+Records are built from the parser seeds (jpg/png/pdf/docx, the PDF and
+DOCX with embedded image children) and pickled/unpickled one by one, the
+way results arrive from the worker processes, so no strings are shared
+between records unless interning shares them.
+
+    python tests/measure_records.py [count]
+"""
+import os
+import sys
+import pickle
+import tracemalloc
+
+# Project root (parent of this file's dir)
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+for path in (PROJECT_ROOT, TESTS_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)  # Ensure local modules and seeds import
+
+from modules.pipeline import scan_bytes
+from modules.records import compact_record
+from test_fuzz_parsers import jpeg_seed, png_seed, pdf_seed, docx_seed
+
+SEEDS = (("jpg", jpeg_seed), ("png", png_seed), ("pdf", pdf_seed), ("docx", docx_seed))
+
+def worker_results(count):
+    # Pickled records with distinct paths, cycling through the file types
+    templates = [scan_bytes(f"case/seed.{file_type}", file_type, seed()) for file_type, seed in SEEDS]
+    for i in range(count):
+        record = templates[i % len(templates)]
+        path = f"/evidence/case_{i // 1000:03d}/file_{i:06d}.{record['file_type']}"
+        yield pickle.dumps(_renamed(record, path))
+
+def _renamed(record, path):
+    record = dict(record, path=path)
+    if "children" in record:
+        record["children"] = [dict(child, path=path + "#" + child["path"].split("#", 1)[1], parent=path)
+                              for child in record["children"]]
+    return record
+
+def measure(count, keep):
+    # Bytes allocated per record while `count` records are held
+    results = list(worker_results(count))
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    held = [keep(pickle.loads(data)) for data in results]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert len(held) == count
+    return (after - before) / count
+
+def main(count=20_000):
+    as_dict = measure(count, lambda record: record)
+    compact = measure(count, compact_record)
+    print(f"{count} records")
+    print(f"  dict records     {as_dict:,.0f} bytes/record")
+    print(f"  compact records  {compact:,.0f} bytes/record")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
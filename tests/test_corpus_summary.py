@@ -0,0 +1,52 @@
+import os
+import sys
+
+# Project root (parent of this file's dir)
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+for path in (PROJECT_ROOT, TESTS_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)  # Ensure local modules and seeds import
+
+from modules.corpus_summary import CorpusSummary, anomaly_category, MAX_EXAMPLES
+
+def png_record(i):
+    anomalies = [f"{i * 7} byte(s) of data after IEND ({i % 3} chunk(s)). Possible appended or hidden data.",
+                 f"Near-duplicate of 'shot_{i}.png' (distance {i % 5}) with different software. Possible re-saved or altered copy.",
+                 "Missing or empty field: author"]
+    return {"path": f"case/shot_{i}.png", "file_type": "png", "metadata": {},
+            "anomalies": anomalies, "risk_score": 60}
+
+def test_category_drops_per_file_details():
+    assert anomaly_category("12 byte(s) of data after IEND (1 chunk(s)). Possible appended or hidden data.") == \
+        "N byte(s) of data after IEND (N chunk(s)). Possible appended or hidden data."
+    assert anomaly_category("Near-duplicate of 'a.jpg' (distance 3) but datetime differs: '2021' vs '2022'.") == \
+        "Near-duplicate of '...' (...) but datetime differs: '...' vs '...'."
+    assert anomaly_category("Missing or empty field: author") == "Missing or empty field: author"
+
+def test_breakdown_is_keyed_on_category_with_examples():
+    summary = CorpusSummary(top_k=10)
+    for i in range(50):
+        summary.update(png_record(i))
+    breakdown = summary.anomalies_by_type["png"]
+    assert len(breakdown.counts) == 3  # Not one counter per file
+    assert all(count == 50 for _category, count, error in breakdown.top(3))
+    trailing = anomaly_category(png_record(0)["anomalies"][0])
+    assert len(breakdown.examples[trailing]) == MAX_EXAMPLES
+    assert "Missing or empty field: author" in breakdown.examples["Missing or empty field: author"]
+
+    report = summary.render()
+    assert "[50] N byte(s) of data after IEND (N chunk(s)). Possible appended or hidden data." in report
+    assert "e.g. 0 byte(s) of data after IEND (0 chunk(s))." in report
+    assert "e.g. Missing or empty field: author" not in report  # Same as its category
+
+def test_merged_summaries_match_one_summary():
+    single = CorpusSummary(top_k=10)
+    parts = [CorpusSummary(top_k=10) for _ in range(3)]
+    for i in range(60):
+        single.update(png_record(i))
+        parts[(i * 7) % 3].update(png_record(i))
+    merged = CorpusSummary(top_k=10)
+    for part in parts:
+        merged.merge(CorpusSummary.from_state(part.to_state()))
+    assert merged.render().splitlines()[2:] == single.render().splitlines()[2:]  # Past "Generated on"
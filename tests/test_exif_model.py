@@ -0,0 +1,132 @@
+import os
+import sys
+import struct
+
+# Project root (parent of this file's dir)
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+for path in (PROJECT_ROOT, TESTS_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)  # Ensure local modules and seeds import
+
+from modules import exif_model, metadata_jpg, metadata_png
+from modules.exif_model import read_exif
+from test_fuzz_parsers import jpeg_seed, png_seed, _tiff_exif
+
+def build_tiff(order, ifd0, exif=None):
+    """
+    TIFF with IFD0 (plus an EXIF IFD when given) in byte order '<' or '>'.
+    Entries are (tag, type, count, value bytes); values over 4 bytes are
+    placed after the directories.
+    """
+    def directory(entries, start, blobs_at):
+        out, blobs = struct.pack(order + "H", len(entries)), b""
+        for tag, typ, count, value in entries:
+            if len(value) <= 4:
+                field = value.ljust(4, b"\x00")
+            else:
+                field = struct.pack(order + "I", blobs_at + len(blobs))
+                blobs += value
+            out += struct.pack(order + "HHI", tag, typ, count) + field
+        return out + struct.pack(order + "I", 0), blobs
+
+    ifd0 = list(ifd0)
+    if exif is not None:
+        ifd0.append((0x8769, 4, 1, b"\x00" * 4))  # Patched below
+    ifd0_size = 2 + 12 * len(ifd0) + 4
+    exif_at = 8 + ifd0_size
+    exif_size = 2 + 12 * len(exif or ()) + 4 if exif is not None else 0
+    blobs_at = exif_at + exif_size
+    if exif is not None:
+        ifd0[-1] = (0x8769, 4, 1, struct.pack(order + "I", exif_at))
+    first, blobs0 = directory(ifd0, 8, blobs_at)
+    second, blobs1 = directory(exif, exif_at, blobs_at + len(blobs0)) if exif is not None else (b"", b"")
+    head = (b"II" if order == "<" else b"MM") + struct.pack(order + "HI", 42, 8)
+    return head + first + second + blobs0 + blobs1
+
+def user_comment(text, order, bom=False):
+    if bom:
+        body = text.encode("utf-16")  # Native order with BOM
+    else:
+        body = text.encode("utf-16-le" if order == "<" else "utf-16-be")
+    value = b"UNICODE\x00" + body
+    return (0x9286, 7, len(value), value)
+
+def test_seed_tags_decode():
+    model = read_exif(_tiff_exif(), 0)
+    assert len(model) == 10
+    tags = model.to_dict()
+    assert tags["IFD0.Make"] == "Canon"
+    assert tags["IFD0.Software"] == "Adobe Photoshop 22.0"
+    assert tags["EXIF.DateTimeOriginal"] == "2021:05:01 10:20:30"
+    assert tags["GPS.GPSLatitude"] == [51.0, 30.0, 0.0]
+    assert tags["GPS.GPSLongitudeRef"] == "W"
+
+def test_values_decoded_on_request_only():
+    model = read_exif(_tiff_exif(), 0)
+    assert model._values == {}
+    assert model.get("IFD0", "Model") == "EOS 80D"
+    assert list(model._values) == [("IFD0", 0x0110)]
+    assert model.get("IFD0", 0x0110) == "EOS 80D"  # Same entry by number, from the cache
+    assert model.get("EXIF", "LensModel") == "Unknown"
+    assert model.get("GPS", 0x0002, default=None) == [51.0, 30.0, 0.0]
+
+def test_user_comment_follows_byte_order():
+    text = "Café ☃ A"  # Last code unit has a zero high byte
+    for order in ("<", ">"):
+        for bom in (False, True):
+            data = build_tiff(order, [(0x010F, 2, 4, b"Sony")], [user_comment(text, order, bom)])
+            model = read_exif(data, 0)
+            assert model.get("EXIF", "UserComment") == text, (order, bom)
+
+def test_ascii_user_comment_and_padding():
+    value = b"ASCII\x00\x00\x00" + b"shot on holiday" + b"\x00" * 5
+    data = build_tiff(">", [], [(0x9286, 7, len(value), value)])
+    assert read_exif(data, 0).get("EXIF", "UserComment") == "shot on holiday"
+    empty = b"UNICODE\x00" + b"\x00" * 8
+    data = build_tiff("<", [], [(0x9286, 7, len(empty), empty)])
+    assert read_exif(data, 0).get("EXIF", "UserComment") == "Unknown"
+
+def test_big_endian_numbers_and_long_arrays():
+    values = struct.pack(">80H", *range(80))
+    data = build_tiff(">", [(0x0100, 4, 1, struct.pack(">I", 4032)),
+                            (0x0112, 3, 1, struct.pack(">H", 6)),
+                            (0x011A, 5, 1, struct.pack(">II", 300, 1)),
+                            (0x0111, 3, 80, values)])
+    model = read_exif(data, 0)
+    assert model.get("IFD0", "ImageWidth") == 4032
+    assert model.get("IFD0", "Orientation") == 6
+    assert model.get("IFD0", "XResolution") == 300.0
+    strips = model.get("IFD0", "StripOffsets")
+    assert len(strips) == exif_model.MAX_VALUES + 1 and strips[-1] == "... 16 more"
+
+def test_crafted_directories():
+    # Value pointing past the buffer, an unknown tag and an IFD that loops to itself
+    data = bytearray(build_tiff("<", [(0x010F, 2, 100, struct.pack("<I", 0xFFFF)), (0xBEEF, 1, 2, b"\x01\x02")]))
+    model = read_exif(bytes(data), 0)
+    assert model.get("IFD0", "Make") == "Unknown"
+    assert model.to_dict()["IFD0.Tag0xBEEF"] == [1, 2]
+    struct.pack_into("<I", data, 8 + 2 + 2 * 12, 8)  # Next-IFD pointer back to IFD0
+    assert len(read_exif(bytes(data), 0)) == 2
+    assert read_exif(b"XX*\x00\x08\x00\x00\x00", 0) is None
+
+def test_full_exif_only_on_request():
+    assert "exif_tags" not in metadata_jpg.extract_metadata_from_bytes(jpeg_seed())
+    tags = metadata_jpg.extract_metadata_from_bytes(jpeg_seed(), full_exif=True)["exif_tags"]
+    assert tags["IFD0.Model"] == "EOS 80D"
+    png_tags = metadata_png.extract_metadata_from_bytes(png_seed(), full_exif=True)["exif_tags"]
+    assert png_tags == tags
+
+def test_bad_sub_ifd_pointers_skip_only_that_directory():
+    comment = user_comment("kept", "<")
+    # GPS pointer with count 2 (out-of-line value) and one that points past the buffer
+    for gps in ((0x8825, 4, 2, struct.pack("<II", 8, 8)), (0x8825, 4, 1, struct.pack("<I", 0xFFFFFF))):
+        data = build_tiff("<", [(0x010F, 2, 4, b"Sony"), gps], [comment])
+        model = read_exif(data, 0)
+        tags = model.to_dict()
+        assert tags["IFD0.Make"] == "Sony" and tags["EXIF.UserComment"] == "kept"
+        assert not any(key.startswith("GPS.") for key in tags)
+    # An out-of-line pointer whose value lies past the end of the buffer
+    data = build_tiff(">", [(0x010F, 2, 4, b"Sony"), (0x8769, 4, 3, struct.pack(">I", 0xFFFFFF))])
+    tags = read_exif(data, 0).to_dict()
+    assert tags["IFD0.Make"] == "Sony" and not any(key.startswith("EXIF.") for key in tags)
@@ -0,0 +1,397 @@
+import io
+import os
+import sys
+import time
+import zlib
+import random
+import struct
+import zipfile
+import tracemalloc
+
+# Project root (parent of this file's dir)
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)  # Ensure local modules import
+
+from modules import metadata_jpg, metadata_png, metadata_pdf, metadata_docx, xmp
+
+# Mutated inputs per seed (FUZZ_ITERATIONS=... for longer local runs)
+ITERATIONS = int(os.environ.get("FUZZ_ITERATIONS", "500"))
+RNG_SEED = int(os.environ.get("FUZZ_SEED", "1234"))
+# Time budget per input: fixed overhead plus a linear allowance per MB
+BASE_SECONDS = 0.25
+SECONDS_PER_MB = 2.0
+# Peak Python allocations allowed: a few copies of the input plus overhead
+MEMORY_FACTOR = 6
+MEMORY_OVERHEAD = 16 * 1024 * 1024
+# Worst-case inputs are timed at two sizes; 4x the input may cost at most
+# this many times as much (quadratic behaviour would be ~16x)
+SMALL_SIZE = 256 * 1024
+LARGE_SIZE = 1024 * 1024
+MAX_GROWTH = 10.0
+
+# --- Seeds --------------------------------------------------------------------
+
+def _tiff_exif():
+    # Little-endian TIFF: IFD0 (Make, Model, Software, ExifIFD, GPSIFD) + EXIF + GPS
+    def entry(tag, typ, count, value):
+        return struct.pack("<HHI", tag, typ, count) + value
+    make, model, software = b"Canon\x00", b"EOS 80D\x00", b"Adobe Photoshop 22.0\x00"
+    date = b"2021:05:01 10:20:30\x00"
+    ifd0_off = 8
+    ifd0_size = 2 + 5 * 12 + 4
+    data_off = ifd0_off + ifd0_size
+    blobs = make + model + software
+    exif_off = data_off + len(blobs)
+    exif_size = 2 + 1 * 12 + 4
+    date_off = exif_off + exif_size
+    gps_off = date_off + len(date)
+    gps_size = 2 + 4 * 12 + 4
+    rationals_off = gps_off + gps_size
+    lat = struct.pack("<6I", 51, 1, 30, 1, 0, 1)
+    lon = struct.pack("<6I", 0, 1, 7, 1, 30, 1)
+
+    out = b"II*\x00" + struct.pack("<I", ifd0_off)
+    out += struct.pack("<H", 5)
+    out += entry(0x010F, 2, len(make), struct.pack("<I", data_off))
+    out += entry(0x0110, 2, len(model), struct.pack("<I", data_off + len(make)))
+    out += entry(0x0131, 2, len(software), struct.pack("<I", data_off + len(make) + len(model)))
+    out += entry(0x8769, 4, 1, struct.pack("<I", exif_off))
+    out += entry(0x8825, 4, 1, struct.pack("<I", gps_off))
+    out += struct.pack("<I", 0) + blobs
+    out += struct.pack("<H", 1) + entry(0x9003, 2, len(date), struct.pack("<I", date_off)) + struct.pack("<I", 0)
+    out += date
+    out += struct.pack("<H", 4)
+    out += entry(0x0001, 2, 2, b"N\x00\x00\x00")
+    out += entry(0x0002, 5, 3, struct.pack("<I", rationals_off))
+    out += entry(0x0003, 2, 2, b"W\x00\x00\x00")
+    out += entry(0x0004, 5, 3, struct.pack("<I", rationals_off + 24))
+    out += struct.pack("<I", 0) + lat + lon
+    return out
+
+def jpeg_seed():
+    app1 = b"Exif\x00\x00" + _tiff_exif()
+    sof = b"\x08" + struct.pack(">HH", 480, 640) + b"\x03\x01\x22\x00\x02\x11\x01\x03\x11\x01"
+    return (b"\xff\xd8"
+            + b"\xff\xe1" + struct.pack(">H", len(app1) + 2) + app1
+            + b"\xff\xc0" + struct.pack(">H", len(sof) + 2) + sof
+            + b"\xff\xda\x00\x0c\x03\x01\x00\x02\x11\x03\x11\x00\x3f\x00"
+            + bytes(range(1, 200)) + b"\xff\xd9")
+
+def _png_chunk(ctype, data):
+    return struct.pack(">I", len(data)) + ctype + data + struct.pack(">I", zlib.crc32(data, zlib.crc32(ctype)))
+
+def png_seed():
+    return (metadata_png.PNG_SIGNATURE
+            + _png_chunk(b"IHDR", struct.pack(">IIBBBBB", 32, 16, 8, 2, 0, 0, 0))
+            + _png_chunk(b"tEXt", b"Software\x00GIMP 2.10")
+            + _png_chunk(b"zTXt", b"Author\x00\x00" + zlib.compress(b"Jane Doe"))
+            + _png_chunk(b"iTXt", b"Title\x00\x00\x00\x00\x00Holiday")
+            + _png_chunk(b"eXIf", _tiff_exif())
+            + _png_chunk(b"IDAT", zlib.compress(b"\x00" * (32 * 3 + 1) * 16))
+            + _png_chunk(b"IEND", b""))
+
+def pdf_seed():
+    return (b"%PDF-1.7\n1 0 obj\n<< /Type /Catalog /Pages 2 0 R >>\nendobj\n"
+            b"2 0 obj\n<< /Type /Pages /Kids [3 0 R] /Count 1 >>\nendobj\n"
+            b"3 0 obj\n<< /Type /Page /MediaBox [0 0 612 792] >>\nendobj\n"
+            b"4 0 obj\n<< /Type /XObject /Subtype /Image /Filter /DCTDecode /Length "
+            + str(len(jpeg_seed())).encode() + b" >>\nstream\n" + jpeg_seed() + b"\nendstream\nendobj\n"
+            b"5 0 obj\n<< /Title (Quarterly \\(draft\\) report) /Author (J. Smith) /Creator (Microsoft Word)"
+            b" /Producer (iText 5.5) /CreationDate (D:20210501102030) /ModDate (D:20210502102030) >>\nendobj\n"
+            b"<x:xmpmeta><xmp:CreateDate>2021-05-01T10:20:30</xmp:CreateDate></x:xmpmeta>\n"
+            b"trailer\n<< /Root 1 0 R /Info 5 0 R /ID [<0a0b><0c0d>] >>\n%%EOF\n")
+
+def docx_seed():
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("docProps/core.xml",
+                   '<cp:coreProperties xmlns:cp="cp" xmlns:dc="dc" xmlns:dcterms="dcterms">'
+                   '<dc:creator>J. Smith</dc:creator><dcterms:created>2021-05-01T10:20:30Z</dcterms:created>'
+                   '<dcterms:modified>2021-05-02T10:20:30Z</dcterms:modified><cp:revision>3</cp:revision>'
+                   '</cp:coreProperties>')
+        z.writestr("docProps/app.xml", '<Properties><Application>Microsoft Office Word</Application>'
+                                       '<TotalTime>12</TotalTime></Properties>')
+        z.writestr("word/settings.xml", '<w:settings xmlns:w="%s"><w:rsids><w:rsidRoot w:val="00A1"/>'
+                                        '<w:rsid w:val="00A1"/><w:rsid w:val="00B2"/></w:rsids></w:settings>'
+                   % metadata_docx.W_NS[1:-1])
+        z.writestr("word/document.xml", '<w:document xmlns:w="%s"><w:body><w:p w:rsidR="00A1"><w:r w:rsidR="00B2">'
+                                        '<w:t>Hi</w:t></w:r></w:p></w:body></w:document>' % metadata_docx.W_NS[1:-1])
+        z.writestr("word/media/image1.jpeg", jpeg_seed())
+        z.writestr("word/media/image2.png", png_seed())
+    return buf.getvalue()
+
+# name -> (extract function, seed factory)
+PARSERS = {
+    "jpg": (metadata_jpg.extract_metadata_from_bytes, jpeg_seed),
+    "png": (metadata_png.extract_metadata_from_bytes, png_seed),
+    "pdf": (metadata_pdf.extract_metadata_from_bytes, pdf_seed),
+    "docx": (metadata_docx.extract_metadata_from_bytes, docx_seed),
+}
+
+# --- Mutations ----------------------------------------------------------------
+
+INTERESTING = (b"\x00", b"\xff", b"\x7f", b"\x80", b"\xff\xff", b"\x00\x00", b"\xff\xff\xff\xff",
+               b"\x7f\xff\xff\xff", b"\xff\xd8", b"\xff\xe1", b"\xff\xda", b"IDAT", b"(", b")", b"obj", b"stream")
+
+def mutate(data, rng):
+    data = bytearray(data)
+    for _ in range(rng.randint(1, 4)):
+        op = rng.randrange(6)
+        pos = rng.randrange(len(data) + 1)
+        if op == 0 and data:  # Bit flip
+            i = min(pos, len(data) - 1)
+            data[i] ^= 1 << rng.randrange(8)
+        elif op == 1:  # Overwrite with an interesting value
+            value = rng.choice(INTERESTING)
+            data[pos:pos + len(value)] = value
+        elif op == 2:  # Insert an interesting value
+            data[pos:pos] = rng.choice(INTERESTING)
+        elif op == 3:  # Truncate
+            del data[pos:]
+        elif op == 4:  # Duplicate a slice
+            end = min(len(data), pos + rng.randint(1, 256))
+            data[pos:pos] = data[pos:end]
+        else:  # Delete a slice
+            del data[pos:pos + rng.randint(1, 64)]
+    return bytes(data)
+
+# --- Invariants and budgets ---------------------------------------------------
+
+def budget_seconds(size):
+    return BASE_SECONDS + SECONDS_PER_MB * size / (1024 * 1024)
+
+def run_bounded(extract, data, measure_memory=True):
+    # Returns (metadata, seconds); fails if the time or memory budget is blown.
+    # Timed without tracemalloc, which slows Python loops several times over.
+    started = time.perf_counter()
+    metadata = extract(data)
+    elapsed = time.perf_counter() - started
+    assert elapsed <= budget_seconds(len(data)), f"{len(data)} bytes took {elapsed:.2f}s"
+    if measure_memory:
+        tracemalloc.start()
+        try:
+            extract(data)
+            _current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        assert peak <= MEMORY_FACTOR * len(data) + MEMORY_OVERHEAD, f"{len(data)} bytes peaked at {peak} bytes"
+    return metadata, elapsed
+
+def check_invariants(name, metadata, defaults):
+    assert isinstance(metadata, dict), f"{name}: extractor returned {type(metadata)}"
+    missing = set(defaults) - set(metadata)
+    assert not missing, f"{name}: fields lost: {sorted(missing)}"
+    for key in ("width", "height"):
+        if key in metadata:
+            assert metadata[key] == "Unknown" or isinstance(metadata[key], (int, float, str)), key
+    for key in ("gps_latitude", "gps_longitude"):
+        value = metadata.get(key, "Unknown")
+        if value != "Unknown":
+            float(value)  # Must stay a parseable number
+    for child in metadata.get("embedded_images", []):
+        assert isinstance(child.get("metadata"), dict)
+
+def _fuzz(name):
+    extract, seed_factory = PARSERS[name]
+    seed = seed_factory()
+    defaults = extract(None)
+    baseline, _elapsed = run_bounded(extract, seed)
+    check_invariants(name, baseline, defaults)
+    rng = random.Random(f"{RNG_SEED}-{name}")
+    data = seed
+    for i in range(ITERATIONS):
+        # Mostly mutate the seed; sometimes keep mutating the last input
+        data = mutate(seed if rng.random() < 0.7 else data, rng)
+        metadata, _elapsed = run_bounded(extract, data)
+        check_invariants(f"{name} #{i}", metadata, defaults)
+    return baseline
+
+# --- Fuzz tests ---------------------------------------------------------------
+
+def test_fuzz_jpeg():
+    baseline = _fuzz("jpg")
+    assert baseline["make"] == "Canon" and baseline["camera_model"] == "EOS 80D"
+    assert (baseline["width"], baseline["height"]) == (640, 480)
+    assert baseline["jpeg_process"] == "baseline" and baseline["trailing_bytes_after_eoi"] == 0
+    assert baseline["gps_latitude"] == "51.500000" and baseline["gps_longitude"] == "-0.125000"
+
+def test_fuzz_png():
+    baseline = _fuzz("png")
+    assert baseline["crc_errors"] == 0 and baseline["iend_found"] is True
+    assert baseline["author"] == "Jane Doe" and baseline["make"] == "Canon"
+
+def test_fuzz_pdf():
+    baseline = _fuzz("pdf")
+    assert baseline["title"] == "Quarterly (draft) report"
+    assert baseline["embedded_jpegs_examined"] == 1
+
+def test_fuzz_docx():
+    baseline = _fuzz("docx")
+    assert baseline["author"] == "J. Smith" and baseline["media_images_examined"] == 2
+
+def test_fuzz_stream_readers():
+    # Stream entry points must match the in-memory ones on the seeds; the
+    # JPEG stream reader stops at SOS, so it cannot see past EOI
+    streamed = metadata_jpg.extract_metadata_from_stream(io.BytesIO(jpeg_seed()))
+    in_memory = metadata_jpg.extract_metadata_from_bytes(jpeg_seed())
+    assert in_memory.pop("trailing_bytes_after_eoi") == 0
+    assert streamed.pop("trailing_bytes_after_eoi") == "Unknown"
+    assert streamed == in_memory
+    assert metadata_png.extract_metadata_from_stream(io.BytesIO(png_seed())) == \
+        metadata_png.extract_metadata_from_bytes(png_seed())
+
+# --- Worst-case inputs --------------------------------------------------------
+
+def _jpeg_no_markers(size):
+    return b"\xff\xd8" + b"\x00" * size
+
+def _jpeg_tiny_segments(size):
+    return b"\xff\xd8" + b"\xff\xfe\x00\x02" * (size // 4)
+
+def _jpeg_fill_bytes(size):
+    return b"\xff\xd8" + b"\xff" * size
+
+def _exif_max_ifd_count(size):
+    # IFD0 claims 65535 entries, all of them Software with huge counts
+    tiff = b"II*\x00" + struct.pack("<I", 8) + struct.pack("<H", 0xFFFF)
+    tiff += (struct.pack("<HHI", 0x0131, 2, 0xFFFFFFFF) + struct.pack("<I", 8)) * (size // 12)
+    app1 = b"Exif\x00\x00" + tiff[:0xFFF0]
+    return b"\xff\xd8\xff\xe1" + struct.pack(">H", len(app1) + 2) + app1 + b"\x00" * (size - len(app1))
+
+def _png_tiny_chunks(size):
+    return metadata_png.PNG_SIGNATURE + _png_chunk(b"tEXt", b"") * (size // 12)
+
+def _png_huge_lengths(size):
+    bad = struct.pack(">I", 0xFFFFFFF0) + b"tEXt"
+    return metadata_png.PNG_SIGNATURE + _png_chunk(b"IHDR", b"\x00" * 13) + bad + b"\x00" * size
+
+def _png_text_bombs(size):
+    # Small zTXt chunks that each inflate to the per-chunk text cap
+    bomb = _png_chunk(b"zTXt", b"Comment\x00\x00" + zlib.compress(b"A" * metadata_png.MAX_TEXT_BYTES, 9))
+    return metadata_png.PNG_SIGNATURE + bomb * max(1, size // len(bomb))
+
+def _pdf_unclosed_strings(size):
+    return b"%PDF-1.4\n" + b"/Title (" * (size // 8)
+
+def _pdf_dct_names(size):
+    return b"%PDF-1.4\n1 0 obj\n<< /Subtype /Image /Filter " + b"/DCTDecode " * (size // 11)
+
+def _pdf_unclosed_xmp(size):
+    return b"%PDF-1.4\n" + b"<x:xmpmeta>" * (size // 11)
+
+def _pdf_open_streams(size):
+    # Image objects whose streams never end: endstream search must not rescan
+    obj = b"1 0 obj\n<< /Subtype /Image /Filter /DCTDecode /Length 1 0 R >>\nstream\n\xff\xd8\xff\xe0"
+    return b"%PDF-1.4\n" + obj * (size // len(obj))
+
+def _xmp_properties(size):
+    # One packet holding thousands of small properties
+    count = size // 24
+    return b"".join(b"<xmp:P%d>v</xmp:P%d>" % (i, i) for i in range(count))
+
+def _pdf_xmp_properties(size):
+    return (b"%PDF-1.4\n<x:xmpmeta><rdf:RDF><rdf:Description>" + _xmp_properties(size)
+            + b"</rdf:Description></rdf:RDF></x:xmpmeta>\n%%EOF\n")
+
+def _png_xmp_properties(size):
+    packet = b"<x:xmpmeta><rdf:RDF><rdf:Description>" + _xmp_properties(size) + b"</rdf:Description></rdf:RDF></x:xmpmeta>"
+    return (metadata_png.PNG_SIGNATURE + _png_chunk(b"iTXt", b"XML:com.adobe.xmp\x00\x00\x00\x00\x00" + packet)
+            + _png_chunk(b"IEND", b""))
+
+def _png_many_idat(size):
+    # Image data split into 8 KB IDAT chunks, as encoders commonly write it
+    idat = _png_chunk(b"IDAT", b"\x00" * 8192)
+    return (metadata_png.PNG_SIGNATURE + _png_chunk(b"IHDR", struct.pack(">IIBBBBB", 32, 16, 8, 2, 0, 0, 0))
+            + _png_chunk(b"tEXt", b"Software\x00GIMP 2.10") + idat * max(1, size // len(idat))
+            + _png_chunk(b"IEND", b""))
+
+def _zipped(name, data):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr(name, data)
+    return buf.getvalue()
+
+def _docx_png_idat(size):
+    return _zipped("word/media/image1.png", _png_many_idat(size))
+
+def _png_member_fast(data):
+    # Fast mode straight from a deflated zip member: skipping IDAT must not rewind
+    with zipfile.ZipFile(io.BytesIO(data)) as z, z.open(z.infolist()[0]) as member:
+        return metadata_png.extract_metadata_from_stream(member, verify_idat_crc=False)
+
+def _zipped_png_idat(size):
+    return _zipped("image.png", _png_many_idat(size))
+
+def _docx_jpeg_zeros(size):
+    # Zeros inflate from almost nothing, so a small DOCX can hold many such members
+    return _zipped("word/media/image1.jpeg", _jpeg_no_markers(size))
+
+def _uncached(extract):
+    # Repeated timing runs must parse the XMP packet, not hit the cache
+    def run(data):
+        xmp._cache.clear()
+        return extract(data)
+    return run
+
+WORST_CASES = {
+    "jpeg_no_markers": (metadata_jpg.extract_metadata_from_bytes, _jpeg_no_markers),
+    "jpeg_tiny_segments": (metadata_jpg.extract_metadata_from_bytes, _jpeg_tiny_segments),
+    "jpeg_fill_bytes": (metadata_jpg.extract_metadata_from_bytes, _jpeg_fill_bytes),
+    "exif_max_ifd_count": (metadata_jpg.extract_metadata_from_bytes, _exif_max_ifd_count),
+    "png_tiny_chunks": (metadata_png.extract_metadata_from_bytes, _png_tiny_chunks),
+    "png_huge_lengths": (metadata_png.extract_metadata_from_bytes, _png_huge_lengths),
+    "png_text_bombs": (metadata_png.extract_metadata_from_bytes, _png_text_bombs),
+    "png_idat_in_zip": (_png_member_fast, _zipped_png_idat),
+    "docx_png_idat": (metadata_docx.extract_metadata_from_bytes, _docx_png_idat),
+    "docx_jpeg_zeros": (metadata_docx.extract_metadata_from_bytes, _docx_jpeg_zeros),
+    "pdf_unclosed_strings": (metadata_pdf.extract_metadata_from_bytes, _pdf_unclosed_strings),
+    "pdf_dct_names": (metadata_pdf.extract_metadata_from_bytes, _pdf_dct_names),
+    "pdf_unclosed_xmp": (metadata_pdf.extract_metadata_from_bytes, _pdf_unclosed_xmp),
+    "pdf_open_streams": (metadata_pdf.extract_metadata_from_bytes, _pdf_open_streams),
+    "pdf_xmp_properties": (_uncached(metadata_pdf.extract_metadata_from_bytes), _pdf_xmp_properties),
+    "png_xmp_properties": (_uncached(metadata_png.extract_metadata_from_bytes), _png_xmp_properties),
+}
+
+def _time_best(extract, data, repeats=2):
+    run_bounded(extract, data)  # Checks the memory budget once
+    return min(run_bounded(extract, data, measure_memory=False)[1] for _ in range(repeats))
+
+def check_worst_case(name):
+    extract, build = WORST_CASES[name]
+    small = _time_best(extract, build(SMALL_SIZE))
+    large = _time_best(extract, build(LARGE_SIZE))
+    growth = large / max(small, 0.005)  # Floor keeps timer noise out of the ratio
+    assert growth <= MAX_GROWTH, f"{name}: 4x input took {growth:.1f}x as long ({small:.3f}s -> {large:.3f}s)"
+    return small, large
+
+def test_worst_case_jpeg():
+    for name in ("jpeg_no_markers", "jpeg_tiny_segments", "jpeg_fill_bytes", "exif_max_ifd_count"):
+        check_worst_case(name)
+
+def test_worst_case_png():
+    for name in ("png_tiny_chunks", "png_huge_lengths", "png_text_bombs", "png_xmp_properties", "png_idat_in_zip"):
+        check_worst_case(name)
+
+def test_worst_case_docx_media():
+    for name in ("docx_png_idat", "docx_jpeg_zeros"):
+        check_worst_case(name)
+
+def test_worst_case_pdf():
+    for name in ("pdf_unclosed_strings", "pdf_dct_names", "pdf_unclosed_xmp", "pdf_open_streams",
+                 "pdf_xmp_properties"):
+        check_worst_case(name)
+
+def main():
+    # Script mode, like the other files in tests/
+    for name in PARSERS:
+        started = time.perf_counter()
+        _fuzz(name)
+        print(f"fuzz {name:5s}: {ITERATIONS} inputs OK in {time.perf_counter() - started:.2f}s")
+    for name in WORST_CASES:
+        small, large = check_worst_case(name)
+        print(f"worst {name:22s}: {small:.3f}s -> {large:.3f}s")
+    print("\nDone.")
+
+if __name__ == "__main__":
+    main()
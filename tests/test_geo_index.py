@@ -0,0 +1,74 @@
+import os
+import sys
+
+# Project root (parent of this file's dir)
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)  # Ensure local modules import
+
+from modules.geo_index import GeoIndex, haversine_m
+
+def photo(path, lat, lon, when, serial="Unknown", model="iPhone 13"):
+    return {"path": path, "metadata": {
+        "gps_latitude": f"{lat:.6f}", "gps_longitude": f"{lon:.6f}", "make": "Apple",
+        "camera_model": model, "body_serial": serial, "datetime": when}}
+
+def brute_force(index, lat, lon, radius_m):
+    return sorted((haversine_m(lat, lon, a, b), p) for a, b, p in zip(index.lats, index.lons, index.paths)
+                  if haversine_m(lat, lon, a, b) <= radius_m)
+
+def test_radius_query_wraps_at_antimeridian():
+    index = GeoIndex()
+    index.add_point(-16.5, 179.995, "east.jpg")
+    index.add_point(-16.5, -179.995, "west.jpg")
+    index.add_point(-16.5, 178.0, "far.jpg")
+    for i in range(50):  # Enough occupied cells that the query walks the grid
+        index.add_point(10.0 + i, 20.0, f"filler_{i}.jpg")
+    hits = [path for _d, path in index.query_radius(-16.5, 179.999, 2000)]
+    assert hits == ["east.jpg", "west.jpg"]
+    hits = [path for _d, path in index.query_radius(-16.5, -179.999, 2000)]
+    assert hits == ["west.jpg", "east.jpg"]
+
+def test_radius_query_matches_brute_force():
+    index = GeoIndex(cell_deg=0.5)
+    for i in range(400):
+        index.add_point((i * 37 % 170) - 85.0 + 0.13 * i % 1, (i * 53 % 360) - 180.0 + 0.7, f"{i}.jpg")
+    for lat, lon, radius in ((0, 179.9, 300_000), (60, -179.5, 900_000), (-40, 10, 50_000), (89, 0, 400_000)):
+        assert index.query_radius(lat, lon, radius) == brute_force(index, lat, lon, radius)
+
+def test_impossible_travel_needs_the_same_body():
+    index = GeoIndex()
+    # Two different iPhone 13 bodies, London and Sydney, an hour apart
+    index.add_record(photo("london.jpg", 51.5, -0.12, "2024:05:01 10:00:00", serial="A1"))
+    index.add_record(photo("sydney.jpg", -33.87, 151.2, "2024:05:01 11:00:00", serial="B2"))
+    assert index.impossible_travel() == []
+    index.add_record(photo("sydney2.jpg", -33.87, 151.2, "2024:05:01 11:30:00", serial="A1"))
+    flags = index.impossible_travel()
+    assert [(f["camera"], f["from"], f["to"]) for f in flags] == [("Apple iPhone 13 #A1", "london.jpg", "sydney2.jpg")]
+
+def test_impossible_travel_skips_points_without_serial():
+    index = GeoIndex()
+    index.add_record(photo("london.jpg", 51.5, -0.12, "2024:05:01 10:00:00"))
+    index.add_record(photo("sydney.jpg", -33.87, 151.2, "2024:05:01 11:00:00"))
+    assert len(index) == 2
+    assert index.impossible_travel() == []
+
+def test_report_counts_points_travel_cannot_compare(tmp_path):
+    index = GeoIndex()
+    index.add_record(photo("london.jpg", 51.5, -0.12, "2024:05:01 10:00:00"))
+    index.add_record(photo("paris.jpg", 48.85, 2.29, "2024:05:01 10:30:00"))
+    index.add_record(photo("sydney.jpg", -33.87, 151.2, "Unknown", serial="A1"))
+    index.add_record(photo("rome.jpg", 41.9, 12.5, "2024:05:01 11:00:00", serial="A1"))
+    assert index.travel_skipped() == {"no_serial": 2, "no_time": 1}
+    with open(index.write_report(str(tmp_path)), encoding="utf-8") as f:
+        report = f.read()
+    assert "Not compared: 2 file(s) without a body serial, 1 without a capture time." in report
+    assert "  - None detected." in report
+
+def test_clusters_group_nearby_points():
+    index = GeoIndex()
+    for i in range(4):
+        index.add_point(48.8584 + i * 0.0001, 2.2945, f"paris_{i}.jpg")
+    index.add_point(40.0, -74.0, "ny.jpg")
+    clusters = index.clusters(eps_m=200, min_points=3)
+    assert len(clusters) == 1 and clusters[0]["paths"] == [f"paris_{i}.jpg" for i in range(4)]
@@ -0,0 +1,155 @@
+import os
+import sys
+import queue
+import random
+
+import pytest
+
+# Project root (parent of this file's dir)
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+for path in (PROJECT_ROOT, TESTS_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)  # Ensure local modules and seeds import
+
+from modules.result_store import ResultStore
+
+forensic_gui = pytest.importorskip("gui.forensic_gui")  # Needs tkinter, not a display
+
+def make_record(i, rng):
+    day = rng.randrange(1, 29)
+    return {"path": f"case/file_{i:05d}.{rng.choice(['jpg', 'png', 'pdf'])}",
+            "file_type": rng.choice(["jpg", "png", "pdf"]),
+            "metadata": {"datetime": f"2021:04:{day:02d} 12:00:00" if i % 4 else "Unknown"},
+            "anomalies": [], "risk_score": rng.randrange(0, 101, 20)}
+
+def filled_store(count, seed=5):
+    rng = random.Random(seed)
+    store = ResultStore()
+    records = [make_record(i, rng) for i in range(count)]
+    for record in records:
+        store.add(record)
+    return store, records
+
+def all_rows(store, page_size=37):
+    rows = []
+    offset = 0
+    while True:
+        page = store.page(offset, page_size)
+        if not page:
+            return rows
+        rows.extend(row for _index, row in page)
+        offset += page_size
+
+def test_pages_cover_every_row_once():
+    store, records = filled_store(500)
+    rows = all_rows(store)
+    assert [row[3] for row in rows] == [r["path"] for r in records]  # Insertion order
+    assert store.page(490, 50) == [(i, store.page(i, 1)[0][1]) for i in range(490, 500)]
+    assert store.page(600, 50) == []
+
+def test_sorting_matches_full_sort():
+    store, _records = filled_store(400)
+    for position, key in enumerate(ResultStore.SORT_KEYS):
+        for descending in (False, True):
+            store.sort_by(key, descending)
+            rows = all_rows(store)
+            expected = sorted(rows, key=lambda row: (row[position], row[3]), reverse=descending)
+            assert rows == expected, (key, descending)
+
+def test_records_added_after_sort_keep_order():
+    store, _records = filled_store(200)
+    store.sort_by("risk_score", descending=True)
+    rng = random.Random(9)
+    for i in range(200, 300):
+        store.add(make_record(i, rng))
+    rows = all_rows(store)
+    assert len(rows) == 300
+    assert rows == sorted(rows, key=lambda row: (row[0], row[3]), reverse=True)
+
+def test_get_returns_full_record():
+    store, records = filled_store(50)
+    store.sort_by("path", descending=True)
+    index, row = store.page(0, 1)[0]
+    assert store.get(index) == records[index]
+    assert row[3] == max(r["path"] for r in records)
+
+class _Widget:
+    # Records the calls a test cares about; stands in for Tk widgets
+    def __init__(self):
+        self.calls = []
+        self.rows = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+    def get_children(self):
+        return list(range(len(self.rows)))
+
+    def delete(self, *items):
+        self.rows = []
+
+    def insert(self, _parent, _where, iid=None, values=None, **kwargs):
+        if values is not None:
+            self.rows.append((iid, values))
+
+def fake_app():
+    # ForensicApp without a display: only the state drain/paging touch
+    app = forensic_gui.ForensicApp.__new__(forensic_gui.ForensicApp)
+    app.root = _Widget()
+    app.table = _Widget()
+    app.page_label = _Widget()
+    app.folder_btn = _Widget()
+    app.output_area = _Widget()
+    app.store = ResultStore()
+    app.page_offset = 0
+    app.incoming = queue.Queue()
+    app.scanning = True
+    return app
+
+def test_drain_moves_records_and_children_into_store():
+    app = fake_app()
+    rng = random.Random(1)
+    parent = make_record(0, rng)
+    parent["children"] = [dict(make_record(1, rng), path="case/file_00000.jpg#img", parent=parent["path"])]
+    app.incoming.put(parent)
+    app.incoming.put(make_record(2, rng))
+    app.drain_results()
+    assert len(app.store) == 3
+    assert "children" not in app.store.get(0)  # Held once, as its own row
+    assert app.store.get(1)["parent"] == parent["path"]
+    assert app.scanning
+    assert app.root.calls[-1][0] == "after"  # Polls again while the scan runs
+
+    app.incoming.put(None)  # Scan thread finished
+    app.drain_results()
+    assert not app.scanning
+    assert [row[0] for row in app.table.rows] == ["0", "1", "2"]
+
+def test_drain_is_bounded_per_call():
+    app = fake_app()
+    rng = random.Random(2)
+    for i in range(6000):
+        app.incoming.put(make_record(i, rng))
+    app.incoming.put(None)
+    app.drain_results()
+    assert len(app.store) == 5000 and app.scanning  # The Tk thread gets control back
+    app.drain_results()
+    assert len(app.store) == 6000 and not app.scanning
+    assert len(app.table.rows) == forensic_gui.PAGE_SIZE  # Only one page in the widget
+
+def test_paging_stays_in_range():
+    app = fake_app()
+    rng = random.Random(3)
+    for i in range(450):
+        app.store.add(make_record(i, rng))
+    app.change_page(-forensic_gui.PAGE_SIZE)
+    assert app.page_offset == 0
+    app.change_page(forensic_gui.PAGE_SIZE)
+    app.change_page(forensic_gui.PAGE_SIZE)
+    assert app.page_offset == 400 and len(app.table.rows) == 50
+    app.change_page(forensic_gui.PAGE_SIZE)
+    assert app.page_offset == 400  # No empty page past the end
+    app.sort_results("risk_score")
+    assert app.page_offset == 0
+    assert app.store.sort_state == ("risk_score", True)  # Riskiest first on the first click
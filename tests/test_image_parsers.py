@@ -0,0 +1,153 @@
+import io
+import os
+import sys
+import struct
+import zlib
+
+# Project root (parent of this file's dir)
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+for path in (PROJECT_ROOT, TESTS_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)  # Ensure local modules and seeds import
+
+from modules import metadata_jpg, metadata_png
+from modules.anomaly_checker import check_anomalies
+from test_fuzz_parsers import jpeg_seed, png_seed, _png_chunk, _tiff_exif
+
+def _app2_mpf(second_offset, second_size):
+    # MPF APP2: TIFF header, then an MP Index IFD with NumberOfImages and MPEntry
+    entries = struct.pack(">IIIHH", 0x20030000, 0, 0, 0, 0)
+    entries += struct.pack(">IIIHH", 0x00020002, second_size, second_offset, 0, 0)
+    ifd_off = 8
+    data_off = ifd_off + 2 + 2 * 12 + 4
+    tiff = b"MM\x00\x2a" + struct.pack(">I", ifd_off) + struct.pack(">H", 2)
+    tiff += struct.pack(">HHI", 0xB001, 4, 1) + struct.pack(">I", 2)
+    tiff += struct.pack(">HHI", 0xB002, 7, len(entries)) + struct.pack(">I", data_off)
+    tiff += struct.pack(">I", 0) + entries
+    data = b"MPF\x00" + tiff
+    return b"\xff\xe2" + struct.pack(">H", len(data) + 2) + data
+
+def mpf_jpeg(tail=b""):
+    # Primary image with an MPF index pointing at a second JPEG after its EOI
+    seed = jpeg_seed()
+    second = jpeg_seed()
+    base = 2 + 4 + 4  # MPF offsets count from the TIFF header: after SOI, FFE2 + length, "MPF\0"
+    primary_len = len(seed) + len(_app2_mpf(0, 0))
+    app2 = _app2_mpf(primary_len - base, len(second))
+    return seed[:2] + app2 + seed[2:] + second + tail
+
+def test_mpf_second_image_is_not_trailing_data():
+    metadata = metadata_jpg.extract_metadata_from_bytes(mpf_jpeg())
+    assert metadata["mpf_images"] == 2
+    assert metadata["trailing_bytes_after_eoi"] == 0
+    assert not any("end-of-image" in a for a in check_anomalies(metadata))
+
+def test_data_past_mpf_images_is_still_flagged():
+    metadata = metadata_jpg.extract_metadata_from_bytes(mpf_jpeg(b"PK\x03\x04secret"))
+    assert metadata["trailing_bytes_after_eoi"] == 10
+
+def test_motion_photo_video_after_mpf_images():
+    video = b"\x00\x00\x00\x18ftypmp42" + b"\x00" * 64
+    metadata = metadata_jpg.extract_metadata_from_bytes(mpf_jpeg(video))
+    assert metadata["trailing_bytes_after_eoi"] == 0
+
+def test_appended_jpeg_without_mpf_is_flagged():
+    metadata = metadata_jpg.extract_metadata_from_bytes(jpeg_seed() + jpeg_seed())
+    assert metadata["mpf_images"] == "Unknown"
+    assert metadata["trailing_bytes_after_eoi"] == len(jpeg_seed())
+
+def png_chunks(data):
+    # [(type, chunk bytes)] of a PNG, chunk bytes including length and CRC
+    pos, chunks = 8, []
+    while pos + 8 <= len(data):
+        length = struct.unpack(">I", data[pos:pos + 4])[0]
+        chunks.append((data[pos + 4:pos + 8], data[pos:pos + 12 + length]))
+        pos += 12 + length
+    return chunks
+
+def png_with(replace=None, tail=b""):
+    # The PNG seed with chunks swapped out ({type: chunk bytes}) and bytes appended
+    replace = replace or {}
+    return metadata_png.PNG_SIGNATURE + b"".join(replace.get(t, c) for t, c in png_chunks(png_seed())) + tail
+
+def bad_crc(ctype, data):
+    chunk = _png_chunk(ctype, data)
+    return chunk[:-4] + bytes(b ^ 0xFF for b in chunk[-4:])
+
+class _Unseekable(io.RawIOBase):
+    # Forward-only stream, like a pipe or an inflating zip member
+    def __init__(self, data):
+        self._buf = io.BytesIO(data)
+    def readable(self):
+        return True
+    def readinto(self, b):
+        data = self._buf.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+def test_png_seed_chunks_all_verified():
+    metadata = metadata_png.extract_metadata_from_bytes(png_seed())
+    assert metadata["crc_checked"] == len(png_chunks(png_seed())) == 7
+    assert metadata["crc_errors"] == 0
+    assert metadata["iend_found"] is True
+    assert metadata["trailing_bytes_after_iend"] == 0
+    assert not any("PNG" in a or "IEND" in a for a in check_anomalies(metadata))
+
+def test_png_crc_failures_are_reported():
+    metadata = metadata_png.extract_metadata_from_bytes(png_with({b"tEXt": bad_crc(b"tEXt", b"Software\x00GIMP 2.10")}))
+    assert metadata["crc_errors"] == 1
+    assert metadata["crc_error_chunks"] == ["tEXt"]
+    assert metadata["software"] == "GIMP 2.10"  # Still parsed
+    assert any("invalid CRCs (tEXt)" in a for a in check_anomalies(metadata))
+
+def test_png_idat_crc_only_in_full_mode():
+    idat = bad_crc(b"IDAT", zlib.compress(b"\x00" * (32 * 3 + 1) * 16))
+    data = png_with({b"IDAT": idat})
+    full = metadata_png.extract_metadata_from_bytes(data)
+    assert full["crc_error_chunks"] == ["IDAT"]
+    fast = metadata_png.extract_metadata_from_bytes(data, verify_idat_crc=False)
+    assert fast["crc_errors"] == 0 and fast["crc_checked"] == 6
+    assert fast["idat_crc_verified"] is False and fast["iend_found"] is True
+
+def test_png_crc_error_list_is_capped():
+    chunks = b"".join(bad_crc(b"tEXt", b"Comment\x00%d" % i) for i in range(25))
+    data = png_seed()[:33] + chunks + png_seed()[33:]
+    metadata = metadata_png.extract_metadata_from_bytes(data)
+    assert metadata["crc_errors"] == 25
+    assert len(metadata["crc_error_chunks"]) == metadata_png.MAX_CRC_ERRORS_LISTED
+
+def test_png_exif_chunk():
+    metadata = metadata_png.extract_metadata_from_bytes(png_seed())
+    assert (metadata["make"], metadata["camera_model"]) == ("Canon", "EOS 80D")
+    assert metadata["datetime"] == "2021:05:01 10:20:30"  # DateTimeOriginal
+    assert metadata["gps_latitude"] == "51.500000" and metadata["gps_longitude"] == "-0.125000"
+    assert metadata["software"] == "GIMP 2.10"  # tEXt comes first and wins
+    assert metadata["created_by"] == "EOS 80D"
+
+    # Some writers keep the JPEG "Exif\0\0" prefix inside eXIf
+    prefixed = metadata_png.extract_metadata_from_bytes(png_with({b"eXIf": _png_chunk(b"eXIf", b"Exif\x00\x00" + _tiff_exif())}))
+    assert prefixed["camera_model"] == "EOS 80D"
+
+def test_png_data_after_iend():
+    appended = b"PK\x03\x04" + b"z" * 100
+    metadata = metadata_png.extract_metadata_from_bytes(png_with(tail=appended))
+    assert metadata["trailing_bytes_after_iend"] == len(appended)
+    assert metadata["chunks_after_iend"] == 0
+    assert any("104 byte(s) of data after IEND (0 chunk(s))" in a for a in check_anomalies(metadata))
+
+    extra = _png_chunk(b"tEXt", b"Comment\x00hidden")
+    metadata = metadata_png.extract_metadata_from_bytes(png_with(tail=extra + b"junk"))
+    assert metadata["chunks_after_iend"] == 1
+    assert metadata["trailing_bytes_after_iend"] == len(extra) + 4
+
+def test_png_forward_only_stream_matches_bytes():
+    for data in (png_seed(), png_with(tail=b"PK\x03\x04" * 50), png_seed()[:-20]):
+        for verify in (True, False):
+            streamed = metadata_png.extract_metadata_from_stream(io.BufferedReader(_Unseekable(data)), verify)
+            assert streamed == metadata_png.extract_metadata_from_bytes(data, verify)
+
+def test_png_truncated_before_iend():
+    metadata = metadata_png.extract_metadata_from_bytes(png_seed()[:-12])
+    assert metadata["iend_found"] is False
+    assert any("no IEND" in a for a in check_anomalies(metadata))
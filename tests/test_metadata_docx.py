@@ -0,0 +1,130 @@
+import io
+import os
+import sys
+import zipfile
+
+# Project root (parent of this file's dir)
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+for path in (PROJECT_ROOT, TESTS_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)  # Ensure local modules and seeds import
+
+from modules import metadata_docx
+from modules.anomaly_checker import check_anomalies
+from modules.pipeline import scan_bytes
+from test_fuzz_parsers import docx_seed, jpeg_seed, png_seed
+
+W = metadata_docx.W_NS[1:-1]
+
+def settings_xml(*rsids):
+    listed = "".join(f'<w:rsid w:val="{r}"/>' for r in rsids)
+    return f'<w:settings xmlns:w="{W}"><w:rsids><w:rsidRoot w:val="{rsids[0]}"/>{listed}</w:rsids></w:settings>'.encode()
+
+def document_xml(paragraphs):
+    # paragraphs: [(paragraph rsid or None, [(attribute, run rsid), ...]), ...]
+    body = []
+    for p_rsid, runs in paragraphs:
+        p_attr = f' w:rsidR="{p_rsid}"' if p_rsid else ""
+        body.append(f"<w:p{p_attr}>" + "".join(f'<w:r w:{attr}="{r}"><w:t>x</w:t></w:r>' for attr, r in runs) + "</w:p>")
+    return f'<w:document xmlns:w="{W}"><w:body>{"".join(body)}</w:body></w:document>'.encode()
+
+def rebuilt_docx(**replace):
+    # The seed with members replaced or added (name -> bytes)
+    buf = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(docx_seed())) as src, zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as z:
+        for info in src.infolist():
+            z.writestr(info.filename, replace.pop(info.filename, src.read(info.filename)))
+        for name, data in replace.items():
+            z.writestr(name, data)
+    return buf.getvalue()
+
+def test_oversized_core_part_keeps_other_parts():
+    # Padding deflates to almost nothing, but inflates past MAX_PART_BYTES
+    core = b'<cp:coreProperties xmlns:cp="cp"><!--' + b" " * (metadata_docx.MAX_PART_BYTES + 1) + b"--></cp:coreProperties>"
+    metadata = metadata_docx.extract_metadata_from_bytes(rebuilt_docx(**{"docProps/core.xml": core}))
+    assert metadata["author"] == "Unknown"
+    assert metadata["created_by"] == "Microsoft Office Word"  # app.xml still parsed
+    assert metadata["rsid_sessions"] == 2
+    assert len(metadata["parts_aborted"]) == 1 and "docProps/core.xml" in metadata["parts_aborted"][0]
+    assert any(a.startswith("Extraction aborted: docProps/core.xml") for a in check_anomalies(metadata))
+
+def test_seed_has_no_aborted_parts():
+    metadata = metadata_docx.extract_metadata_from_bytes(docx_seed())
+    assert metadata["parts_aborted"] == []
+    assert metadata["author"] == "J. Smith"
+    assert not any(a.startswith("Extraction aborted") for a in check_anomalies(metadata))
+
+def test_rsid_counts():
+    document = document_xml([
+        ("00A1", [("rsidR", "00A1"), ("rsidR", "00b2")]),   # Lower case is the same session
+        ("00B2", [("rsidRPr", "00C3")]),                     # Formatting-only rsid still counts
+        (None, [("rsidR", "00A1")]),
+        ("00C3", []),
+    ])
+    data = rebuilt_docx(**{"word/settings.xml": settings_xml("00A1", "00B2"), "word/document.xml": document})
+    metadata = metadata_docx.extract_metadata_from_bytes(data)
+    assert metadata["rsid_sessions"] == 2
+    assert metadata["rsid_paragraphs"] == 4
+    assert metadata["rsid_runs"] == 4
+    assert metadata["rsid_body_sessions"] == 3
+    assert metadata["rsid_foreign"] == 1  # 00C3 is not in settings
+    assert metadata["rsid_top"] == {"00A1": [1, 2], "00B2": [1, 1], "00C3": [1, 1]}
+    assert any("not listed in settings" in a for a in check_anomalies(metadata))
+
+def test_rsid_foreign_unknown_without_settings_list():
+    data = rebuilt_docx(**{"word/settings.xml": f'<w:settings xmlns:w="{W}"/>'.encode()})
+    metadata = metadata_docx.extract_metadata_from_bytes(data)
+    assert metadata["rsid_sessions"] == "Unknown"
+    assert metadata["rsid_foreign"] == "Unknown"
+    assert metadata["rsid_paragraphs"] == 1
+
+def test_rsid_scan_of_long_body():
+    sessions = [f"{i:08X}" for i in range(40)]
+    paragraphs = [(sessions[i % 40], [("rsidR", sessions[(i * 7) % 40])] * 3) for i in range(20000)]
+    data = rebuilt_docx(**{"word/settings.xml": settings_xml(*sessions[:30]),
+                           "word/document.xml": document_xml(paragraphs)})
+    metadata = metadata_docx.extract_metadata_from_bytes(data)
+    assert metadata["rsid_paragraphs"] == 20000
+    assert metadata["rsid_runs"] == 60000
+    assert metadata["rsid_body_sessions"] == 40
+    assert metadata["rsid_foreign"] == 10
+    assert len(metadata["rsid_top"]) == metadata_docx.RSID_TOP_N
+
+def test_media_members_are_examined():
+    data = rebuilt_docx(**{"word/media/image3.gif": b"GIF89a", "word/media/image4.JPG": jpeg_seed()})
+    metadata = metadata_docx.extract_metadata_from_bytes(data)
+    assert metadata["media_files"] == 4
+    assert metadata["media_images_examined"] == 3  # Not the GIF
+    children = {child["name"]: child for child in metadata["embedded_images"]}
+    assert sorted(children) == ["word/media/image1.jpeg", "word/media/image2.png", "word/media/image4.JPG"]
+    assert children["word/media/image1.jpeg"]["metadata"]["camera_model"] == "EOS 80D"
+    assert children["word/media/image2.png"]["length"] == len(png_seed())
+    assert children["word/media/image2.png"]["metadata"]["iend_found"] == "Unknown"  # Header only
+
+def test_media_limits(monkeypatch):
+    monkeypatch.setattr(metadata_docx, "MAX_MEDIA_FILES", 2)
+    extra = {f"word/media/extra{i}.png": png_seed() for i in range(3)}
+    metadata = metadata_docx.extract_metadata_from_bytes(rebuilt_docx(**extra))
+    assert metadata["media_files"] == 5
+    assert metadata["media_images_examined"] == 2
+
+    monkeypatch.setattr(metadata_docx, "MAX_MEDIA_FILES", 64)
+    monkeypatch.setattr(metadata_docx, "MAX_MEDIA_BYTES", len(png_seed()))
+    metadata = metadata_docx.extract_metadata_from_bytes(docx_seed())
+    assert [child["name"] for child in metadata["embedded_images"]] == ["word/media/image2.png"]
+    assert metadata["media_files"] == 2  # The larger JPEG is counted, not opened
+
+def test_damaged_media_keeps_document_fields():
+    data = rebuilt_docx(**{"word/media/image1.jpeg": b"\xff\xd8\xff\xe1\xff\xff" + b"\x00" * 10})
+    metadata = metadata_docx.extract_metadata_from_bytes(data)
+    assert metadata["author"] == "J. Smith"
+    assert metadata["media_images_examined"] == 2
+
+def test_media_become_child_records():
+    record = scan_bytes("case/letter.docx", "docx", docx_seed())
+    children = record["children"]
+    assert [child["path"] for child in children] == ["case/letter.docx#word/media/image1.jpeg",
+                                                     "case/letter.docx#word/media/image2.png"]
+    assert all(child["parent"] == "case/letter.docx" for child in children)
+    assert "embedded_images" not in record["metadata"]
@@ -0,0 +1,57 @@
+import os
+import sys
+
+# Project root (parent of this file's dir)
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+for path in (PROJECT_ROOT, TESTS_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)  # Ensure local modules and seeds import
+
+from modules import metadata_pdf
+from test_fuzz_parsers import jpeg_seed
+
+def image_object(number, data, length=None, filters="/DCTDecode", eol=b"\n"):
+    length = str(len(data)).encode() if length is None else length
+    return (b"%d 0 obj\n<< /Type /XObject /Subtype /Image /Filter %s /Length %s >>\nstream%s"
+            % (number, filters.encode(), length, eol) + data + b"\nendstream\nendobj\n")
+
+def streams(raw):
+    text = raw.decode('latin-1')
+    return [(raw[start:end], obj) for start, end, obj in metadata_pdf._dct_image_streams(text)]
+
+def test_direct_and_indirect_lengths():
+    jpeg = jpeg_seed()
+    raw = (b"%PDF-1.4\n" + image_object(4, jpeg) + image_object(5, jpeg + b"X", length=b"9 0 R", eol=b"\r\n")
+           + b"9 0 obj\n" + str(len(jpeg) + 1).encode() + b"\nendobj\n")
+    assert streams(raw) == [(jpeg, "4"), (jpeg + b"X", "5")]
+
+def test_wrong_direct_length_falls_back_to_endstream():
+    jpeg = jpeg_seed()
+    assert streams(b"%PDF-1.4\n" + image_object(4, jpeg, length=b"10")) == [(jpeg, "4")]
+
+def test_skips_chained_filters_and_non_images():
+    jpeg = jpeg_seed()
+    raw = (b"%PDF-1.4\n" + image_object(4, jpeg, filters="[/FlateDecode /DCTDecode]")
+           + b"5 0 obj\n<< /Filter /DCTDecode /Length 4 >>\nstream\nabcd\nendstream\nendobj\n"
+           + image_object(6, jpeg))
+    assert streams(raw) == [(jpeg, "6")]
+
+def test_duplicate_images_are_extracted_once():
+    jpeg = jpeg_seed()
+    other = jpeg.replace(b"EOS 80D", b"EOS 90D")
+    raw = b"%PDF-1.4\n" + image_object(4, jpeg) + image_object(5, other) + image_object(6, jpeg)
+    metadata = metadata_pdf.extract_metadata_from_bytes(raw)
+    assert metadata["embedded_jpegs"] == 3
+    assert metadata["embedded_jpegs_duplicate"] == 1
+    assert metadata["embedded_jpegs_examined"] == 2
+    children = metadata["embedded_images"]
+    assert [c["name"] for c in children] == ["obj4", "obj5"]
+    assert [c["metadata"]["camera_model"] for c in children] == ["EOS 80D", "EOS 90D"]
+    assert children[0]["sha1"] != children[1]["sha1"]
+
+def test_max_images_keeps_counting():
+    jpeg = jpeg_seed()
+    raw = b"%PDF-1.4\n" + image_object(4, jpeg) + image_object(5, jpeg.replace(b"Canon", b"Nikon"))
+    metadata = metadata_pdf.extract_metadata_from_bytes(raw, max_images=1)
+    assert metadata["embedded_jpegs"] == 2 and metadata["embedded_jpegs_examined"] == 1
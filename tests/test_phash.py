@@ -0,0 +1,73 @@
+import os
+import sys
+import random
+
+# Project root (parent of this file's dir)
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+for path in (PROJECT_ROOT, TESTS_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)  # Ensure local modules and seeds import
+
+from modules import phash
+from modules.phash import BKTree, DuplicateIndex, COMPARE_FIELDS
+
+def hashed_record(path, value, **fields):
+    metadata = {field: "Unknown" for field in COMPARE_FIELDS}
+    metadata.update(fields, dhash=f"{value:016x}")
+    return {"path": path, "file_type": "jpg", "metadata": metadata,
+            "anomalies": ["Missing author."], "risk_score": 20}
+
+def test_bktree_query_matches_brute_force():
+    rng = random.Random(7)
+    values = [rng.getrandbits(64) for _ in range(300)]
+    values += [v ^ (1 << rng.randrange(64)) for v in values[:50]]  # Some near neighbours
+    tree = BKTree()
+    for i, value in enumerate(values):
+        tree.add(value, (i,))
+    for probe in values[:40] + [rng.getrandbits(64) for _ in range(10)]:
+        expected = sorted((bin(probe ^ v).count("1"), (i,)) for i, v in enumerate(values)
+                          if bin(probe ^ v).count("1") <= 6)
+        assert sorted(tree.query(probe, 6)) == expected
+
+def test_differences_become_anomalies_of_later_record():
+    index = DuplicateIndex(radius=4)
+    first = hashed_record("a/original.jpg", 0xF0F0, software="Camera 1.0")
+    later = hashed_record("b/copy.jpg", 0xF0F1, software="Adobe Photoshop", datetime="2021:01:01 00:00:00")
+    assert index.add_record(first) == []
+    anomalies = index.add_record(later)
+    assert len(anomalies) == 1
+    assert "original.jpg" in anomalies[0] and "software" in anomalies[0] and "datetime" in anomalies[0]
+    assert later["anomalies"] == ["Missing author."] + anomalies
+    assert later["risk_score"] == 40
+    assert first["anomalies"] == ["Missing author."] and first["risk_score"] == 20
+    assert index.findings[0]["differences"] == ["software", "datetime"]
+
+def test_identical_metadata_is_not_an_anomaly():
+    index = DuplicateIndex()
+    index.add_record(hashed_record("a.jpg", 0x1234))
+    record = hashed_record("b.jpg", 0x1234)
+    assert index.add_record(record) == []
+    assert record["risk_score"] == 20
+    assert index.pairs == 1  # Still listed in the report
+
+def test_findings_are_capped(tmp_path, monkeypatch):
+    monkeypatch.setattr(phash, "MAX_FINDINGS", 5)
+    index = DuplicateIndex()
+    records = [hashed_record(f"img_{i:02d}.jpg", 0xABCD, software=f"Tool {i}") for i in range(8)]
+    for record in records:
+        index.add_record(record)
+    assert index.pairs == 28  # Every pair of the 8 copies
+    assert len(index.findings) == 5
+    # Each record carries at most MAX_RECORD_FINDINGS of its matches
+    assert len(records[-1]["anomalies"]) == 1 + phash.MAX_RECORD_FINDINGS
+    with open(index.write_report(str(tmp_path)), encoding="utf-8") as f:
+        report = f.read()
+    assert "Near-duplicate pairs: 28" in report
+    assert "... 23 more pair(s) not listed." in report
+
+def test_unhashed_record_is_skipped():
+    index = DuplicateIndex()
+    record = {"path": "x.jpg", "metadata": {"dhash": "Unknown"}, "anomalies": [], "risk_score": 0}
+    assert index.add_record(record) == []
+    assert index.tree.size == 0
@@ -0,0 +1,153 @@
+import io
+import os
+import sys
+import asyncio
+
+import pytest
+
+# Project root (parent of this file's dir)
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+for path in (PROJECT_ROOT, TESTS_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)  # Ensure local modules and seeds import
+
+from modules import ela
+from modules import pipeline as pipeline_module
+from modules.pipeline import ScanPipeline, scan_bytes, scan_paths
+from test_fuzz_parsers import jpeg_seed, pdf_seed
+
+def make_folder(root, count):
+    os.makedirs(root, exist_ok=True)
+    for i in range(count):
+        with open(os.path.join(root, f"img_{i:03d}.jpg"), 'wb') as f:
+            f.write(jpeg_seed())
+    with open(os.path.join(root, "notes.txt"), 'w') as f:
+        f.write("not scanned")
+    return sorted(os.path.join(root, f"img_{i:03d}.jpg") for i in range(count))
+
+def clean_jpeg():
+    # The seed with camera firmware in place of the Photoshop Software tag
+    return jpeg_seed().replace(b"Adobe Photoshop 22.0\x00", b"Firmware Version 1.1\x00")
+
+def test_ela_skips_clean_jpeg(tmp_path):
+    options = {"ela": {"heatmap_dir": str(tmp_path)}}
+    record = scan_bytes("clean.jpg", "jpg", clean_jpeg(), options)
+    assert record["anomalies"]  # Missing author etc. alone must not select the file
+    assert "ela_status" not in record["metadata"]
+
+def test_ela_runs_on_editor_signature(tmp_path):
+    options = {"ela": {"heatmap_dir": str(tmp_path)}}
+    record = scan_bytes("edited.jpg", "jpg", jpeg_seed(), options)
+    assert record["metadata"]["ela_reason"] == "software: Adobe Photoshop"
+    assert "ela_status" in record["metadata"]
+
+def test_ela_runs_on_trailing_payload(tmp_path):
+    options = {"ela": {"heatmap_dir": str(tmp_path)}}
+    record = scan_bytes("payload.jpg", "jpg", clean_jpeg() + b"PK\x03\x04", options)
+    assert record["metadata"]["ela_reason"] == "data after EOI"
+
+def test_ela_all_runs_on_clean_jpeg(tmp_path):
+    options = {"ela": {"heatmap_dir": str(tmp_path), "all": True}}
+    record = scan_bytes("clean.jpg", "jpg", clean_jpeg(), options)
+    assert "ela_status" in record["metadata"]
+
+def test_ela_skips_images_over_the_pixel_cap(tmp_path):
+    pytest.importorskip("numpy")
+    Image = pytest.importorskip("PIL.Image")
+    buf = io.BytesIO()
+    Image.new("RGB", (96, 64), (120, 60, 30)).save(buf, "JPEG", quality=95)
+    result = ela.error_level_analysis(buf.getvalue(), max_pixels=96 * 64 - 1)
+    assert result["ela_status"] == f"skipped (image has {96 * 64} pixels, limit {96 * 64 - 1})"
+    assert result["ela_score"] == "Unknown"
+    result = ela.error_level_analysis(buf.getvalue(), max_pixels=96 * 64, tile=32)
+    assert result["ela_status"] == "ok" and result["ela_score"] == 0.0
+    options = {"ela": {"heatmap_dir": str(tmp_path), "all": True, "max_pixels": 100}}
+    assert scan_bytes("big.jpg", "jpg", buf.getvalue(), options)["metadata"]["ela_status"].startswith("skipped")
+
+def test_heatmap_names_differ_by_folder():
+    assert ela.heatmap_path_for("/a/IMG_1.jpg") != ela.heatmap_path_for("/b/IMG_1.jpg")
+
+def test_queues_stay_bounded(tmp_path):
+    make_folder(str(tmp_path), 40)
+    pipeline = ScanPipeline(read_concurrency=2, workers=1, queue_size=2)
+    delivered = []
+    peaks = {"depth": 0, "in_flight": 0}
+
+    def on_result(record):
+        delivered.append(record["path"])
+        stats = pipeline.stats()
+        peaks["depth"] = max([peaks["depth"]] + list(stats["queue_depths"].values()))
+        # Files found but not yet delivered: held by a stage or a queue
+        peaks["in_flight"] = max(peaks["in_flight"], stats["found"] - stats["skipped"] - len(delivered))
+
+    stats = asyncio.run(pipeline.run([str(tmp_path)], on_result))
+    assert stats["extracted"] == 40 and stats["skipped"] == 1
+    assert peaks["depth"] <= 2
+    # readers + workers + three queues + the path the walker is waiting to put
+    assert peaks["in_flight"] <= 2 + 1 + 3 * 2 + 1
+
+def test_every_file_delivered_once_in_walk_order(tmp_path):
+    expected = make_folder(str(tmp_path), 12)
+    delivered = []
+    scan_paths([str(tmp_path)], lambda record: delivered.append(record["path"]),
+               read_concurrency=1, workers=1, queue_size=4)
+    # One reader and one worker keep the sorted walk order
+    assert delivered == expected
+
+    delivered = []
+    scan_paths([str(tmp_path)], lambda record: delivered.append(record["path"]),
+               read_concurrency=4, workers=2, queue_size=1)
+    assert sorted(delivered) == expected
+
+def test_child_records(tmp_path):
+    path = str(tmp_path / "report.pdf")
+    with open(path, 'wb') as f:
+        f.write(pdf_seed())
+    records = []
+    scan_paths([path], records.append, workers=1)
+    assert len(records) == 1
+    children = records[0]["children"]
+    assert [c["path"] for c in children] == [path + "#obj4"]
+    child = children[0]
+    assert child["parent"] == path and child["file_type"] == "jpg"
+    assert child["metadata"]["camera_model"] == "EOS 80D"
+    assert child["risk_score"] == min(20 * len(child["anomalies"]), 100)
+    assert "embedded_images" not in records[0]["metadata"]
+
+def test_only_supported_files_are_read_in_full(tmp_path, monkeypatch):
+    files = {"clip.mp4": b"\x00\x00\x00\x18ftypmp42" + b"\x00" * 4096,
+             "renamed.jpg": b"%PDF-1.4" + b"\x00" * 4096,   # Extension and header disagree
+             "big.pdf": pdf_seed() + b"\x00" * 4096,
+             "photo.jpg": jpeg_seed()}
+    for name, data in files.items():
+        (tmp_path / name).write_bytes(data)
+    reads = []
+    real_open = open
+
+    class CountingFile:
+        def __init__(self, f):
+            self.f = f
+        def __enter__(self):
+            return self
+        def __exit__(self, *exc):
+            self.f.close()
+        def fileno(self):
+            return self.f.fileno()
+        def read(self, n=-1):
+            data = self.f.read(n)
+            reads.append((os.path.basename(self.f.name), len(data)))
+            return data
+
+    monkeypatch.setattr(pipeline_module, "open", lambda path, mode: CountingFile(real_open(path, mode)), raising=False)
+    records = []
+    stats = scan_paths([str(tmp_path)], records.append, workers=1, max_bytes=len(pdf_seed()) + 1024)
+    assert stats["skipped"] == 2 and stats["aborted"] == 1 and stats["extracted"] == 1
+    assert _totals(reads) == {"big.pdf": 16, "clip.mp4": 16, "renamed.jpg": 16, "photo.jpg": len(jpeg_seed())}
+    assert [r["metadata"]["camera_model"] for r in records if r["path"].endswith("photo.jpg")] == ["EOS 80D"]
+
+def _totals(reads):
+    totals = {}
+    for name, size in reads:
+        totals[name] = totals.get(name, 0) + size
+    return totals
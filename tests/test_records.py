@@ -0,0 +1,63 @@
+import os
+import sys
+import json
+import pickle
+
+# Project root (parent of this file's dir)
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+for path in (PROJECT_ROOT, TESTS_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)  # Ensure local modules and seeds import
+
+from modules.records import UNKNOWN, CompactRecord, JpgMetadata, compact_record
+from modules.pipeline import scan_bytes
+from test_fuzz_parsers import jpeg_seed, png_seed, pdf_seed, docx_seed
+
+SEEDS = {"jpg": jpeg_seed, "png": png_seed, "pdf": pdf_seed, "docx": docx_seed}
+
+def seed_records():
+    records = [scan_bytes(f"case/seed.{file_type}", file_type, seed()) for file_type, seed in SEEDS.items()]
+    records.append({"path": "case/notes.txt", "file_type": "txt", "metadata": {"size": 3},
+                    "anomalies": [], "risk_score": 0})
+    return records
+
+def test_unknown_sentinel_survives_pickle():
+    for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+        assert pickle.loads(pickle.dumps(UNKNOWN, protocol)) is UNKNOWN
+
+def test_records_round_trip_through_pickle():
+    for record in seed_records():
+        compact = compact_record(record)
+        for protocol in (2, pickle.HIGHEST_PROTOCOL):
+            restored = pickle.loads(pickle.dumps(compact, protocol))
+            assert isinstance(restored, CompactRecord)
+            assert restored.to_dict() == record
+            # Key order is kept for reports
+            assert list(restored.to_dict()["metadata"]) == list(record["metadata"])
+
+def test_unpickled_metadata_shares_the_sentinel():
+    record = scan_bytes("case/seed.jpg", "jpg", jpeg_seed())
+    restored = pickle.loads(pickle.dumps(compact_record(record)))
+    unknown = [field for field, value in record["metadata"].items() if value == "Unknown"]
+    assert unknown
+    assert isinstance(restored.metadata, JpgMetadata)
+    assert all(getattr(restored.metadata, field) is UNKNOWN for field in unknown)
+    assert restored.metadata.get(unknown[0]) == "Unknown"
+
+def test_records_round_trip_through_json():
+    for record in seed_records():
+        line = json.dumps(compact_record(record).to_dict(), ensure_ascii=False, default=str)
+        assert line == json.dumps(record, ensure_ascii=False, default=str)
+        assert compact_record(json.loads(line)).to_dict() == json.loads(line)
+
+def test_children_and_extra_keys_round_trip():
+    record = scan_bytes("case/seed.pdf", "pdf", pdf_seed())
+    assert record["children"]  # The seed embeds a JPEG
+    record["metadata"]["dhash"] = "00ff00ff00ff00ff"  # Not one of the PDF fields
+    compact = pickle.loads(pickle.dumps(compact_record(record)))
+    child = compact.children[0]
+    assert child.to_dict() == record["children"][0]
+    assert child.to_dict()["parent"] == "case/seed.pdf"
+    assert compact.metadata.get("dhash") == "00ff00ff00ff00ff"
+    assert compact.to_dict() == record
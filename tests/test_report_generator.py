@@ -0,0 +1,43 @@
+import os
+import sys
+
+# Project root (parent of this file's dir)
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)  # Ensure local modules import
+
+from modules.report_generator import generate_report
+
+def first_line(report_file):
+    with open(report_file, 'r', encoding='utf-8') as f:
+        return f.readline().strip()
+
+def test_child_report_names_use_the_parent(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    parent = os.path.join("cases", "case#1", "scan.pdf")
+    child = generate_report(parent + "#obj4", {}, [], echo=False, parent=parent)
+    assert first_line(child) == "File: scan.pdf#obj4"
+    assert os.path.basename(child).startswith("forensic_report_scan_obj4_")
+
+def test_hash_in_folder_name_is_not_a_member(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    report = generate_report(os.path.join("cases", "case#1", "a.jpg"), {}, [], echo=False)
+    assert first_line(report) == "File: a.jpg"
+    assert os.path.basename(report).startswith("forensic_report_a_")
+
+def test_same_name_in_different_folders(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    first = generate_report(os.path.join("a", "IMG_0001.jpg"), {}, [], echo=False)
+    second = generate_report(os.path.join("b", "IMG_0001.jpg"), {}, [], echo=False)
+    assert first != second
+    assert sorted(os.listdir("reports")) == sorted([os.path.basename(first), os.path.basename(second)])
+
+def test_lists_are_listed_one_item_per_line(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    history = ["2021-05-01T10:20:30 created (Adobe Photoshop 22.0)", "2024-02-03T08:00:00 saved [/]"]
+    report = generate_report("a.jpg", {"xmp_history": history, "crc_error_chunks": []}, [], echo=False)
+    with open(report, 'r', encoding='utf-8') as f:
+        text = f.read()
+    assert "  - Xmp_history:\n      2021-05-01T10:20:30 created (Adobe Photoshop 22.0)\n      2024-02-03T08:00:00 saved [/]\n" in text
+    assert "  - Crc_error_chunks: None\n" in text
+    assert "['" not in text
@@ -0,0 +1,119 @@
+import os
+import sys
+import json
+
+import pytest
+
+# Project root (parent of this file's dir)
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+for path in (PROJECT_ROOT, TESTS_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)  # Ensure local modules and seeds import
+
+from modules.search_index import MetadataIndex, parse_query
+from modules.pipeline import scan_bytes
+from test_fuzz_parsers import docx_seed, pdf_seed
+
+def record(path, file_type="pdf", risk=0, **metadata):
+    return {"path": path, "file_type": file_type, "risk_score": risk,
+            "anomalies": ["Producer differs from creator."] if risk else [], "metadata": metadata}
+
+RECORDS = [
+    record("case/report.pdf", risk=40, author="J. Smith", producer="iText 5.5.13",
+           created="D:20210301101500Z", modified="D:20240110090000+01'00'"),
+    record("case/x.pdf", author="Sean O'Brien", producer="Microsoft® Word 2016",
+           created="D:20190615120000Z", modified="Unknown"),
+    record("case/memo.docx", "docx", risk=20, author="Anna Smithson", created_by="Microsoft Office Word",
+           created="2023-02-01T08:00:00Z", modified="2023-02-02T08:00:00Z"),
+    record("case/IMG_0001.jpg", "jpg", risk=60, make="Canon", camera_model="EOS 80D",
+           software="Adobe Photoshop 22.0", datetime="2021:05:01 10:20:30", lens_model="EF 50mm"),
+]
+
+@pytest.fixture
+def index(tmp_path):
+    index = MetadataIndex(str(tmp_path / "index.sqlite"))
+    for item in RECORDS:
+        index.add_record(item)
+    index.commit()
+    yield index
+    index.close()
+
+def paths(rows):
+    return sorted(row["path"] for row in rows)
+
+def test_field_queries(index):
+    assert paths(index.query("author:Smith")) == ["case/report.pdf"]
+    assert paths(index.query("author:Smith*")) == ["case/memo.docx", "case/report.pdf"]
+    assert paths(index.query('author:"J. Smith" AND producer:iText')) == ["case/report.pdf"]
+    assert paths(index.query("producer:iText OR created_by:word")) == ["case/memo.docx", "case/report.pdf"]
+    assert paths(index.query("camera_model:EOS")) == ["case/IMG_0001.jpg"]
+    assert paths(index.query("EF 50mm")) == ["case/IMG_0001.jpg"]  # Other fields, via the catch-all column
+    assert index.query("author:Canon") == []
+
+def test_punctuation_in_terms(index):
+    assert paths(index.query("iText 5.5")) == ["case/report.pdf"]
+    assert paths(index.query("x.pdf")) == ["case/x.pdf"]
+    assert paths(index.query("author:O'Brien")) == ["case/x.pdf"]
+    assert paths(index.query("Microsoft® Word")) == ["case/memo.docx", "case/x.pdf"]
+    assert paths(index.query('producer:"5.5.13" (iText')) == ["case/report.pdf"]
+    for text in ("- * :", '"', "unknown:field value", "AND OR NOT", "a AND NOT"):
+        index.query(text)  # No FTS5 syntax errors
+
+def test_negation(index):
+    assert paths(index.query("NOT author:Smith")) == ["case/IMG_0001.jpg", "case/memo.docx", "case/x.pdf"]
+    assert paths(index.query("NOT author:Smith type:pdf")) == ["case/x.pdf"]
+    assert paths(index.query("NOT producer:iText Microsoft")) == ["case/memo.docx", "case/x.pdf"]
+    assert paths(index.query("Microsoft NOT author:Anna")) == ["case/x.pdf"]
+    assert paths(index.query("Microsoft AND NOT author:Anna")) == ["case/x.pdf"]
+
+def test_date_filters(index):
+    assert paths(index.query("created after 2021")) == ["case/memo.docx", "case/report.pdf"]
+    assert paths(index.query("created before 2021-03-01")) == ["case/x.pdf"]
+    assert paths(index.query("created after 2021-03-01 AND created before 2021-03-02")) == ["case/report.pdf"]
+    assert paths(index.query("modified after 2024-01-10")) == ["case/report.pdf"]  # 08:00 UTC
+    assert paths(index.query("modified before 2024")) == ["case/memo.docx"]  # Unknown is not indexed
+    assert paths(index.query("captured after 2021-05 AND captured before 2021-06")) == ["case/IMG_0001.jpg"]
+    assert paths(index.query("author:Smith* AND created after 2022")) == ["case/memo.docx"]
+
+def test_type_and_risk_filters(index):
+    assert paths(index.query("type:pdf")) == ["case/report.pdf", "case/x.pdf"]
+    assert paths(index.query("type:PDF AND risk>=40")) == ["case/report.pdf"]
+    assert paths(index.query("risk > 20")) == ["case/IMG_0001.jpg", "case/report.pdf"]
+    assert paths(index.query("risk=0")) == ["case/x.pdf"]
+    assert paths(index.query("Microsoft type:docx")) == ["case/memo.docx"]
+    assert index.query("risk>=20", limit=2) == index.query("risk>=20")[:2]
+
+def test_parse_query_splits_filters():
+    match, conditions, params = parse_query("type:jpg AND make:Canon AND risk>=40 AND captured before 2022")
+    assert match == 'make : "Canon"'
+    assert conditions == ["files.captured < ?", "files.file_type = ?", "files.risk_score >= ?"]
+    assert params == ["2022-01-01T00:00:00", "jpg", 40]
+    assert parse_query("iText 5.5*")[0] == '"iText" "5.5"*'
+    assert parse_query("foo:bar")[0] == '"foo:bar"'
+
+def test_re_adding_a_path_replaces_its_rows(index):
+    assert len(index) == 4
+    index.add_record(record("case/report.pdf", risk=0, author="K. Jones", producer="LibreOffice 7.1"))
+    index.commit()
+    assert len(index) == 4
+    assert index.query("author:Smith") == []
+    rows = index.query("author:Jones")
+    assert [(row["path"], row["risk_score"], row["created"]) for row in rows] == [("case/report.pdf", 0, None)]
+    fts_rows = index.conn.execute("SELECT COUNT(*) FROM fields").fetchone()[0]
+    assert fts_rows == 4
+
+def test_records_file_with_children(tmp_path):
+    results = tmp_path / "records.jsonl"
+    items = [scan_bytes("case/seed.pdf", "pdf", pdf_seed()), scan_bytes("case/seed.docx", "docx", docx_seed())]
+    results.write_text("".join(json.dumps(item) + "\n" for item in items * 2), encoding="utf-8")
+    index = MetadataIndex(str(tmp_path / "index.sqlite"))
+    try:
+        assert index.add_records_file(str(results)) == 4
+        children = sum(len(item.get("children", [])) for item in items)
+        assert len(index) == 2 + children  # The second copy replaced the first
+        assert paths(index.query("camera_model:EOS")) == sorted(
+            child["path"] for item in items for child in item.get("children", [])
+            if child["metadata"].get("camera_model") == "EOS 80D")
+    finally:
+        index.close()
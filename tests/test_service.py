@@ -0,0 +1,127 @@
+import os
+import sys
+import json
+import threading
+import http.client
+
+import pytest
+
+# Project root (parent of this file's dir)
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+for path in (PROJECT_ROOT, TESTS_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)  # Ensure local modules and seeds import
+
+from modules import service as service_module
+from modules.service import ScanService, make_server, is_loopback, is_loopback_host
+from test_fuzz_parsers import jpeg_seed
+
+@pytest.fixture(scope="module")
+def server():
+    service = ScanService(workers=1, max_bytes=1024 * 1024)
+    httpd = make_server(service, "127.0.0.1", 0)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+    service.close()
+
+def post(server, body, content_type="application/json", headers=None):
+    conn = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=60)
+    all_headers = {"Content-Type": content_type}
+    all_headers.update(headers or {})
+    if "Content-Length" in all_headers or "Host" in all_headers:
+        all_headers.setdefault("Content-Length", str(len(body)))
+        conn.putrequest("POST", "/scan", skip_host="Host" in all_headers)
+        for key, value in all_headers.items():
+            conn.putheader(key, value)
+        conn.endheaders()
+        conn.send(body)
+    else:
+        conn.request("POST", "/scan", body=body, headers=all_headers)
+    response = conn.getresponse()
+    payload = json.loads(response.read())
+    conn.close()
+    return response.status, payload
+
+def test_scans_paths(server, tmp_path):
+    photo = tmp_path / "photo.jpg"
+    photo.write_bytes(jpeg_seed())
+    status, payload = post(server, json.dumps({"paths": [str(photo)]}).encode())
+    assert status == 200
+    assert payload["results"][0]["metadata"]["make"] == "Canon"
+
+@pytest.mark.parametrize("body", [{"paths": [3]}, {"paths": "abc"}, {"paths": [None]}, {"paths": [""]}, {"files": []}])
+def test_rejects_non_string_paths(server, body):
+    status, _payload = post(server, json.dumps(body).encode())
+    assert status == 400
+    # The service must still work afterwards (fd 3 was not closed)
+    status, _payload = post(server, jpeg_seed(), content_type="application/octet-stream")
+    assert status == 200
+
+@pytest.mark.parametrize("length", ["-1", "abc"])
+def test_rejects_bad_content_length(server, length):
+    status, _payload = post(server, b"", headers={"Content-Length": length})
+    assert status == 400
+
+def test_rejects_oversized_bodies(server):
+    status, _payload = post(server, b"", content_type="application/octet-stream",
+                            headers={"Content-Length": str(2 * 1024 * 1024)})
+    assert status == 413
+
+def test_refuses_non_loopback_without_opt_in():
+    assert is_loopback("127.0.0.1") and is_loopback("::1") and is_loopback("localhost")
+    assert not is_loopback("0.0.0.0") and not is_loopback("192.0.2.10")
+    with pytest.raises(ValueError):
+        make_server(None, "0.0.0.0", 0)
+
+def test_rejects_foreign_host_header(server, tmp_path):
+    photo = tmp_path / "photo.jpg"
+    photo.write_bytes(jpeg_seed())
+    body = json.dumps({"paths": [str(photo)]}).encode()
+    status, payload = post(server, body, headers={"Host": "attacker.example:8765"})
+    assert status == 403 and "results" not in payload
+    for host in ("localhost:8765", "127.0.0.1", "[::1]:8765", "LOCALHOST."):
+        status, _payload = post(server, body, headers={"Host": host})
+        assert status == 200, host
+
+def test_loopback_host_names():
+    assert is_loopback_host("127.0.0.5:80") and is_loopback_host("[::1]") and is_loopback_host("app.localhost")
+    assert not is_loopback_host(None) and not is_loopback_host("")
+    assert not is_loopback_host("localhost.attacker.example") and not is_loopback_host("[::ffff:c000:20a]:80")
+    assert not is_loopback_host("192.0.2.10:8765")
+
+def test_slot_is_taken_before_the_body_is_read(monkeypatch):
+    monkeypatch.setattr(service_module, "QUEUE_WAIT", 0.3)
+    service = ScanService(workers=1, max_concurrent=1)
+    httpd = make_server(service, "127.0.0.1", 0)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    try:
+        # The first upload sends its headers and stalls before the body
+        slow = http.client.HTTPConnection("127.0.0.1", httpd.server_port, timeout=60)
+        slow.putrequest("POST", "/scan?name=photo.jpg")
+        slow.putheader("Content-Type", "application/octet-stream")
+        slow.putheader("Content-Length", str(len(jpeg_seed())))
+        slow.endheaders()
+        deadline = 50
+        while service.slots._value and deadline:
+            threading.Event().wait(0.05)
+            deadline -= 1
+        assert service.slots._value == 0  # Held while the body is still unread
+
+        status, _payload = post(httpd, jpeg_seed(), content_type="application/octet-stream")
+        assert status == 503
+        assert service.stats()["rejected"] == 1
+
+        slow.send(jpeg_seed())
+        response = slow.getresponse()
+        assert response.status == 200
+        assert json.loads(response.read())["results"][0]["metadata"]["make"] == "Canon"
+        slow.close()
+        assert service.slots._value == 1
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+        service.close()
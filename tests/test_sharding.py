@@ -0,0 +1,103 @@
+import os
+import sys
+import struct
+import subprocess
+
+# Project root (parent of this file's dir)
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+for path in (PROJECT_ROOT, TESTS_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)  # Ensure local modules and seeds import
+
+from modules.sharding import plan_shards
+from test_fuzz_parsers import jpeg_seed, png_seed, pdf_seed, docx_seed, _png_chunk
+
+MAIN = os.path.join(PROJECT_ROOT, "main.py")
+SHARDS = 3
+
+def make_corpus(root):
+    # A few files of every type, with sizes spread by padding
+    os.makedirs(os.path.join(root, "sub"), exist_ok=True)
+    for i in range(6):
+        pad = b"x" * (i * 3000)
+        com = b"\xff\xfe" + struct.pack(">H", len(pad) + 2) + pad
+        jpeg = jpeg_seed()
+        with open(os.path.join(root, f"photo_{i}.jpg"), 'wb') as f:
+            f.write(jpeg[:2] + com + jpeg[2:])
+        png = png_seed()
+        if i == 5:  # Same pixels as the others, different Software: a near-duplicate finding
+            png = png.replace(_png_chunk(b"tEXt", b"Software\x00GIMP 2.10"), _png_chunk(b"tEXt", b"Software\x00Paint.NET"))
+        with open(os.path.join(root, "sub", f"shot_{i}.png"), 'wb') as f:
+            f.write(png[:33] + _png_chunk(b"tEXt", b"Comment\x00" + pad) + png[33:])
+    for i in range(3):
+        with open(os.path.join(root, f"report_{i}.pdf"), 'wb') as f:
+            f.write(pdf_seed() + b"%" + b"y" * (i * 5000) + b"\n")
+        with open(os.path.join(root, "sub", f"letter_{i}.docx"), 'wb') as f:
+            f.write(docx_seed())
+    with open(os.path.join(root, "notes.txt"), 'w') as f:
+        f.write("not scanned")
+
+def cli(cwd, *args):
+    return subprocess.Popen([sys.executable, MAIN, *args], cwd=cwd,
+                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+
+def finish(process):
+    output = process.communicate(timeout=300)[0].decode(errors="replace")
+    assert process.returncode == 0, output
+    return output
+
+def sharded_case(tmp_path, corpus, shards, case_name):
+    # Plan, run every shard as its own process (concurrently), then merge
+    shard_dir = str(tmp_path / f"shards_{shards}")
+    finish(cli(tmp_path, "--plan-shards", str(shards), "--scan", corpus, "--shard-dir", shard_dir))
+    manifests = sorted(os.path.join(shard_dir, name) for name in os.listdir(shard_dir) if name.endswith(".json"))
+    assert len(manifests) == shards
+    workers = [cli(tmp_path, "--run-shard", m, "--workers", "1", "--readers", "2", "--dupes") for m in manifests]
+    for worker in workers:
+        finish(worker)
+    case_dir = str(tmp_path / case_name)
+    finish(cli(tmp_path, "--merge-shards", shard_dir, "--case-dir", case_dir))
+    return case_dir
+
+def read_case(case_dir):
+    # Merged outputs minus the "Generated on" lines
+    outputs = {}
+    for name in sorted(os.listdir(case_dir)):
+        if name == "case.json":
+            continue
+        with open(os.path.join(case_dir, name), 'r', encoding='utf-8') as f:
+            lines = [line for line in f if not line.startswith("Generated on:")]
+        outputs[name.split("_2")[0]] = lines  # Drop report timestamps from the name
+    return outputs
+
+def test_plan_balances_bytes_and_types(tmp_path):
+    corpus = str(tmp_path / "corpus")
+    make_corpus(corpus)
+    shards = plan_shards([corpus], SHARDS)
+    assert sum(len(s["files"]) for s in shards) == 18  # notes.txt is not planned
+    largest = max(entry[2] for s in shards for entry in s["files"])
+    totals = [s["bytes"] for s in shards]
+    assert max(totals) - min(totals) <= largest
+    for file_type in ("jpg", "png", "pdf", "docx"):
+        assert all(s["bytes_by_type"].get(file_type) for s in shards), file_type
+    assert shards == plan_shards([corpus], SHARDS)  # Same corpus, same plan
+
+def test_sharded_scan_matches_single_shard(tmp_path):
+    corpus = str(tmp_path / "corpus")
+    make_corpus(corpus)
+    sharded = read_case(sharded_case(tmp_path, corpus, SHARDS, "case_sharded"))
+    single = read_case(sharded_case(tmp_path, corpus, 1, "case_single"))
+    assert len(sharded["records.jsonl"]) == 18
+    paths = [line.split('"path": "', 1)[1].split('"', 1)[0] for line in sharded["records.jsonl"]]
+    assert paths == sorted(paths)
+    assert sharded == single
+    # The near-duplicate found across shards is on shot_5's record and in the summary
+    flagged = [line for line in sharded["records.jsonl"] if "Near-duplicate of" in line]
+    assert len(flagged) == 1 and "shot_5.png" in flagged[0]
+    assert any("Near-duplicate of" in line for line in sharded["corpus_summary"])
+
+    # Merging the same shards again gives the same case
+    again = str(tmp_path / "case_again")
+    finish(cli(tmp_path, "--merge-shards", str(tmp_path / f"shards_{SHARDS}"), "--case-dir", again))
+    assert read_case(again) == sharded
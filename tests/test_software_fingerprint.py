@@ -0,0 +1,127 @@
+import os
+import sys
+import random
+
+# Project root (parent of this file's dir)
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+for path in (PROJECT_ROOT, TESTS_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)  # Ensure local modules and seeds import
+
+from modules import metadata_jpg, metadata_pdf, metadata_png
+from modules.software_fingerprint import Matcher, identify
+
+# The substring chains the signature table replaced, kept as the reference
+def old_image(sw):
+    s = sw.lower()
+    if "snapseed" in s:   return "Google Snapseed"
+    if "photoshop" in s:  return "Adobe Photoshop"
+    if "lightroom" in s:  return "Adobe Lightroom"
+    if "instagram" in s:  return "Instagram"
+    if "whatsapp" in s:   return "WhatsApp (metadata stripped)"
+    if "gimp" in s:       return "GIMP"
+    if "apple" in s and "photos" in s: return "Apple Photos"
+    return None
+
+def old_pdf(s):
+    sl = s.lower()
+    if "microsoft word" in sl: return "Microsoft Word"
+    if "word" in sl and "microsoft" in sl: return "Microsoft Word"
+    if "adobe acrobat" in sl: return "Adobe Acrobat"
+    if "acrobat" in sl:       return "Adobe Acrobat"
+    if "distiller" in sl:     return "Adobe Distiller"
+    if "libreoffice" in sl:   return "LibreOffice"
+    if "google docs" in sl:   return "Google Docs"
+    if "mac os x" in sl or "quartz" in sl: return "Apple Quartz PDFContext"
+    if "itext" in sl:         return "iText"
+    if "wkhtmltopdf" in sl:   return "wkhtmltopdf"
+    if "prince" in sl:        return "Prince"
+    if "ghostscript" in sl:   return "Ghostscript"
+    return None
+
+# Words the chains test for, words only the new table knows, and filler
+TOKENS = ["Snapseed", "Adobe Photoshop CC", "Lightroom", "Instagram", "WhatsApp", "GIMP 2.10", "Apple",
+          "Photos", "Microsoft", "Word", "Microsoft® Word 2016", "Adobe Acrobat Pro", "Acrobat Distiller",
+          "LibreOffice 7.1", "Google Docs", "Mac OS X 10.15 Quartz PDFContext", "iText 5.5", "wkhtmltopdf",
+          "Prince 14", "GPL Ghostscript 9.5", "Excel", "Paint.NET", "ImageMagick", "Telegram", "Foxit",
+          "pdfTeX-1.40", "Canon", "EOS", "v1.2", "(Windows)", "for", "-", "PHOTOS", "wOrD"]
+
+def sample_strings(count=4000, seed=38):
+    rng = random.Random(seed)
+    for _ in range(count):
+        tokens = rng.sample(TOKENS, rng.randint(1, 4))
+        yield rng.choice([" ", "", "/"]).join(tokens)
+
+def test_image_priority_matches_old_chain():
+    for text in sample_strings():
+        old = old_image(text)
+        new = identify(text, "image")
+        if old is not None:
+            assert new == old, text
+        else:
+            assert new not in {old_image(t) for t in TOKENS} - {None}, text
+
+def test_pdf_priority_matches_old_chain():
+    for text in sample_strings():
+        old = old_pdf(text)
+        if old is not None:
+            assert identify(text, "pdf") == old, text
+
+def test_extractor_normalizers_keep_fallbacks():
+    assert metadata_png._normalize_software("Custom Tool 3") == "Custom Tool 3"
+    assert metadata_png._normalize_software("Adobe Photoshop 22.0 (Windows)") == "Adobe Photoshop"
+    assert metadata_pdf._normalize_app("Unknown") == "Unknown"
+    assert metadata_pdf._normalize_app("In-house Generator") == "In-house Generator"
+    assert metadata_pdf._normalize_app("Microsoft® Word for Microsoft 365") == "Microsoft Word"
+    assert metadata_jpg._normalize_software("Snapseed 2.0 with Photoshop") == "Google Snapseed"
+    assert metadata_jpg._normalize_software("14.4.1", make="Apple") == "Apple iOS 14.4.1 (Photos)"
+    assert metadata_jpg._normalize_software("14.4.1", make="Canon") == "14.4.1"
+
+def test_matcher_finds_overlapping_terms():
+    # Classic Aho-Corasick case: terms that are suffixes/prefixes of one another
+    terms = ["he", "she", "his", "hers", "s"]
+    matcher = Matcher([{"label": t, "match": [t]} for t in terms])
+    rng = random.Random(4)
+    for _ in range(500):
+        text = "".join(rng.choice("hers i") for _ in range(rng.randint(0, 20)))
+        found = {matcher.labels[i] for term_id in matcher.terms_in(text) for i in matcher.by_term[term_id]}
+        assert found == {t for t in terms if t in text}, text
+
+def test_all_terms_of_a_signature_are_required():
+    matcher = Matcher([{"label": "Both", "match": ["alpha", "beta"]}, {"label": "Alpha", "match": ["alpha"]}])
+    assert matcher.identify("ALPHA beta") == "Both"
+    assert matcher.identify("alpha only") == "Alpha"
+    assert matcher.identify("beta only") is None
+
+def brute_force(signatures, text):
+    # First signature, in table order, whose terms all occur in the text
+    text = text.lower()
+    for signature in signatures:
+        terms = [t.lower() for t in signature["match"] if t]
+        if terms and all(t in text for t in terms):
+            return signature["label"]
+    return None
+
+def test_large_generated_table():
+    # Thousands of versioned entries sharing prefixes, suffixes and digits,
+    # the shape a table with version strings and OS builds takes
+    rng = random.Random(38)
+    products = ["photoshop", "lightroom", "acrobat", "word", "excel", "ios", "android", "gimp",
+                "ffmpeg", "libjpeg", "windows", "mac os x", "itext", "pdftex", "quartz", "skia"]
+    signatures = []
+    for i in range(5000):
+        product = rng.choice(products)
+        version = ".".join(str(rng.randrange(0, 30)) for _ in range(rng.randint(1, 3)))
+        terms = [f"{product} {version}"] if rng.random() < 0.7 else [product, f"build {rng.randrange(100, 999)}"]
+        if rng.random() < 0.1:
+            terms.append(rng.choice(products))
+        signatures.append({"label": f"sig{i}", "match": terms})
+    matcher = Matcher(signatures)
+    assert len(matcher.labels) == 5000
+    for _ in range(1500):
+        words = [rng.choice(products + ["build", "v", "(x64)", "/"]) for _ in range(rng.randint(1, 4))]
+        words += [".".join(str(rng.randrange(0, 30)) for _ in range(rng.randint(1, 3))), str(rng.randrange(100, 999))]
+        rng.shuffle(words)
+        text = " ".join(words)
+        assert matcher.identify(text) == brute_force(signatures, text), text
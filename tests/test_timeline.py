@@ -0,0 +1,91 @@
+import os
+import sys
+import json
+import random
+
+# Project root (parent of this file's dir)
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+for path in (PROJECT_ROOT, TESTS_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)  # Ensure local modules and seeds import
+
+from modules.timeline import TimelineBuilder, merge_timelines, normalize_timestamp, query_range
+
+def records(count, seed=3):
+    # Records with shuffled EXIF and PDF dates, some sharing a timestamp
+    rng = random.Random(seed)
+    out = []
+    for i in range(count):
+        day, hour = rng.randrange(1, 29), rng.randrange(24)
+        out.append({"path": f"case/file_{i:04d}.jpg", "file_type": "jpg",
+                    "metadata": {"datetime": f"2021:03:{day:02d} {hour:02d}:00:00",
+                                 "created": f"D:202103{day:02d}{hour:02d}3000Z",
+                                 "modified": "Unknown"}})
+    return out
+
+def read_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+def test_offsets_are_converted_to_utc():
+    assert normalize_timestamp("D:20210501102030+02'00'") == "2021-05-01T08:20:30"
+    assert normalize_timestamp("D:20210501102030-05'30'") == "2021-05-01T15:50:30"
+    assert normalize_timestamp("D:20210501102030Z") == "2021-05-01T10:20:30"
+    assert normalize_timestamp("2021-05-01T23:20:30-02:00") == "2021-05-02T01:20:30"
+    assert normalize_timestamp("2021-05-01T10:20:30.25+01:00") == "2021-05-01T09:20:30"
+
+def test_values_without_offset_keep_wall_clock():
+    assert normalize_timestamp("D:20210501102030") == "2021-05-01T10:20:30"
+    assert normalize_timestamp("D:202105") == "2021-05-01T00:00:00"
+    assert normalize_timestamp("2021:05:01 10:20:30") == "2021-05-01T10:20:30"
+    assert normalize_timestamp("not a date") is None
+
+def test_spilled_runs_merge_to_sorted_timeline(tmp_path):
+    builder = TimelineBuilder(run_size=25, tmp_dir=str(tmp_path))
+    for record in records(200):
+        builder.add_record(record)
+    assert len(builder.runs) >= 7  # The external sort really spilled
+    out = builder.finish(str(tmp_path / "timeline.jsonl"))
+    events = read_jsonl(out)
+    assert len(events) == builder.events == 400
+    keys = [(e["timestamp"], e["path"], e["file_type"], e["field"], e["raw"]) for e in events]
+    assert keys == sorted(keys)
+
+    # Same events as an in-memory build
+    memory = TimelineBuilder(tmp_dir=str(tmp_path))
+    for record in records(200):
+        memory.add_record(record)
+    assert read_jsonl(memory.finish(str(tmp_path / "memory.jsonl"))) == events
+    assert [name for name in os.listdir(tmp_path) if name.startswith("timeline_run_")] == []
+
+def test_merge_timelines_interleaves(tmp_path):
+    parts = []
+    all_records = records(120)
+    for i, chunk in enumerate((all_records[:50], all_records[50:])):
+        builder = TimelineBuilder(run_size=10, tmp_dir=str(tmp_path))
+        for record in chunk:
+            builder.add_record(record)
+        parts.append(builder.finish(str(tmp_path / f"part_{i}.jsonl")))
+    whole = TimelineBuilder(tmp_dir=str(tmp_path))
+    for record in all_records:
+        whole.add_record(record)
+    expected = read_jsonl(whole.finish(str(tmp_path / "whole.jsonl")))
+    assert read_jsonl(merge_timelines(parts, str(tmp_path / "merged.jsonl"))) == expected
+
+def test_query_range_matches_filter(tmp_path):
+    for name in ("timeline.jsonl", "timeline.csv"):
+        builder = TimelineBuilder(run_size=30, tmp_dir=str(tmp_path))
+        for record in records(150, seed=11):
+            builder.add_record(record)
+        out = builder.finish(str(tmp_path / name))
+        events = list(query_range(out))
+        assert len(events) == 300
+        stamps = sorted({e["timestamp"] for e in events})
+        windows = [(stamps[0], stamps[-1]), (stamps[5], stamps[5]), (stamps[10], stamps[40]),
+                   ("2021:03:10 12:00:00", "2021-03-12T00:00:00"), ("2022:01:01 00:00:00", None)]
+        for start, end in windows:
+            lo = normalize_timestamp(start)
+            hi = normalize_timestamp(end) if end else None
+            expected = [e for e in events if e["timestamp"] >= lo and (hi is None or e["timestamp"] <= hi)]
+            assert list(query_range(out, start, end)) == expected, (name, start, end)
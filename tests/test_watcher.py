@@ -0,0 +1,148 @@
+import os
+import sys
+import shutil
+
+import pytest
+
+# Project root (parent of this file's dir)
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+for path in (PROJECT_ROOT, TESTS_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)  # Ensure local modules and seeds import
+
+from modules.watcher import FolderWatcher, SnapshotIndex, _Inotify, _EVENT_HEADER, _IN_Q_OVERFLOW
+from test_fuzz_parsers import jpeg_seed
+
+def drop(folder, name, data=None):
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, name)
+    with open(path, 'wb') as f:
+        f.write(jpeg_seed() if data is None else data)
+    return path
+
+@pytest.fixture
+def watch(tmp_path):
+    # Polling watcher over tmp_path/drop; yields (watcher, scanned paths)
+    root = str(tmp_path / "drop")
+    os.makedirs(root)
+    scanned = []
+    w = FolderWatcher([root], lambda record: scanned.append(record["path"]),
+                      index_path=str(tmp_path / "index.json"), use_inotify=False, workers=1)
+    yield w, scanned
+    w.close()
+
+def test_only_new_or_changed_files_are_scanned(watch):
+    w, scanned = watch
+    root = w.roots[0]
+    first = drop(root, "a.jpg")
+    drop(root, "notes.txt", b"not scanned")
+    assert sorted(w.run_cycle()) == sorted([first, os.path.join(root, "notes.txt")])
+    assert scanned == [first]
+    assert w.run_cycle() == []  # Skipped types are indexed too, so not read again
+
+    second = drop(root, "b.jpg")
+    with open(first, 'ab') as f:
+        f.write(b"\x00")
+    assert sorted(w.run_cycle()) == [first, second]
+    assert scanned == [first, first, second]
+
+def test_index_updated_after_each_record(watch):
+    w, _scanned = watch
+    path = drop(w.roots[0], "a.jpg")
+    seen = []
+    w.on_result = lambda record: seen.append(record["path"] in w.index.entries)
+    w.run_cycle()
+    assert seen == [False]  # Not indexed before the record was handled
+    assert path in w.index.entries
+    assert path in SnapshotIndex(w.index.index_path).entries
+
+def test_failed_result_leaves_file_unindexed(watch):
+    w, _scanned = watch
+    path = drop(w.roots[0], "a.jpg")
+    def broken(record):
+        raise RuntimeError("sink failed")
+    w.on_result = broken
+    with pytest.raises(RuntimeError):
+        w.run_cycle()
+    assert path not in w.index.entries  # Picked up again on the next cycle
+
+def test_one_pool_for_the_watcher_lifetime(watch):
+    w, scanned = watch
+    drop(w.roots[0], "a.jpg")
+    w.run_cycle()
+    pool = w.pool
+    drop(w.roots[0], "b.jpg")
+    w.run_cycle()
+    assert w.pool is pool and len(scanned) == 2
+    w.close()
+    assert w.pool is None
+
+def test_full_rescan_drops_removed_files(watch):
+    w, _scanned = watch
+    path = drop(os.path.join(w.roots[0], "sub"), "a.jpg")
+    w.run_cycle()
+    shutil.rmtree(os.path.dirname(path))
+    w.run_cycle()
+    assert path not in w.index.entries
+
+def test_moved_away_folder_is_forgotten(watch):
+    w, _scanned = watch
+    sub = os.path.join(w.roots[0], "sub")
+    inside = [drop(sub, "a.jpg"), drop(os.path.join(sub, "deeper"), "b.jpg")]
+    keep = drop(w.roots[0], "c.jpg")
+    w.run_cycle()
+    shutil.move(sub, os.path.join(os.path.dirname(w.roots[0]), "elsewhere"))
+    w.run_cycle({sub})
+    assert all(path not in w.index.entries for path in inside)
+    assert keep in w.index.entries
+
+def test_index_saved_only_when_changed(watch):
+    w, _scanned = watch
+    path = drop(w.roots[0], "a.jpg")
+    w.run_cycle()
+    os.utime(w.index.index_path, ns=(1, 1))  # A rewrite would move it forward again
+    w.run_cycle()
+    w.run_cycle({os.path.join(w.roots[0], "gone.jpg")})  # Unknown path: nothing to forget
+    assert os.stat(w.index.index_path).st_mtime_ns == 1 and not w.index.dirty
+
+    os.remove(path)
+    w.run_cycle({path})
+    assert os.stat(w.index.index_path).st_mtime_ns != 1
+    assert SnapshotIndex(w.index.index_path).entries == {}
+
+def _event(wd, mask, name=b""):
+    name = name + b"\x00" * (-len(name) % 16) if name else b""
+    return _EVENT_HEADER.pack(wd, mask, 0, len(name)) + name
+
+@pytest.mark.skipif(_Inotify.create([]) is None, reason="inotify not available")
+def test_inotify_moved_folder_and_overflow(tmp_path):
+    root = str(tmp_path / "drop")
+    sub = os.path.join(root, "sub")
+    drop(sub, "a.jpg")
+    notify = _Inotify.create([root])
+    try:
+        assert sorted(notify.dirs.values()) == [root, sub]
+        shutil.move(sub, str(tmp_path / "elsewhere"))
+        assert notify.wait(2.0) == {sub}
+        assert list(notify.dirs.values()) == [root]  # Watch on the moved folder removed
+
+        changed = set()
+        assert notify._parse_events(_event(-1, _IN_Q_OVERFLOW), changed) is False
+    finally:
+        notify.close()
+
+def test_overflow_triggers_full_rescan(watch):
+    w, scanned = watch
+    path = drop(w.roots[0], "a.jpg")
+
+    class Overflowed:
+        def wait(self, timeout):
+            return None
+        def close(self):
+            pass
+
+    w.inotify = Overflowed()
+    assert w._wait_for_changes() is None
+    w.run_cycle(w._wait_for_changes())
+    assert scanned == [path]